@@ -0,0 +1,162 @@
+import re
+from typing import List, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, ToolMessage, RemoveMessage
+from schemas.state import AgentState
+
+CHARS_PER_TOKEN = 4  # rough estimate for English prose, no tokenizer call needed
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_MAX_CHARS = 4000
+SUMMARY_LINE_CHARS = 240
+
+
+def message_text(message: BaseMessage) -> str:
+    """Plain text of a message, including text blocks of list content"""
+    if isinstance(message.content, str):
+        return message.content
+    return " ".join(
+        block.get("text", "") if isinstance(block, dict) else str(block)
+        for block in message.content
+    )
+
+
+def estimate_tokens(messages: List[BaseMessage]) -> int:
+    return sum(len(message_text(message)) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS for message in messages)
+
+
+def _pinned_count(messages: List[BaseMessage]) -> int:
+    """Leading messages that are always kept: the system prompt and the research query"""
+    for i, message in enumerate(messages):
+        if isinstance(message, HumanMessage):
+            return i + 1
+    return len(messages)
+
+
+def _turn_starts(messages: List[BaseMessage], offset: int) -> List[int]:
+    """Indices where a turn starts: a prompt or a tool result, followed by the model's response"""
+    return [
+        i for i in range(offset, len(messages))
+        if isinstance(messages[i], (HumanMessage, ToolMessage))
+    ]
+
+
+def _split_history(messages: List[BaseMessage], keep_turns: int) -> Tuple[List[BaseMessage], List[BaseMessage], List[BaseMessage]]:
+    """Split messages into (pinned, older turns, last `keep_turns` turns)"""
+    pinned_count = _pinned_count(messages)
+    starts = _turn_starts(messages, pinned_count)
+    keep_turns = max(keep_turns, 1)
+    
+    recent_start = starts[-keep_turns] if len(starts) >= keep_turns else pinned_count
+    return messages[:pinned_count], messages[pinned_count:recent_start], messages[recent_start:]
+
+
+def _clip(text: str, limit: int) -> str:
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text if len(text) <= limit else text[:limit].rsplit(' ', 1)[0] + "..."
+
+
+def summarize_turns(messages: List[BaseMessage]) -> List[str]:
+    """
+    One extractive summary line per turn: the first line of the prompt (or the
+    tool result) and the opening of the model's response
+    """
+    lines = []
+    starts = _turn_starts(messages, 0) or [0]
+    if starts[0] != 0:
+        starts.insert(0, 0)
+    
+    for start, end in zip(starts, starts[1:] + [len(messages)]):
+        turn = messages[start:end]
+        opener = message_text(turn[0]).strip()
+        
+        if isinstance(turn[0], ToolMessage):
+            line = f"- Tool: {_clip(opener, SUMMARY_LINE_CHARS)}"
+        else:
+            topic = _clip(opener.split('\n', 1)[0], 80)
+            line = f"- {topic}"
+        
+        responses = " ".join(message_text(message) for message in turn[1:])
+        if responses.strip():
+            line += f" -> {_clip(responses, SUMMARY_LINE_CHARS)}"
+        lines.append(line)
+    
+    return lines
+
+
+def _merge_summary(summary: str, lines: List[str], max_chars: int = SUMMARY_MAX_CHARS) -> str:
+    """Append summary lines, dropping the oldest lines beyond max_chars"""
+    merged = "\n".join(line for line in [summary, *lines] if line)
+    if max_chars <= 0:
+        return ""
+    if len(merged) <= max_chars:
+        return merged
+    tail = merged[-max_chars:]
+    return tail.split('\n', 1)[1] if '\n' in tail else tail
+
+
+def compact_history(state: AgentState, new_messages: List[BaseMessage]) -> dict:
+    """
+    State update appending new messages and folding turns older than the last
+    `context_keep_turns` into the running history summary
+    
+    Older messages are removed from the state with RemoveMessage, so the stored
+    history stays bounded however many iterations run.
+    
+    Args:
+        state: Current agent state
+        new_messages: Messages produced by the node
+    
+    Returns:
+        Partial state with "messages" and "history_summary"
+    """
+    messages = state["messages"] + new_messages
+    _, older, _ = _split_history(messages, state["context_keep_turns"])
+    older = [message for message in older if message.id]
+    
+    if not older:
+        return {"messages": messages, "history_summary": state["history_summary"]}
+    
+    return {
+        "messages": messages + [RemoveMessage(id=message.id) for message in older],
+        "history_summary": _merge_summary(state["history_summary"], summarize_turns(older))
+    }
+
+
+def build_context(state: AgentState, prompt_messages: List[BaseMessage]) -> Tuple[List[BaseMessage], int]:
+    """
+    Messages for one model call: the pinned system prompt and query, the running
+    summary, the most recent turns verbatim and the node's prompt, within
+    `context_token_budget` estimated tokens
+    
+    Recent turns that do not fit the budget are folded into the summary for this
+    call, oldest first; the prompt itself is never cut.
+    
+    Returns:
+        (messages, estimated prompt tokens)
+    """
+    pinned, _, recent = _split_history(state["messages"], state["context_keep_turns"])
+    # Tool results are sent as plain text: no tools are bound, so there is no matching tool call
+    recent = [
+        HumanMessage(content=f"Tool result: {message_text(message)}") if isinstance(message, ToolMessage) else message
+        for message in recent
+    ]
+    summary = state["history_summary"]
+    budget = state["context_token_budget"]
+    
+    def assemble() -> List[BaseMessage]:
+        summary_messages = [SystemMessage(content=f"Summary of earlier research steps:\n{summary}")] if summary else []
+        return pinned + summary_messages + recent + prompt_messages
+    
+    messages = assemble()
+    while estimate_tokens(messages) > budget and recent:
+        starts = _turn_starts(recent, 1)
+        cut = starts[0] if starts else len(recent)
+        summary = _merge_summary(summary, summarize_turns(recent[:cut]))
+        recent = recent[cut:]
+        messages = assemble()
+    
+    overflow_chars = (estimate_tokens(messages) - budget) * CHARS_PER_TOKEN
+    if overflow_chars > 0 and summary:
+        summary = _merge_summary("", summary.split('\n'), max(len(summary) - overflow_chars, 0))
+        messages = assemble()
+    
+    return messages, estimate_tokens(messages)
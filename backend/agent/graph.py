@@ -1,18 +1,80 @@
-from typing import Literal
+import os
+import uuid
+import sqlite3
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Callable, Dict, Iterable, Iterator, Literal, Optional, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage
 from langgraph.graph import StateGraph, START, END
+from langgraph.checkpoint.sqlite import SqliteSaver
 from schemas.state import AgentState, AgentConfig
 from agent.nodes import (
     planning_node, reasoning_node, search_node, 
     analysis_node, document_generation_node
 )
+from agent.result_store import count_unanalyzed
 from utils.system_prompt import REACT_SYSTEM_PROMPT
+from config import get_settings
+
+# Model tier per LLM node: the large model only writes the final report
+DEFAULT_NODE_MODELS = {
+    "planning": "fast",
+    "reasoning": "fast",
+    "analysis": "fast",
+    "document_generation": "large"
+}
+
+
+@lru_cache()
+def get_checkpointer() -> Optional[SqliteSaver]:
+    """Process-wide SQLite checkpointer, or None when checkpointing is disabled"""
+    settings = get_settings()
+    if not settings.research_checkpoints_enabled:
+        return None
+    
+    directory = os.path.dirname(settings.research_checkpoint_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # One connection shared by all runs; SqliteSaver serializes access to it
+    conn = sqlite3.connect(settings.research_checkpoint_path, check_same_thread=False)
+    return SqliteSaver(conn)
+
+
+def prune_checkpoints(max_age: timedelta, keep: Iterable[str] = ()) -> int:
+    """
+    Delete the checkpoints of every run whose latest checkpoint is older than `max_age`
+    
+    Args:
+        max_age: Age after which a run can no longer be resumed
+        keep: Run ids that must be kept (e.g. runs still in progress)
+    
+    Returns:
+        Number of runs deleted
+    """
+    checkpointer = get_checkpointer()
+    if checkpointer is None:
+        return 0
+    
+    latest = {}
+    for checkpoint in checkpointer.list(None):
+        run_id = checkpoint.config["configurable"]["thread_id"]
+        created_at = datetime.fromisoformat(checkpoint.checkpoint["ts"])
+        latest[run_id] = max(created_at, latest.get(run_id, created_at))
+    
+    cutoff = datetime.now(timezone.utc) - max_age
+    keep = set(keep)
+    expired = [run_id for run_id, created_at in latest.items() if created_at < cutoff and run_id not in keep]
+    for run_id in expired:
+        checkpointer.delete_thread(run_id)
+    return len(expired)
 
 
 class ResearchAgent:
     
-    def __init__(self, config: AgentConfig = None):
+    def __init__(self, config: AgentConfig = None, checkpoint: bool = False):
+        # Only resumable runs (background jobs) are checkpointed
         self.config = config or AgentConfig()
+        self.checkpoint = checkpoint
         self.graph = self._build_graph()
     
     def _build_graph(self) -> StateGraph:
@@ -44,78 +106,226 @@ class ResearchAgent:
         
         workflow.add_edge("document_generation", END)
         
-        return workflow.compile()
+        return workflow.compile(checkpointer=get_checkpointer() if self.checkpoint else None)
     
     def _route_from_reasoning(self, state: AgentState) -> Literal["search", "analysis", "generate", "end"]:
+        """
+        Deterministic routing on the typed decision of the reasoning node
         
+        Termination rules are checked before the decision, so the model cannot
+        keep the loop going once the budget is spent or the evidence suffices.
+        """
         if state["status"] == "error" or state["error_count"] >= state["max_errors"]:
             return "end"
         
         if state["status"] == "completed":
             return "end"
         
-        if state["iteration_count"] >= state["max_iterations"]:
+        if state["status"] == "generating":
             return "generate"
         
-        if state["status"] == "generating":
+        # Iteration budget
+        if state["iteration_count"] >= state["max_iterations"]:
             return "generate"
         
-        next_action = state.get("next_action", "").lower()
+        has_evidence = len(state["evidence_collected"]) >= self.config.min_evidence
+        has_sources = len(state["search_results"]) >= self.config.min_search_results
+        unanalyzed = count_unanalyzed(state["search_results"], state["analyzed_result_keys"])
+        decision = state["last_decision"]
         
-        if any(keyword in next_action for keyword in ["search", "look up", "investigate", "find"]):
-            return "search"
+        # Early termination: the model is confident enough, the evidence already
+        # meets both thresholds, or searching has stopped producing new results
+        if decision and decision.done and decision.confidence >= self.config.confidence_threshold and state["evidence_collected"]:
+            return "generate"
+        if has_evidence and has_sources:
+            return "generate"
+        if state["stalled_searches"] >= self.config.max_stalled_searches:
+            return "analysis" if unanalyzed else "generate"
         
-        if any(keyword in next_action for keyword in ["analyze", "examine", "review", "synthesize"]):
-            return "analysis"
+        # One iteration left: spend it on results already fetched rather than a new search
+        if state["max_iterations"] - state["iteration_count"] <= 1:
+            return "analysis" if unanalyzed else "generate"
         
-        if any(keyword in next_action for keyword in ["generate", "write", "create", "document", "report"]):
-            return "generate"
+        action = decision.action if decision else "search"
         
-        if len(state["search_results"]) < self.config.min_search_results:
-            return "search"
+        if action == "generate":
+            return "generate" if state["search_results"] else "search"
         
-        if len(state["evidence_collected"]) < 3:
-            return "analysis"
+        if action == "analyze":
+            return "analysis" if unanalyzed else "search"
         
-        return "generate"
+        return "search"
     
-    def research(self, query: str) -> AgentState:
-        
-        initial_state: AgentState = {
+    def _resolve_node_models(self) -> Dict[str, str]:
+        """Bedrock model id per node, from the defaults and the config overrides"""
+        settings = get_settings()
+        tiers = {"fast": settings.agent_fast_model, "large": settings.agent_large_model}
+        node_models = {**DEFAULT_NODE_MODELS, **self.config.node_models}
+        return {node: tiers.get(model, model) for node, model in node_models.items()}
+    
+    def _initial_state(self, query: str, run_id: str) -> AgentState:
+        return {
+            "run_id": run_id,
             "messages": [
                 SystemMessage(content=REACT_SYSTEM_PROMPT),
                 HumanMessage(content=f"Research Query: {query}")
             ],
+            "history_summary": "",
+            "context_keep_turns": self.config.context_keep_turns,
+            "context_token_budget": self.config.context_token_budget,
+            "context_tokens": [],
+            "node_models": self._resolve_node_models(),
+            "node_metrics": {},
             "original_query": query,
             "research_plan": [],
             "current_step": 0,
             "search_results": [],
+            "analyzed_result_keys": [],
             "evidence_collected": [],
             "document_outline": [],
             "final_document": None,
             "current_reasoning": "",
             "next_action": "",
+            "last_decision": None,
+            "pending_queries": [],
+            "stalled_searches": 0,
             "iteration_count": 0,
             "max_iterations": self.config.max_iterations,
+            "max_parallel_queries": self.config.max_parallel_queries,
+            "search_concurrency": self.config.search_concurrency,
+            "bypass_search_cache": self.config.bypass_search_cache,
             "last_tool_result": None,
             "error_count": 0,
             "max_errors": self.config.max_errors,
             "status": "planning",
-            "completion_reason": ""
+            "completion_reason": "",
+            "failed_node": None
         }
+    
+    @staticmethod
+    def _run_config(run_id: str) -> dict:
+        # Checkpoints are stored per LangGraph thread, one thread per research run
+        return {"configurable": {"thread_id": run_id}}
+    
+    def get_run_state(self, run_id: str) -> Optional[AgentState]:
+        """Latest checkpointed state of a run, or None if it has no checkpoint"""
+        if self.graph.checkpointer is None:
+            return None
+        snapshot = self.graph.get_state(self._run_config(run_id))
+        return snapshot.values or None
+    
+    def delete_run(self, run_id: str):
+        """Drop every checkpoint of a run, e.g. once its report is done"""
+        if self.graph.checkpointer is not None:
+            self.graph.checkpointer.delete_thread(run_id)
+    
+    def _prepare_resume(self, run_id: str) -> Optional[dict]:
+        """
+        Make a checkpointed run resumable and return the graph input that continues it
+        
+        A run interrupted by an exception resumes at the node that was pending.
+        A run that ended without a report (its node errors were handled) resumes
+        from the reasoning router with the error count reset, keeping all
+        fetched results and evidence; a failed report generation is retried directly.
+        
+        Raises:
+            ValueError: No checkpoint exists for the run
+        """
+        if self.graph.checkpointer is None:
+            raise ValueError("Research checkpoints are disabled")
+        
+        config = self._run_config(run_id)
+        snapshot = self.graph.get_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for research run {run_id}")
+        
+        state = snapshot.values
+        if not snapshot.next and state["final_document"] is None:
+            status = "generating" if state["failed_node"] == "document_generation" else "researching"
+            self.graph.update_state(
+                config,
+                {"status": status, "error_count": 0, "completion_reason": "", "failed_node": None},
+                as_node="reasoning"
+            )
         
+        # None continues from the latest checkpoint instead of starting over
+        return None
+    
+    def research(self, query: str, run_id: Optional[str] = None) -> AgentState:
+        
+        run_id = run_id or str(uuid.uuid4())
+        initial_state = self._initial_state(query, run_id)
+        return self._invoke(initial_state, run_id, initial_state)
+    
+    def resume(self, run_id: str) -> AgentState:
+        """Continue a checkpointed run, reusing its searches, analyses and evidence"""
+        graph_input = self._prepare_resume(run_id)
+        return self._invoke(graph_input, run_id, self.get_run_state(run_id))
+    
+    def _invoke(self, graph_input: Optional[dict], run_id: str, fallback_state: AgentState) -> AgentState:
         try:
-            final_state = self.graph.invoke(initial_state)
+            final_state = self.graph.invoke(graph_input, self._run_config(run_id))
             return final_state
         except Exception as e:
-            error_state = initial_state.copy()
+            # Keep everything up to the last completed node, so the run can be resumed
+            error_state = (self.get_run_state(run_id) or fallback_state).copy()
             error_state["status"] = "error"
             error_state["completion_reason"] = f"Unexpected error: {str(e)}"
             error_state["error_count"] = error_state["max_errors"]
             return error_state
     
+    def stream_research(
+        self,
+        query: str,
+        run_id: Optional[str] = None,
+        on_report_delta: Optional[Callable[[str], None]] = None
+    ) -> Iterator[Tuple[str, AgentState]]:
+        """
+        Run the graph step by step, yielding (node name, state after the node)
+        as each node finishes. Nodes only start when the next item is requested,
+        so a consumer that stops iterating stops all further model and search calls.
+        
+        Args:
+            query: Research query
+            run_id: Run identifier used as checkpoint thread (generated if omitted)
+            on_report_delta: Called with each cleaned chunk of the report while it is generated
+        
+        Returns:
+            Iterator of (node name, full state) pairs
+        """
+        run_id = run_id or str(uuid.uuid4())
+        return self._stream(self._initial_state(query, run_id), run_id, on_report_delta)
+    
+    def stream_resume(
+        self,
+        run_id: str,
+        on_report_delta: Optional[Callable[[str], None]] = None
+    ) -> Iterator[Tuple[str, AgentState]]:
+        """Like stream_research, continuing a checkpointed run (see resume)"""
+        return self._stream(self._prepare_resume(run_id), run_id, on_report_delta)
+    
+    def _stream(
+        self,
+        graph_input: Optional[dict],
+        run_id: str,
+        on_report_delta: Optional[Callable[[str], None]] = None
+    ) -> Iterator[Tuple[str, AgentState]]:
+        node = None
+        stream_mode = ["updates", "values"] + (["custom"] if on_report_delta else [])
+        for mode, chunk in self.graph.stream(graph_input, self._run_config(run_id), stream_mode=stream_mode):
+            # Custom chunks arrive while a node runs; each step then emits the node's update, then the merged state
+            if mode == "custom":
+                if "report_delta" in chunk:
+                    on_report_delta(chunk["report_delta"])
+            elif mode == "updates":
+                node = next(iter(chunk), None)
+            elif node:
+                yield node, chunk
+                node = None
+    
     def get_research_summary(self, state: AgentState) -> dict:
         return {
+            "run_id": state["run_id"],
             "query": state["original_query"],
             "status": state["status"],
             "completion_reason": state["completion_reason"],
@@ -123,5 +333,7 @@ class ResearchAgent:
             "sources_found": len(state["search_results"]),
             "evidence_collected": len(state["evidence_collected"]),
             "has_document": state["final_document"] is not None,
-            "errors": state["error_count"]
+            "errors": state["error_count"],
+            "context_tokens": state["context_tokens"],
+            "node_metrics": state["node_metrics"]
         }
@@ -0,0 +1,267 @@
+import uuid
+import time
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from agent.graph import ResearchAgent, prune_checkpoints
+from agent.runner import ResearchRunner
+from schemas.state import AgentConfig, AgentState
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("completed", "failed", "cancelled")
+CHECKPOINT_PRUNE_INTERVAL_SECONDS = 3600
+
+
+class ResearchJob:
+    """One background research run, its progress events and its result"""
+    
+    def __init__(self, query: str, config: AgentConfig, job_id: Optional[str] = None):
+        # The job id is also the run id under which the graph checkpoints its state
+        self.job_id = job_id or str(uuid.uuid4())
+        self.query = query
+        self.config = config
+        self.status = "queued"
+        self.current_node: Optional[str] = None
+        self.iterations = 0
+        self.sources_found = 0
+        self.evidence_collected = 0
+        self.document_content: Optional[str] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.updated_at = self.created_at
+        self.events: List[dict] = []
+        self.resuming = False
+        self.cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        # (loop, event) of each stream waiting in wait_for_events
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    def add_event(self, event: str, status: Optional[str] = None, **data):
+        """Record an event (and status change) and wake up every stream waiting on this job"""
+        with self._lock:
+            # Status and event change together, so streams never see a finished job without its last event
+            if status:
+                self.status = status
+            self.updated_at = datetime.now(timezone.utc)
+            self.events.append({
+                "id": len(self.events),
+                "event": event,
+                "status": self.status,
+                "timestamp": self.updated_at.isoformat(),
+                **data
+            })
+            for loop, wake in self._waiters:
+                try:
+                    loop.call_soon_threadsafe(wake.set)
+                except RuntimeError:
+                    # The stream's event loop has already closed
+                    pass
+    
+    async def wait_for_events(self, after: int, timeout: float) -> Tuple[List[dict], bool]:
+        """
+        Wait until there are events past `after`, the job finishes or the timeout expires
+        
+        The worker thread wakes the stream through its event loop, so a
+        waiting stream holds no thread and is cancelled as soon as the
+        client disconnects.
+        
+        Args:
+            after: Number of events the caller has already seen
+            timeout: Maximum seconds to wait
+        
+        Returns:
+            (new events, whether the job is finished)
+        """
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            if len(self.events) > after or self.finished:
+                return self.events[after:], self.finished
+            self._waiters.append(waiter)
+        
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._lock:
+                self._waiters.remove(waiter)
+        
+        with self._lock:
+            return self.events[after:], self.finished
+
+
+class ResearchJobManager:
+    """
+    Runs research jobs on a bounded thread pool and keeps them in memory.
+    
+    Each job records an event per graph node as it finishes; cancellation is
+    checked between nodes, so no model or search call starts after it.
+    
+    Job runs are checkpointed so they can be resumed. A completed run's
+    checkpoints are deleted with its report; those of failed or cancelled
+    runs expire after `research_checkpoint_ttl_hours`.
+    """
+    
+    def __init__(self):
+        self.settings = get_settings()
+        self.runner = ResearchRunner(output_dir=None)
+        self._executor = ThreadPoolExecutor(max_workers=self.settings.research_max_concurrent_jobs)
+        self._jobs: "OrderedDict[str, ResearchJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+    
+    def submit(self, query: str, config: AgentConfig) -> ResearchJob:
+        job = ResearchJob(query, config)
+        
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._evict_finished()
+        
+        job.add_event("queued", query=query)
+        self._executor.submit(self._run, job)
+        logger.info(f"Research job {job.job_id} queued: {query}")
+        return job
+    
+    def resume(self, job_id: str) -> ResearchJob:
+        """
+        Queue a job again from its last checkpoint, e.g. after a failure or a restart
+        
+        Jobs no longer in memory are restored from their checkpoint with the
+        default agent configuration.
+        
+        Raises:
+            ValueError: No checkpoint exists for the job
+            RuntimeError: The job is still queued or running, or already completed
+        """
+        job = self.get(job_id)
+        if job is None:
+            state = ResearchAgent(checkpoint=True).get_run_state(job_id)
+            if not state:
+                raise ValueError(f"No checkpoint found for research job {job_id}")
+            job = ResearchJob(state["original_query"], AgentConfig(), job_id=job_id)
+            with self._lock:
+                job = self._jobs.setdefault(job_id, job)
+                self._evict_finished()
+        
+        with job._lock:
+            if not job.finished and job.events:
+                raise RuntimeError(f"Research job {job_id} is still {job.status}")
+            if job.status == "completed":
+                raise RuntimeError(f"Research job {job_id} already completed")
+            job.cancel_event.clear()
+            job.error = None
+            job.document_content = None
+            job.resuming = True
+        
+        job.add_event("queued", status="queued", resumed=True)
+        self._executor.submit(self._run, job)
+        logger.info(f"Research job {job_id} queued for resume")
+        return job
+    
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[ResearchJob]:
+        job = self.get(job_id)
+        if job and not job.finished:
+            job.cancel_event.set()
+            logger.info(f"Research job {job_id} cancellation requested")
+        return job
+    
+    def _evict_finished(self):
+        """Drop the oldest finished jobs beyond the retention limit (caller holds the lock)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.settings.research_job_retention, 0)]:
+            del self._jobs[job_id]
+    
+    def _prune_checkpoints(self):
+        """Delete expired checkpoints, at most once per CHECKPOINT_PRUNE_INTERVAL_SECONDS"""
+        with self._lock:
+            if self._last_prune and time.monotonic() - self._last_prune < CHECKPOINT_PRUNE_INTERVAL_SECONDS:
+                return
+            self._last_prune = time.monotonic()
+            active = [job_id for job_id, job in self._jobs.items() if not job.finished]
+        
+        try:
+            pruned = prune_checkpoints(timedelta(hours=self.settings.research_checkpoint_ttl_hours), keep=active)
+            if pruned:
+                logger.info(f"Deleted the checkpoints of {pruned} expired research runs")
+        except Exception as e:
+            logger.warning(f"Research checkpoint pruning failed: {e}")
+    
+    def _run(self, job: ResearchJob):
+        try:
+            self._run_job(job)
+        finally:
+            self._prune_checkpoints()
+    
+    def _run_job(self, job: ResearchJob):
+        if job.cancel_event.is_set():
+            job.add_event("cancelled", status="cancelled")
+            return
+        
+        job.add_event("started", status="running")
+        state: Optional[AgentState] = None
+        
+        try:
+            agent = ResearchAgent(job.config, checkpoint=True)
+            
+            def on_report_delta(text: str):
+                job.add_event("report_delta", text=text)
+            
+            if job.resuming:
+                steps = agent.stream_resume(job.job_id, on_report_delta=on_report_delta)
+            else:
+                steps = agent.stream_research(job.query, run_id=job.job_id, on_report_delta=on_report_delta)
+            
+            for node, state in steps:
+                job.current_node = node
+                job.iterations = state["iteration_count"]
+                job.sources_found = len(state["search_results"])
+                job.evidence_collected = len(state["evidence_collected"])
+                job.add_event(
+                    "node",
+                    node=node,
+                    agent_status=state["status"],
+                    iterations=job.iterations,
+                    sources_found=job.sources_found,
+                    evidence_collected=job.evidence_collected,
+                    context_tokens=state["context_tokens"][-1] if state["context_tokens"] else None
+                )
+                
+                if job.cancel_event.is_set():
+                    break
+            
+            if job.cancel_event.is_set():
+                job.add_event("cancelled", status="cancelled", node=job.current_node)
+                logger.info(f"Research job {job.job_id} cancelled after {job.current_node}")
+                return
+            
+            if state is None:
+                # Nothing left to run, e.g. resuming a run that already completed
+                state = agent.get_run_state(job.job_id)
+            
+            if state and state["final_document"]:
+                job.document_content = self.runner._generate_markdown_document(state["final_document"], state)
+                # The report is kept with the job; a completed run is not resumed
+                agent.delete_run(job.job_id)
+                job.add_event("completed", status="completed", completion_reason=state["completion_reason"])
+            else:
+                job.error = (state and state["completion_reason"]) or "Research completed but no document was generated"
+                job.add_event("failed", status="failed", error=job.error)
+        
+        except Exception as e:
+            logger.error(f"Research job {job.job_id} failed: {e}")
+            job.error = str(e)
+            job.add_event("failed", status="failed", error=job.error)
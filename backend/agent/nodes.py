@@ -1,19 +1,29 @@
 import json
-from typing import List, Dict, Any, Optional
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
 from datetime import datetime
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, ToolMessage
-from schemas.state import AgentState, SearchResult, ResearchEvidence, ResearchDocument, ResearchSection
+from langgraph.config import get_stream_writer
+from schemas.state import AgentState, SearchResult, ResearchEvidence, ResearchDocument, ResearchSection, ReasoningDecision
 from utils.system_prompt import (
     REACT_SYSTEM_PROMPT, PLANNING_PROMPT, SEARCH_ANALYSIS_PROMPT, 
-    DOCUMENT_GENERATION_PROMPT, ERROR_RECOVERY_PROMPT, COMPLETION_VALIDATION_PROMPT
+    DOCUMENT_GENERATION_PROMPT, ERROR_RECOVERY_PROMPT, COMPLETION_VALIDATION_PROMPT,
+    REASONING_DECISION_PROMPT
 )
-from tools.search import tavily_search, perplexity_search
+from tools.search import run_tavily_search, run_perplexity_search
+from agent.context import build_context, compact_history, message_text
+from agent.report_stream import ReportStreamCleaner
+from agent.result_store import ResultStore, result_key, count_unanalyzed
 import re
 from langchain_aws import ChatBedrockConverse
 from config import get_settings
 import boto3
 import os
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 os.environ['AWS_ACCESS_KEY_ID'] = settings.access_key_id
@@ -27,10 +37,94 @@ bedrock_client = boto3.client(
     region_name=settings.aws_default_region
 )
 
-llm = ChatBedrockConverse(
-    model="us.anthropic.claude-3-7-sonnet-20250219-v1:0",  
-    client=bedrock_client
-)
+# Models are created on first use and shared by all runs, one per model id (and structured output schema)
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _get_model(model_id: str, schema: Optional[type] = None):
+    key = (model_id, schema)
+    with _models_lock:
+        if key not in _models:
+            model = ChatBedrockConverse(model=model_id, client=bedrock_client)
+            # Tool-based structured output; the raw message is kept for token accounting and text fallback
+            _models[key] = model.with_structured_output(schema, include_raw=True) if schema else model
+        return _models[key]
+
+
+def _invoke_model(state: AgentState, node: str, messages: list, schema: Optional[type] = None) -> Tuple[Any, Dict[str, dict]]:
+    """
+    Invoke the model configured for a node and account for its latency and tokens
+    
+    Args:
+        state: Current agent state (provides node_models and node_metrics)
+        node: Node name, e.g. "reasoning"
+        messages: Prompt messages
+        schema: Pydantic model for structured output; the result is then {"raw", "parsed", "parsing_error"}
+    
+    Returns:
+        (model result, updated node_metrics)
+    """
+    model_id = state["node_models"][node]
+    start_time = time.time()
+    result = _get_model(model_id, schema).invoke(messages)
+    latency = time.time() - start_time
+    
+    usage = (result["raw"] if schema else result).usage_metadata or {}
+    return result, _record_metrics(state, node, model_id, latency, usage)
+
+
+def _stream_model(state: AgentState, node: str, messages: list, on_text: Callable[[str], None]) -> Tuple[AIMessage, Dict[str, dict]]:
+    """
+    Stream the response of the model configured for a node, passing each text delta to `on_text`
+    
+    Returns:
+        (complete response, updated node_metrics including the time to the first token)
+    """
+    model_id = state["node_models"][node]
+    start_time = time.time()
+    first_token_latency = None
+    response = None
+    
+    for chunk in _get_model(model_id).stream(messages):
+        response = chunk if response is None else response + chunk
+        text = message_text(chunk)
+        if text:
+            if first_token_latency is None:
+                first_token_latency = time.time() - start_time
+            on_text(text)
+    
+    latency = time.time() - start_time
+    usage = (response.usage_metadata if response else None) or {}
+    metrics = _record_metrics(state, node, model_id, latency, usage)
+    if first_token_latency is not None:
+        metrics[node]["first_token_seconds"] = round(first_token_latency, 3)
+    
+    return AIMessage(content=message_text(response) if response else ""), metrics
+
+
+def _custom_stream_writer() -> Callable[[dict], None]:
+    """Writer for the graph's "custom" stream, or a no-op when the node runs outside a graph run"""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda chunk: None
+
+
+def _record_metrics(state: AgentState, node: str, model_id: str, latency: float, usage: dict) -> Dict[str, dict]:
+    metrics = {name: dict(values) for name, values in state["node_metrics"].items()}
+    node_metrics = metrics.setdefault(node, {
+        "model": model_id, "calls": 0, "latency_seconds": 0.0, "input_tokens": 0, "output_tokens": 0
+    })
+    node_metrics["calls"] += 1
+    node_metrics["latency_seconds"] = round(node_metrics["latency_seconds"] + latency, 3)
+    node_metrics["input_tokens"] += usage.get("input_tokens", 0)
+    node_metrics["output_tokens"] += usage.get("output_tokens", 0)
+    
+    return metrics
+
+
+result_store = ResultStore()
 
 
 
@@ -47,12 +141,13 @@ def planning_node(state: AgentState) -> AgentState:
     ]
     
     try:
-        response = llm.invoke(messages)
+        response, node_metrics = _invoke_model(state, "planning", messages)
         
         research_plan = _extract_research_plan(response.content)
         
         updated_state = state.copy()
-        updated_state["messages"] = state["messages"] + [HumanMessage(content=planning_message), response]
+        updated_state.update(compact_history(state, [HumanMessage(content=planning_message), response]))
+        updated_state["node_metrics"] = node_metrics
         updated_state["research_plan"] = research_plan
         updated_state["current_reasoning"] = response.content
         updated_state["status"] = "researching"
@@ -84,18 +179,29 @@ def reasoning_node(state: AgentState) -> AgentState:
     else:
         analysis_prompt = "Analyze the current research state and determine next action."
     
-    messages = state["messages"] + [HumanMessage(content=analysis_prompt)]
+    analysis_prompt += REASONING_DECISION_PROMPT.format(
+        max_queries=state["max_parallel_queries"],
+        num_results=len(state["search_results"]),
+        num_evidence=len(state["evidence_collected"]),
+        unanalyzed=count_unanalyzed(state["search_results"], state["analyzed_result_keys"]),
+        remaining_iterations=state["max_iterations"] - state["iteration_count"]
+    )
+    
+    messages, context_tokens = build_context(state, [HumanMessage(content=analysis_prompt)])
     
     try:
-        response = llm.invoke(messages)
-        
-        next_action = _extract_next_action(response.content)
+        result, node_metrics = _invoke_model(state, "reasoning", messages, schema=ReasoningDecision)
+        decision = result["parsed"] or _fallback_decision(result["raw"].content)
         
         updated_state = state.copy()
-        updated_state["messages"] = state["messages"] + [HumanMessage(content=analysis_prompt), response]
-        updated_state["current_reasoning"] = response.content
-        updated_state["next_action"] = next_action
+        updated_state.update(compact_history(state, [HumanMessage(content=analysis_prompt), AIMessage(content=_render_decision(decision))]))
+        updated_state["node_metrics"] = node_metrics
+        updated_state["current_reasoning"] = decision.rationale
+        updated_state["next_action"] = decision.action
+        updated_state["last_decision"] = decision
+        updated_state["pending_queries"] = decision.queries[:state["max_parallel_queries"]]
         updated_state["iteration_count"] += 1
+        updated_state["context_tokens"] = state["context_tokens"] + [context_tokens]
         
         return updated_state
         
@@ -104,40 +210,48 @@ def reasoning_node(state: AgentState) -> AgentState:
 
 
 def search_node(state: AgentState) -> AgentState:
- 
-    search_query = _extract_search_query(state["current_reasoning"], state["next_action"])
-    
-    if not search_query:
-        search_query = state["research_plan"][min(state["current_step"], len(state["research_plan"]) - 1)]
-    
-    search_results = []
+    """
+    Search node: fans out every pending query of the research plan (plus the
+    query proposed by the last reasoning step) to the selected providers
+    concurrently and merges the results in one step.
+    """
+    search_queries, plan_steps = _pending_search_queries(state)
+    providers = _selected_search_providers(state["next_action"])
+    tasks = [
+        (query, provider, state["bypass_search_cache"])
+        for query in search_queries for provider in providers
+    ]
     
     try:
-        if "tavily" in state["next_action"].lower() or "both" in state["next_action"].lower():
-            tavily_result = tavily_search.invoke({"query": search_query})
-            search_results.extend(_parse_search_results(tavily_result, "tavily"))
+        with ThreadPoolExecutor(max_workers=max(1, min(state["search_concurrency"], len(tasks)))) as executor:
+            # Results are merged in task order, so the outcome does not depend on completion order
+            outcomes = list(executor.map(lambda task: _run_search(*task), tasks))
         
-        if "perplexity" in state["next_action"].lower() or "both" in state["next_action"].lower():
-            perplexity_result = perplexity_search.invoke({"query": search_query})
-            search_results.extend(_parse_search_results(perplexity_result, "perplexity"))
+        failures = sum(results is None for results in outcomes)
+        if failures == len(tasks):
+            return _handle_error(state, f"Search error: all {failures} provider searches failed", "search_node")
+        if failures:
+            logger.warning(f"{failures} of {len(tasks)} provider searches failed, continuing with the rest")
+        fetched = [result for results in outcomes if results for result in results]
         
-        if not search_results:
-            tavily_result = tavily_search.invoke({"query": search_query})
-            perplexity_result = perplexity_search.invoke({"query": search_query})
-            search_results.extend(_parse_search_results(tavily_result, "tavily"))
-            search_results.extend(_parse_search_results(perplexity_result, "perplexity"))
+        search_results = result_store.merge(state["search_results"], fetched)
+        result_store.score(state["original_query"], search_results)
         
         updated_state = state.copy()
         updated_state["search_results"].extend(search_results)
-        updated_state["last_tool_result"] = f"Found {len(search_results)} new results for: {search_query}"
-        updated_state["current_step"] += 1
+        updated_state["last_tool_result"] = f"Found {len(search_results)} new results for {len(search_queries)} queries: {'; '.join(search_queries)}"
+        if failures:
+            updated_state["last_tool_result"] += f" ({failures} of {len(tasks)} provider searches failed)"
+        updated_state["current_step"] += max(plan_steps, 1)
+        updated_state["pending_queries"] = []
+        updated_state["stalled_searches"] = 0 if search_results else state["stalled_searches"] + 1
         
         # Add tool message to conversation
         tool_message = ToolMessage(
-            content=f"Search completed. Found {len(search_results)} results for: {search_query}",
+            content=f"Search completed. Found {len(search_results)} results for: {'; '.join(search_queries)}",
             tool_call_id="search_" + str(state["current_step"])
         )
-        updated_state["messages"] = state["messages"] + [tool_message]
+        updated_state.update(compact_history(state, [tool_message]))
         
         return updated_state
         
@@ -151,7 +265,11 @@ def analysis_node(state: AgentState) -> AgentState:
     """
     
     # Prepare analysis context
-    recent_results = state["search_results"][-10:]  # Last 10 results
+    # Best-ranked results not analyzed yet, or the overall best once every result has been analyzed
+    analyzed = set(state["analyzed_result_keys"])
+    recent_results = result_store.top(state["search_results"], settings.research_analysis_top_k, exclude=analyzed)
+    if not recent_results:
+        recent_results = result_store.top(state["search_results"], settings.research_analysis_top_k)
     results_summary = "\n".join([
         f"Source: {result.title}\nContent: {result.content[:300]}...\nURL: {result.url}\n" 
         for result in recent_results if result.content
@@ -182,15 +300,19 @@ Present each finding as a clear, standalone statement that could be included in
     ]
     
     try:
-        response = llm.invoke(messages)
+        response, node_metrics = _invoke_model(state, "analysis", messages)
         
         
         new_evidence = _extract_evidence(response.content, recent_results)
         
         
         updated_state = state.copy()
-        updated_state["messages"] = state["messages"] + [HumanMessage(content=analysis_prompt), response]
+        updated_state.update(compact_history(state, [HumanMessage(content=analysis_prompt), response]))
+        updated_state["node_metrics"] = node_metrics
         updated_state["evidence_collected"].extend(new_evidence)
+        updated_state["analyzed_result_keys"] = state["analyzed_result_keys"] + [
+            result_key(result) for result in recent_results if result_key(result) not in analyzed
+        ]
         updated_state["current_reasoning"] = response.content
         
         
@@ -215,7 +337,7 @@ def document_generation_node(state: AgentState) -> AgentState:
     
     sources_summary = "\n".join([
         f"- {result.title}: {result.content[:200]}..." 
-        for result in state["search_results"][:10]
+        for result in result_store.top(state["search_results"], settings.research_report_top_k)
     ])
     
     doc_prompt = DOCUMENT_GENERATION_PROMPT.format(
@@ -256,8 +378,20 @@ Generate a polished, professional markdown report that delivers real value to th
         HumanMessage(content=context_prompt)
     ]
     
+    # Cleaned report lines go to the "custom" stream as they complete
+    write = _custom_stream_writer()
+    cleaner = ReportStreamCleaner()
+    
+    def on_text(text: str):
+        cleaned = cleaner.feed(text)
+        if cleaned:
+            write({"report_delta": cleaned})
+    
     try:
-        response = llm.invoke(messages)
+        response, node_metrics = _stream_model(state, "document_generation", messages, on_text)
+        tail = cleaner.flush()
+        if tail:
+            write({"report_delta": tail})
         document_content = response.content
         
        
@@ -281,7 +415,8 @@ Generate a polished, professional markdown report that delivers real value to th
         
         # Update state
         updated_state = state.copy()
-        updated_state["messages"] = state["messages"] + [HumanMessage(content=context_prompt), response]
+        updated_state.update(compact_history(state, [HumanMessage(content=context_prompt), response]))
+        updated_state["node_metrics"] = node_metrics
         updated_state["final_document"] = final_document
         updated_state["status"] = "completed"
         updated_state["completion_reason"] = "Professional research report generated"
@@ -345,6 +480,41 @@ def _extract_executive_summary(content: str) -> str:
 
 
 
+def _fallback_decision(response_content) -> ReasoningDecision:
+    """Keyword-based decision for a response that did not parse as a ReasoningDecision"""
+    text = response_content if isinstance(response_content, str) else " ".join(
+        block.get("text", "") for block in response_content if isinstance(block, dict)
+    )
+    next_action = _extract_next_action(text)
+    
+    if any(keyword in next_action for keyword in ["generate", "write", "create", "document", "report"]):
+        action = "generate"
+    elif any(keyword in next_action for keyword in ["analyze", "examine", "review", "synthesize"]):
+        action = "analyze"
+    else:
+        action = "search"
+    
+    query = _extract_search_query(text, next_action)
+    return ReasoningDecision(
+        action=action,
+        queries=[query] if query else [],
+        confidence=0.0,
+        done=action == "generate",
+        rationale=next_action
+    )
+
+
+def _render_decision(decision: ReasoningDecision) -> str:
+    """Plain-text form of a decision for the message history"""
+    lines = [
+        f"Decision: {decision.action} (confidence {decision.confidence:.2f}, done: {decision.done})",
+        f"Rationale: {decision.rationale}"
+    ]
+    if decision.queries:
+        lines.append(f"Queries: {'; '.join(decision.queries)}")
+    return "\n".join(lines)
+
+
 def _extract_research_plan(response_content: str) -> List[str]:
     """Extract research plan from LLM response."""
     lines = response_content.split('\n')
@@ -395,50 +565,54 @@ def _extract_search_query(reasoning: str, next_action: str) -> str:
     return ""
 
 
-def _parse_search_results(search_result: str, source: str) -> List[SearchResult]:
-    """Parse search results from tool output."""
-    results = []
-    
-    # Split by numbered items or bullet points
-    items = re.split(r'\n(?:\d+\.|-)\s*\*\*', search_result)
+def _pending_search_queries(state: AgentState) -> Tuple[List[str], int]:
+    """
+    Queries for the next search fan-out: the queries of the last decision
+    first, then pending research plan steps
     
-    for item in items[1:]:  # Skip first item
-        lines = item.strip().split('\n')
-        if len(lines) >= 2:
-            # Extract title (first line)
-            title_line = lines[0].strip()
-            title = title_line.split('**')[0].strip() if '**' in title_line else title_line
-            
-            # Extract URL
-            url = ""
-            content_lines = []
-            
-            for line in lines[1:]:
-                line = line.strip()
-                if line.lower().startswith('url:') or line.lower().startswith('source:'):
-                    url = line.split(':', 1)[1].strip()
-                elif line.lower().startswith('summary:') or line.lower().startswith('content:'):
-                    content_lines.append(line.split(':', 1)[1].strip())
-                elif line and not line.lower().startswith(('url:', 'source:', 'retrieved:')):
-                    content_lines.append(line)
-            
-            content = ' '.join(content_lines).strip()
-            
-            # Clean up content
-            if content:
-                # Remove excessive whitespace and clean up
-                content = re.sub(r'\s+', ' ', content)
-                content = content[:500]  # Limit content length
-                
-                if title and len(content) > 20:  # Ensure meaningful content
-                    results.append(SearchResult(
-                        title=title,
-                        url=url,
-                        content=content,
-                        source=source
-                    ))
-    
-    return results
+    Returns:
+        (distinct queries, number of research plan steps they consume)
+    """
+    max_queries = max(state["max_parallel_queries"], 1)
+    queries = list(state["pending_queries"][:max_queries])
+    if not queries:
+        extracted = _extract_search_query(state["current_reasoning"], state["next_action"])
+        if extracted:
+            queries.append(extracted)
+    
+    plan = state["research_plan"]
+    step = state["current_step"]
+    pending_plan = plan[step:step + max(max_queries - len(queries), 0)]
+    queries.extend(pending_plan)
+    
+    if not queries and plan:
+        # Plan exhausted and nothing new proposed: revisit the last step
+        queries.append(plan[-1])
+    if not queries:
+        queries.append(state["original_query"])
+    
+    distinct = list(dict.fromkeys(query.strip() for query in queries if query.strip()))
+    return distinct, len(pending_plan)
+
+
+def _selected_search_providers(next_action: str) -> List[str]:
+    """Providers named in the next action, or both when none is named"""
+    action = next_action.lower()
+    providers = [
+        provider for provider in ("tavily", "perplexity")
+        if provider in action or "both" in action
+    ]
+    return providers or ["tavily", "perplexity"]
+
+
+def _run_search(query: str, provider: str, bypass_cache: bool = False) -> Optional[List[SearchResult]]:
+    """Run one provider search; a failure is logged and returns None instead of failing the fan-out"""
+    run_search = run_tavily_search if provider == "tavily" else run_perplexity_search
+    try:
+        return run_search(query, bypass_cache)
+    except Exception:
+        logger.warning(f"{provider} search failed for query: {query}", exc_info=True)
+        return None
 
 
 def _extract_evidence(analysis_content: str, sources: List[SearchResult]) -> List[ResearchEvidence]:
@@ -477,6 +651,7 @@ def _handle_error(state: AgentState, error_message: str, node_name: str) -> Agen
     updated_state = state.copy()
     updated_state["error_count"] += 1
     updated_state["last_tool_result"] = error_message
+    updated_state["failed_node"] = node_name.removesuffix("_node")
     
     if updated_state["error_count"] >= updated_state["max_errors"]:
         updated_state["status"] = "error"
@@ -0,0 +1,71 @@
+import re
+from typing import Optional
+
+# Same removals as _clean_document_content in agent/nodes.py, matched on one line at a time
+REMOVED_BLOCK = re.compile(
+    r'\*\*(?:THOUGHT|ACTION|OBSERVATION)\*\*:'
+    r'|## (?:Research Process|Methodology|Research Plan)'
+    r'|(?:THOUGHT|ACTION|OBSERVATION):',
+    re.IGNORECASE
+)
+
+
+class ReportStreamCleaner:
+    """
+    Incremental cleaning of a report streamed token by token.
+    
+    Tokens are buffered until a line is complete; each complete line is cleaned
+    and emitted. ReAct markers and process sections are removed as in
+    `_clean_document_content`, including blocks that span several lines, and
+    indentation and blank lines are dropped like its whitespace pass. The
+    stored report is still cleaned in one pass over the full text, so the
+    streamed preview may differ from it in rare edge cases.
+    """
+    
+    def __init__(self):
+        self._buffer = ""
+        # Terminator a removed block is waiting for: "**" for ReAct blocks, "##" for process sections
+        self._skip_until: Optional[str] = None
+    
+    def feed(self, text: str) -> str:
+        """Add streamed text and return the cleaned lines it completed (may be empty)"""
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        return "".join(self._clean_line(line) for line in lines)
+    
+    def flush(self) -> str:
+        """Clean and return the last, unterminated line"""
+        line, self._buffer = self._buffer, ""
+        return self._clean_line(line) if line else ""
+    
+    def _clean_line(self, line: str) -> str:
+        if self._skip_until:
+            end = line.find(self._skip_until)
+            if end < 0:
+                return ""
+            line = line[end:]
+            self._skip_until = None
+        
+        start = 0
+        while True:
+            match = REMOVED_BLOCK.search(line, start)
+            if not match:
+                break
+            
+            marker = match.group(0)
+            if not marker.startswith(("*", "#")):
+                # Plain "THOUGHT:" style markers run to the end of the line
+                line = line[:match.start()]
+                break
+            
+            terminator = "**" if marker.startswith("*") else "##"
+            end = line.find(terminator, match.end())
+            if end < 0:
+                line = line[:match.start()]
+                self._skip_until = terminator
+                break
+            line = line[:match.start()] + line[end:]
+            start = match.start()
+        
+        line = line.lstrip()
+        return f"{line}\n" if line.strip() else ""
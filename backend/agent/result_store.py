@@ -0,0 +1,136 @@
+import hashlib
+import logging
+from typing import Iterable, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from schemas.state import SearchResult
+from services.embedding_service import EmbeddingService
+from utils.vector_math import normalize
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+TRACKING_PARAMS = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+EMBED_TEXT_CHARS = 1000
+
+
+def canonical_url(url: str) -> str:
+    """Scheme and host lowercased, "www." and fragment dropped, tracking parameters removed, query sorted"""
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower().removeprefix("www.")
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower().startswith("utm_") or key.lower() in TRACKING_PARAMS)
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower() or "https", host, path, urlencode(query), ""))
+
+
+def content_hash(content: str) -> str:
+    """Hash of the content with case and whitespace normalized, so mirrored pages collide"""
+    normalized = " ".join(content.lower().split())
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def result_key(result: SearchResult) -> str:
+    """Stable identity of a result: its canonical URL, or its content hash when it has no URL"""
+    return canonical_url(result.url) or content_hash(result.content)
+
+
+def count_unanalyzed(results: List[SearchResult], analyzed_keys: Iterable[str]) -> int:
+    analyzed = set(analyzed_keys)
+    return sum(1 for result in results if result_key(result) not in analyzed)
+
+
+def _domain(result: SearchResult) -> str:
+    return urlsplit(result.url).netloc.lower().removeprefix("www.") if result.url else ""
+
+
+class ResultStore:
+    """
+    Deduplicates accumulated search results and ranks them against the research query.
+    
+    Results are scored once, when they are added, with one batched embedding call
+    per search step; the cosine similarity to the query is kept in `rank_score`.
+    """
+    
+    def __init__(self):
+        settings = get_settings()
+        self.embeddings = EmbeddingService().get_embeddings()
+        self.max_results_per_domain = settings.research_max_results_per_domain
+    
+    def merge(self, existing: List[SearchResult], new_results: Iterable[SearchResult]) -> List[SearchResult]:
+        """
+        New results that are not duplicates of existing ones or of each other
+        
+        A result is a duplicate when its canonical URL or its content hash was
+        already seen; empty results are dropped.
+        """
+        seen_urls = {canonical_url(result.url) for result in existing if result.url}
+        seen_hashes = {content_hash(result.content) for result in existing if result.content}
+        added = []
+        
+        for result in new_results:
+            if not result.content.strip():
+                continue
+            url = canonical_url(result.url)
+            digest = content_hash(result.content)
+            if (url and url in seen_urls) or digest in seen_hashes:
+                continue
+            if url:
+                seen_urls.add(url)
+            seen_hashes.add(digest)
+            added.append(result)
+        
+        return added
+    
+    def score(self, query: str, results: List[SearchResult]):
+        """Set `rank_score` on unscored results; on failure they keep falling back to provider scores"""
+        unscored = [result for result in results if result.rank_score is None]
+        if not unscored:
+            return
+        
+        texts = [f"{result.title}\n{result.content[:EMBED_TEXT_CHARS]}" for result in unscored]
+        try:
+            vectors = self.embeddings.embed_documents([query] + texts)
+        except Exception as e:
+            logger.warning(f"Search result scoring failed for {len(unscored)} results: {e}")
+            return
+        
+        query_vector = normalize(vectors[0])
+        for result, vector in zip(unscored, vectors[1:]):
+            result.rank_score = round(sum(q * v for q, v in zip(query_vector, normalize(vector))), 4)
+    
+    def top(self, results: List[SearchResult], k: int, exclude: Optional[set] = None) -> List[SearchResult]:
+        """
+        The k best results, at most `research_max_results_per_domain` per domain
+        
+        Args:
+            results: Candidate results
+            k: Number of results to return
+            exclude: Result keys to skip (e.g. results already analyzed)
+        
+        Returns:
+            Results ordered by rank score, then provider score
+        """
+        candidates = [result for result in results if not exclude or result_key(result) not in exclude]
+        ranked = sorted(
+            candidates,
+            key=lambda result: (result.rank_score is not None, result.rank_score or 0.0, result.relevance_score or 0.0),
+            reverse=True
+        )
+        
+        selected, overflow, per_domain = [], [], {}
+        for result in ranked:
+            domain = _domain(result)
+            if domain and per_domain.get(domain, 0) >= self.max_results_per_domain:
+                overflow.append(result)
+                continue
+            per_domain[domain] = per_domain.get(domain, 0) + 1
+            selected.append(result)
+            if len(selected) == k:
+                return selected
+        
+        # Too few distinct domains: fill up with the best of the capped results
+        return selected + overflow[:k - len(selected)]
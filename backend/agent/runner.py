@@ -184,6 +184,13 @@ class ResearchRunner:
         print(f"Sources Found: {summary['sources_found']}")
         print(f"Evidence Collected: {summary['evidence_collected']}")
         print(f"Document Generated: {'Yes' if summary['has_document'] else 'No'}")
+        if summary.get('context_tokens'):
+            print(f"Context Tokens per Reasoning Call: {summary['context_tokens']}")
+        for node, metrics in summary.get('node_metrics', {}).items():
+            print(
+                f"Node {node} ({metrics['model']}): {metrics['calls']} calls, {metrics['latency_seconds']}s, "
+                f"{metrics['input_tokens']} input / {metrics['output_tokens']} output tokens"
+            )
         if summary['errors'] > 0:
             print(f"⚠️  Errors: {summary['errors']}")
         print(f"Completion Reason: {summary['completion_reason']}")
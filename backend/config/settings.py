@@ -20,13 +20,76 @@ class Settings(BaseSettings):
     s3_raw_pdf_prefix: str = "raw_pdfs"
     s3_parsed_markdown_prefix: str = "parsed_markdown"
     s3_hash_index_prefix: str = "hash_index"
+    s3_analysis_prefix: str = "analysis"
+    s3_bulk_jobs_prefix: str = "bulk_jobs"
     
     # Chunking Configuration
+    chunking_strategy: str = "structural"  # structural | recursive
     chunk_size: int = 1500  
     chunk_overlap: int = 200  
+    chunk_min_size: int = 300
+    embed_batch_size: int = 64  # chunks embedded and upserted per step
+    
+    # Summarization Configuration
+    summary_map_reduce_threshold_chars: int = 120000
+    summary_section_chars: int = 30000
+    summary_map_concurrency: int = 6
+    
+    # Streaming Quiz Configuration
+    quiz_stream_section_chars: int = 12000
+    quiz_stream_batch_size: int = 3
+    quiz_stream_concurrency: int = 4
+    quiz_stream_max_retries: int = 2
+    
+    # Analysis Artifact Cache Configuration
+    artifact_cache_max_entries: int = 256
+    
+    # HTTP Caching Configuration
+    artifact_cache_control: str = "public, max-age=3600, stale-while-revalidate=86400"
+    mindmap_shell_cache_control: str = "public, max-age=86400"
+    status_cache_control: str = "no-cache"
     
     # File Upload Configuration
-    max_file_size_mb: int = 5
+    max_file_size_mb: int = 200
+    s3_multipart_threshold_mb: int = 8
+    s3_multipart_chunk_size_mb: int = 8
+    s3_multipart_concurrency: int = 8
+    
+    # OCR Configuration
+    ocr_page_range_size: int = 20  # PDFs with more pages are OCR'd in parallel ranges
+    ocr_max_concurrency: int = 4
+    ocr_max_retries: int = 3
+    ocr_retry_backoff_seconds: float = 2.0
+    
+    # Bulk Ingestion Configuration
+    bulk_max_workers: int = 8
+    bulk_ocr_requests_per_minute: float = Field(default=30, gt=0)  # Mistral OCR requests, counted per page range
+    bulk_embed_requests_per_minute: float = Field(default=60, gt=0)
+    bulk_progress_save_interval_seconds: float = 5.0
+    bulk_download_timeout_seconds: float = 60.0
+    bulk_spool_max_mb: int = 16  # larger downloads spill to a temporary file
+    
+    # Research Agent Configuration
+    agent_fast_model: str = "us.anthropic.claude-3-5-haiku-20241022-v1:0"
+    agent_large_model: str = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+    research_max_concurrent_jobs: int = 2
+    research_job_retention: int = 100  # finished jobs kept in memory for status queries
+    research_sse_heartbeat_seconds: float = 15.0
+    research_analysis_top_k: int = 10  # ranked results sent to each analysis step
+    research_report_top_k: int = 10  # ranked results summarized for report generation
+    research_max_results_per_domain: int = 2
+    research_checkpoints_enabled: bool = True
+    research_checkpoint_path: str = "results/research_checkpoints.sqlite3"
+    research_checkpoint_ttl_hours: float = 168  # checkpoints of unfinished jobs are deleted after this
+    
+    # Web Search Configuration
+    tavily_include_raw_content: bool = False  # full page text per result; much larger responses
+    
+    # Search Cache Configuration
+    search_cache_enabled: bool = True
+    search_cache_path: str = "results/search_cache.sqlite3"
+    search_cache_tavily_ttl_seconds: int = 86400
+    search_cache_perplexity_ttl_seconds: int = 43200
     
     # Bedrock Configuration
     bedrock_embedding_model: str = "amazon.titan-embed-text-v2:0"
@@ -35,6 +98,19 @@ class Settings(BaseSettings):
     
     # Pinecone Configuration
     pinecone_index_name: str = "aws-pdf-index"
+    pinecone_paper_index_name: str = "aws-pdf-paper-index"
+    
+    # Paper Routing Configuration
+    paper_routing_enabled: bool = True
+    paper_routing_abstract_chars: int = 2000
+    
+    # Cross-paper Retrieval Configuration
+    all_papers_max_papers: int = 5
+    all_papers_candidate_pool: int = 50
+    all_papers_chunks_per_paper: int = 4
+    all_papers_mmr_fetch_k: int = 20
+    all_papers_mmr_lambda: float = 0.5
+    all_papers_max_workers: int = 5
     
     model_config = SettingsConfigDict(
         env_file=".env",
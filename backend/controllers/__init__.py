@@ -2,5 +2,6 @@ from .paper_controller import PaperController
 from .embed_store_controller import EmbedStoreController
 from .chat_controller import ChatController
 from .ai_analysis_controller import AIAnalysisController
+from .bulk_ingest_controller import BulkIngestController
 
-__all__ = ["PaperController", "EmbedStoreController", "ChatController", "AIAnalysisController"]
+__all__ = ["PaperController", "EmbedStoreController", "ChatController", "AIAnalysisController", "BulkIngestController"]
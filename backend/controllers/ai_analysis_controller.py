@@ -1,7 +1,11 @@
-from fastapi import HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import HTMLResponse, StreamingResponse
+from typing import Optional
+from utils import make_etag, is_not_modified, not_modified_response
 from services.ai_analysis_service import AIAnalysisService
-from schemas.ai_analysis import SummaryResponse, QuizResponse
+from schemas.ai_analysis import SummaryResponse, QuizResponse, CombinedAnalysisResponse
+from config import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,13 +16,40 @@ class AIAnalysisController:
     
     def __init__(self):
         self.ai_analysis_service = AIAnalysisService()
+        self.settings = get_settings()
     
-    async def generate_summary(self, paper_id: str) -> SummaryResponse:
+    async def _not_modified(self, request: Request, paper_id: str, artifact: str, params: dict, refresh: bool) -> Optional[Response]:
+        """
+        304 response when the client's copy matches the stored artifact, checked before any generation.
+        
+        Returns:
+            The 304 response, or None when the artifact must be served (or generated)
+        """
+        if refresh or not request.headers.get("if-none-match"):
+            return None
+        
+        etag = await run_in_threadpool(self.ai_analysis_service.get_artifact_etag, paper_id, artifact, params)
+        if etag and is_not_modified(request, etag):
+            return not_modified_response(etag, self.settings.artifact_cache_control)
+        return None
+    
+    def _set_cache_headers(self, response: Response, artifact: str, result: dict, refresh: bool):
+        # The ETag hashes the served content, so a regenerated artifact gets a new one
+        response.headers["ETag"] = self.ai_analysis_service.content_etag(artifact, result)
+        # Forced regenerations must not populate shared caches under their own URL
+        response.headers["Cache-Control"] = "no-store" if refresh else self.settings.artifact_cache_control
+    
+    async def generate_summary(self, request: Request, response: Response, paper_id: str, mode: str = "auto", refresh: bool = False):
         """Generate comprehensive summary for a paper"""
         try:
-            result = self.ai_analysis_service.generate_summary(paper_id)
-            return SummaryResponse(**result)
+            not_modified = await self._not_modified(request, paper_id, "summary", {"mode": mode}, refresh)
+            if not_modified:
+                return not_modified
             
+            result = await run_in_threadpool(self.ai_analysis_service.generate_summary, paper_id, mode, refresh)
+            self._set_cache_headers(response, "summary", result, refresh)
+            return SummaryResponse(**result)
+        
         except Exception as e:
             logger.error(f"Error generating summary: {e}")
             raise HTTPException(
@@ -26,12 +57,19 @@ class AIAnalysisController:
                 detail=f"Failed to generate summary: {str(e)}"
             )
     
-    async def generate_quiz(self, paper_id: str, num_questions: int = 10) -> QuizResponse:
+    async def generate_quiz(self, request: Request, response: Response, paper_id: str, num_questions: int = 10, refresh: bool = False):
         """Generate quiz questions for a paper"""
         try:
-            result = self.ai_analysis_service.generate_quiz(paper_id, num_questions)
-            return QuizResponse(**result)
+            not_modified = await self._not_modified(
+                request, paper_id, "quiz", {"num_questions": num_questions}, refresh
+            )
+            if not_modified:
+                return not_modified
             
+            result = await run_in_threadpool(self.ai_analysis_service.generate_quiz, paper_id, num_questions, refresh)
+            self._set_cache_headers(response, "quiz", result, refresh)
+            return QuizResponse(**result)
+        
         except Exception as e:
             logger.error(f"Error generating quiz: {e}")
             raise HTTPException(
@@ -39,15 +77,72 @@ class AIAnalysisController:
                 detail=f"Failed to generate quiz: {str(e)}"
             )
     
-    async def generate_mindmap(self, paper_id: str) -> HTMLResponse:
-        """Generate interactive mindmap for a paper"""
+    async def stream_quiz(self, paper_id: str, num_questions: int = 10, refresh: bool = False) -> StreamingResponse:
+        """Stream quiz questions for a paper as NDJSON"""
+        return StreamingResponse(
+            self.ai_analysis_service.stream_quiz(paper_id, num_questions, refresh),
+            media_type="application/x-ndjson"
+        )
+    
+    async def generate_mindmap(self, request: Request, paper_id: str, refresh: bool = False) -> Response:
+        """Serve the static mindmap page, which loads the mindmap markdown separately"""
+        if not await run_in_threadpool(self.ai_analysis_service.paper_exists, paper_id):
+            raise HTTPException(status_code=404, detail=f"Paper {paper_id} not found")
+        
+        markdown_url = request.url_for("get_paper_mindmap_markdown", paper_id=paper_id)
+        if refresh:
+            markdown_url = markdown_url.include_query_params(refresh="true")
+        
+        html_content = self.ai_analysis_service.create_mindmap_html(str(markdown_url))
+        etag = make_etag(html_content)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag, self.settings.mindmap_shell_cache_control)
+        
+        return HTMLResponse(
+            content=html_content,
+            headers={"ETag": etag, "Cache-Control": self.settings.mindmap_shell_cache_control}
+        )
+    
+    async def get_mindmap_markdown(self, request: Request, paper_id: str, refresh: bool = False) -> Response:
+        """Serve the mindmap markdown with a paper-derived ETag, answering 304 when unchanged"""
         try:
-            result = self.ai_analysis_service.generate_mindmap(paper_id)
-            return HTMLResponse(content=result["html_content"])
+            not_modified = await self._not_modified(request, paper_id, "mindmap", {}, refresh)
+            if not_modified:
+                return not_modified
             
+            result = await run_in_threadpool(self.ai_analysis_service.generate_mindmap, paper_id, refresh)
+        
         except Exception as e:
             logger.error(f"Error generating mindmap: {e}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Failed to generate mindmap: {str(e)}"
             )
+        
+        response = Response(content=result["markdown"], media_type="text/markdown; charset=utf-8")
+        self._set_cache_headers(response, "mindmap", result, refresh)
+        return response
+    
+    async def generate_all(self, request: Request, response: Response, paper_id: str, num_questions: int = 10, refresh: bool = False):
+        """Generate summary, quiz and mindmap for a paper in one job"""
+        try:
+            not_modified = await self._not_modified(
+                request, paper_id, "analysis", {"num_questions": num_questions}, refresh
+            )
+            if not_modified:
+                return not_modified
+            
+            result = await run_in_threadpool(self.ai_analysis_service.generate_all, paper_id, num_questions, refresh)
+            self._set_cache_headers(response, "analysis", result, refresh)
+            return CombinedAnalysisResponse(**result)
+        
+        except Exception as e:
+            logger.error(f"Error generating combined analysis: {e}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to generate analysis: {str(e)}"
+            )
+    
+    async def get_metrics(self) -> dict:
+        """Return artifact cache and request coalescing metrics"""
+        return self.ai_analysis_service.get_metrics()
@@ -0,0 +1,55 @@
+import uuid
+from fastapi import BackgroundTasks, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from services import BulkIngestService
+from schemas import BulkIngestRequest, BulkIngestJobResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BulkIngestController:
+    """Controller for bulk paper ingestion jobs"""
+    
+    def __init__(self):
+        self.bulk_ingest_service = BulkIngestService()
+    
+    async def start_job(self, request: BulkIngestRequest, background_tasks: BackgroundTasks) -> BulkIngestJobResponse:
+        """Create or resume a job and process it in the background"""
+        job_id = request.job_id or str(uuid.uuid4())
+        
+        if self.bulk_ingest_service.is_running(job_id):
+            raise HTTPException(status_code=409, detail=f"Bulk ingest job {job_id} is already running")
+        
+        try:
+            store = self.bulk_ingest_service.s3_progress_store(job_id)
+            progress = await run_in_threadpool(
+                self.bulk_ingest_service.create_job,
+                job_id,
+                [item.source for item in request.items],
+                request.embed,
+                store
+            )
+            
+            background_tasks.add_task(self.bulk_ingest_service.run_job, job_id, store)
+            
+            return self.bulk_ingest_service.to_response(progress, "Bulk ingestion job queued")
+            
+        except Exception as e:
+            logger.error(f"Error starting bulk ingest job: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to start bulk ingestion: {str(e)}")
+    
+    async def get_job(self, job_id: str) -> BulkIngestJobResponse:
+        """Return progress and throughput of a job"""
+        try:
+            store = self.bulk_ingest_service.s3_progress_store(job_id)
+            progress = await run_in_threadpool(store.load)
+            
+        except Exception as e:
+            logger.error(f"Error loading bulk ingest job {job_id}: {e}")
+            raise HTTPException(status_code=500, detail=f"Failed to load bulk ingestion job: {str(e)}")
+        
+        if progress is None:
+            raise HTTPException(status_code=404, detail=f"Bulk ingest job {job_id} not found")
+        
+        return self.bulk_ingest_service.to_response(progress, f"Bulk ingestion job {progress['status']}")
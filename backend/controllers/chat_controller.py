@@ -1,6 +1,6 @@
 from fastapi import HTTPException
-from services.chat_service import ChatService
-from schemas.chat import ChatRequest, ChatResponse
+from services.chat_service import ChatService, PaperRoutingDisabledError
+from schemas.chat import ChatRequest, ChatResponse, PaperRoutingRequest, PaperRoutingResponse
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +18,9 @@ class ChatController:
             response = self.chat_service.query_paper(
                 paper_id=request.paper_id,
                 question=request.question,
-                top_k=request.top_k
+                top_k=request.top_k,
+                page_start=request.page_start,
+                page_end=request.page_end
             )
             
             return ChatResponse(
@@ -41,7 +43,8 @@ class ChatController:
         try:
             response = self.chat_service.query_all_papers(
                 question=request.question,
-                top_k=request.top_k
+                top_k=request.top_k,
+                diversify=request.diversify
             )
             
             return ChatResponse(
@@ -59,6 +62,29 @@ class ChatController:
                 detail=f"Failed to answer question: {str(e)}"
             )
     
+    async def find_relevant_papers(self, request: PaperRoutingRequest) -> PaperRoutingResponse:
+      
+        try:
+            papers = self.chat_service.find_relevant_papers(
+                question=request.question,
+                top_n=request.top_n
+            )
+            
+            return PaperRoutingResponse(
+                question=request.question,
+                papers=papers,
+                message=f"Found {len(papers)} relevant papers"
+            )
+            
+        except PaperRoutingDisabledError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            logger.error(f"Error in find_relevant_papers: {e}")
+            raise HTTPException(
+                status_code=500, 
+                detail=f"Failed to find relevant papers: {str(e)}"
+            )
+    
     
     async def query_all_papers_stream(self, request: ChatRequest):
       
@@ -1,5 +1,7 @@
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from services import PaperService
+from utils import EmptyFileError, FileTooLargeError
 from schemas import PaperProcessResponse
 from config import get_settings
 import logging
@@ -24,31 +26,27 @@ class PaperController:
         if file.content_type != 'application/pdf':
             raise HTTPException(status_code=400, detail="Invalid content type. Must be application/pdf")
         
+        # Reject early when the client declared a size (the stream is checked as well)
+        max_size_mb = self.settings.max_file_size_mb
+        if file.size is not None and file.size > max_size_mb * 1024 * 1024:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"File size exceeds maximum allowed size of {max_size_mb}MB"
+            )
+        
         try:
-            file_content = await file.read()
-            
-            # Validate file is not empty
-            if len(file_content) == 0:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            
-            # Validate file size (max 5MB)
-            max_size_mb = self.settings.max_file_size_mb
-            max_size_bytes = max_size_mb * 1024 * 1024
-            if len(file_content) > max_size_bytes:
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"File size exceeds maximum allowed size of {max_size_mb}MB"
-                )
-            
-            response = self.paper_service.upload_and_process_paper(
-                file_content=file_content,
-                filename=file.filename
+            # The upload is spooled to disk by the server; stream it to S3 from there
+            response = await run_in_threadpool(
+                self.paper_service.upload_and_process_stream,
+                file.file,
+                file.filename
             )
             
             return response
             
-        except HTTPException:
-            raise
+        except (EmptyFileError, FileTooLargeError) as e:
+            # Detected while hashing
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             logger.error(f"Error uploading and processing paper: {e}")
             raise HTTPException(status_code=500, detail=f"Failed to process paper: {str(e)}")
@@ -0,0 +1,76 @@
+"""
+Bulk-ingest a local directory of PDFs.
+
+Usage:
+    python ingest_cli.py /path/to/papers --progress-file import.json
+
+Progress is written to the progress file while the job runs; re-running the
+same command resumes the job, skipping papers that were already ingested or
+detected as duplicates and retrying failures.
+"""
+import os
+import sys
+import uuid
+import argparse
+import logging
+from pathlib import Path
+from services import BulkIngestService
+from services.bulk_ingest_service import LocalProgressStore
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+
+def find_pdfs(directory: str, recursive: bool) -> list:
+    pattern = "**/*" if recursive else "*"
+    return sorted(
+        str(path.resolve())
+        for path in Path(directory).glob(pattern)
+        if path.is_file() and path.suffix.lower() == ".pdf"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-ingest a directory of PDF papers")
+    parser.add_argument("directory", help="Directory containing PDF files")
+    parser.add_argument(
+        "--progress-file",
+        default="bulk_ingest_progress.json",
+        help="Resumable progress report (default: bulk_ingest_progress.json)"
+    )
+    parser.add_argument("--no-recursive", action="store_true", help="Do not descend into subdirectories")
+    parser.add_argument("--no-embed", action="store_true", help="Only upload and OCR, skip embedding")
+    parser.add_argument("--workers", type=int, default=None, help="Papers processed concurrently")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Not a directory: {args.directory}")
+
+    sources = find_pdfs(args.directory, recursive=not args.no_recursive)
+    logger.info(f"Found {len(sources)} PDF files in {args.directory}")
+
+    store = LocalProgressStore(args.progress_file)
+    existing = store.load()
+    job_id = existing["job_id"] if existing else f"local-{uuid.uuid4()}"
+
+    service = BulkIngestService()
+    service.create_job(job_id, sources, embed=not args.no_embed, store=store)
+    progress = service.run_job(job_id, store, max_workers=args.workers, allow_local_files=True)
+
+    stats = service.compute_stats(progress)
+    print(
+        f"Job {job_id} {progress['status']}: {stats.done} ingested, {stats.duplicates} duplicates, "
+        f"{stats.failed} failed, {stats.pending} pending in {stats.elapsed_seconds}s "
+        f"({stats.papers_per_minute} papers/min, {stats.bytes_processed / (1024 * 1024):.1f} MB)"
+    )
+    print(f"Progress report: {os.path.abspath(args.progress_file)}")
+
+    return 0 if progress["status"] == "completed" and not stats.failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
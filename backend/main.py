@@ -1,10 +1,12 @@
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from config import get_settings
+from utils import HTTPCacheMiddleware
 import logging
 
 # Import all routes normally
-from routes import paper_routes, embed_store_route, chat_routes, ai_analysis_routes,research_route
+from routes import paper_routes, embed_store_route, chat_routes, ai_analysis_routes,research_route, bulk_ingest_routes, cache_policies
 
 logging.basicConfig(
     level=logging.INFO,
@@ -27,9 +29,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
+settings = get_settings()
+app.add_middleware(HTTPCacheMiddleware, policies=cache_policies(settings))
+
 # Include routers
+app.include_router(bulk_ingest_routes.router)
 app.include_router(paper_routes.router)
 app.include_router(embed_store_route.router)
 app.include_router(chat_routes.router)
@@ -1,10 +1,25 @@
 """Routes package initialization"""
-from . import paper_routes, embed_store_route, chat_routes, ai_analysis_routes,research_route
+from typing import List
+from config import Settings
+from utils import CachePolicy
 
+# Route modules are imported on demand (`from routes import paper_routes`), so a
+# single router can be mounted without constructing the services of the others
 __all__ = [
     'paper_routes',
     'embed_store_route', 
     'chat_routes',
     'ai_analysis_routes',
-    'research_route'
+    'research_route',
+    'bulk_ingest_routes',
+    'cache_policies'
 ]
+
+
+def cache_policies(settings: Settings) -> List[CachePolicy]:
+    """HTTP caching policies of the API endpoints, applied by HTTPCacheMiddleware"""
+    return [
+        CachePolicy(r"/api/papers/[^/]+/(summary|quiz|analysis|mindmap/markdown)", settings.artifact_cache_control),
+        CachePolicy(r"/api/papers/[^/]+/mindmap", settings.mindmap_shell_cache_control),
+        CachePolicy(r"/api/papers/[^/]+/status", settings.status_cache_control, etag_from_body=True),
+    ]
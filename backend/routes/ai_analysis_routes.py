@@ -1,25 +1,56 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
+from typing import Literal
 from fastapi.responses import HTMLResponse
 from controllers.ai_analysis_controller import AIAnalysisController
-from schemas.ai_analysis import SummaryResponse, QuizResponse
+from schemas.ai_analysis import SummaryResponse, QuizResponse, CombinedAnalysisResponse
 
 router = APIRouter(prefix="/api/papers", tags=["ai-analysis"])
 controller = AIAnalysisController()
 
 
+@router.get("/analysis/metrics")
+async def get_analysis_metrics():
+    
+    return await controller.get_metrics()
+
+
 @router.get("/{paper_id}/summary", response_model=SummaryResponse)
-async def generate_paper_summary(paper_id: str):
+async def generate_paper_summary(
+    request: Request,
+    response: Response,
+    paper_id: str,
+    mode: Literal["auto", "single_pass", "map_reduce"] = "auto",
+    refresh: bool = False
+):
    
-    return await controller.generate_summary(paper_id)
+    return await controller.generate_summary(request, response, paper_id, mode, refresh)
 
 
 @router.get("/{paper_id}/quiz", response_model=QuizResponse)
-async def generate_paper_quiz(paper_id: str, num_questions: int = 10):
+async def generate_paper_quiz(request: Request, response: Response, paper_id: str, num_questions: int = 10, refresh: bool = False):
+   
+    return await controller.generate_quiz(request, response, paper_id, num_questions, refresh)
+
+
+@router.get("/{paper_id}/quiz/stream")
+async def stream_paper_quiz(paper_id: str, num_questions: int = 10, refresh: bool = False):
    
-    return await controller.generate_quiz(paper_id, num_questions)
+    return await controller.stream_quiz(paper_id, num_questions, refresh)
 
 
 @router.get("/{paper_id}/mindmap", response_class=HTMLResponse)
-async def generate_paper_mindmap(paper_id: str):
+async def generate_paper_mindmap(request: Request, paper_id: str, refresh: bool = False):
+    
+    return await controller.generate_mindmap(request, paper_id, refresh)
+
+
+@router.get("/{paper_id}/mindmap/markdown")
+async def get_paper_mindmap_markdown(request: Request, paper_id: str, refresh: bool = False):
+    
+    return await controller.get_mindmap_markdown(request, paper_id, refresh)
+
+
+@router.get("/{paper_id}/analysis", response_model=CombinedAnalysisResponse)
+async def generate_paper_analysis(request: Request, response: Response, paper_id: str, num_questions: int = 10, refresh: bool = False):
     
-    return await controller.generate_mindmap(paper_id)
+    return await controller.generate_all(request, response, paper_id, num_questions, refresh)
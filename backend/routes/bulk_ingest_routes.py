@@ -0,0 +1,18 @@
+from fastapi import APIRouter, BackgroundTasks
+from controllers.bulk_ingest_controller import BulkIngestController
+from schemas import BulkIngestRequest, BulkIngestJobResponse
+
+router = APIRouter(prefix="/api/papers/bulk-ingest", tags=["papers"])
+controller = BulkIngestController()
+
+
+@router.post("", response_model=BulkIngestJobResponse, status_code=202)
+async def start_bulk_ingest(request: BulkIngestRequest, background_tasks: BackgroundTasks):
+    
+    return await controller.start_job(request, background_tasks)
+
+
+@router.get("/{job_id}", response_model=BulkIngestJobResponse)
+async def get_bulk_ingest_job(job_id: str):
+    
+    return await controller.get_job(job_id)
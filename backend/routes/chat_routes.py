@@ -1,6 +1,7 @@
 from fastapi import APIRouter
+from typing import Optional
 from controllers.chat_controller import ChatController
-from schemas.chat import ChatRequest, ChatResponse
+from schemas.chat import ChatRequest, ChatResponse, PaperRoutingRequest, PaperRoutingResponse
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 controller = ChatController()
@@ -17,11 +18,26 @@ async def query_paper(request: ChatRequest):
 
 
 @router.post("/query-paper/{paper_id}", response_model=ChatResponse)
-async def query_specific_paper(paper_id: str, question: str, top_k: int = 15):
+async def query_specific_paper(
+    paper_id: str,
+    question: str,
+    top_k: int = 15,
+    page_start: Optional[int] = None,
+    page_end: Optional[int] = None
+):
     
     request = ChatRequest(
         paper_id=paper_id,
         question=question,
-        top_k=top_k
+        top_k=top_k,
+        page_start=page_start,
+        page_end=page_end
     )
     return await controller.query_paper(request)
+
+
+
+@router.post("/relevant-papers", response_model=PaperRoutingResponse)
+async def find_relevant_papers(request: PaperRoutingRequest):
+    
+    return await controller.find_relevant_papers(request)
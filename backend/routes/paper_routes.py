@@ -8,7 +8,7 @@ controller = PaperController()
 
 @router.post("/upload-and-process", response_model=PaperProcessResponse, status_code=201)
 async def upload_and_process_paper(
-    file: UploadFile = File(..., description="PDF file to upload and process (max 5MB)")
+    file: UploadFile = File(..., description="PDF file to upload and process (max 200MB)")
 ):
     
     return await controller.upload_and_process_paper(file)
@@ -1,10 +1,17 @@
 
-from fastapi import APIRouter, HTTPException
+import json
+from datetime import datetime
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 
 from agent.runner import ResearchRunner
+from agent.jobs import ResearchJob, ResearchJobManager
+from tools.search import search_cache
 from schemas.state import AgentConfig
+from config import get_settings
 
 router = APIRouter(
     prefix="/api/research",
@@ -16,24 +23,64 @@ class ResearchRequest(BaseModel):
     query: str
     max_iterations: Optional[int] = 15
     min_search_results: Optional[int] = 8
+    bypass_search_cache: bool = False
 
 class ResearchResponse(BaseModel):
     query: str
     document_content: str
 
+class ResearchJobResponse(BaseModel):
+    job_id: str
+    query: str
+    status: str
+    current_node: Optional[str] = None
+    iterations: int = 0
+    sources_found: int = 0
+    evidence_collected: int = 0
+    document_content: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+job_manager = ResearchJobManager()
+
+
+def _job_response(job: ResearchJob) -> ResearchJobResponse:
+    return ResearchJobResponse(
+        job_id=job.job_id,
+        query=job.query,
+        status=job.status,
+        current_node=job.current_node,
+        iterations=job.iterations,
+        sources_found=job.sources_found,
+        evidence_collected=job.evidence_collected,
+        document_content=job.document_content,
+        error=job.error,
+        created_at=job.created_at,
+        updated_at=job.updated_at
+    )
+
+
+def _get_job(job_id: str) -> ResearchJob:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Research job {job_id} not found")
+    return job
+
 @router.post("/query", response_model=ResearchResponse)
 async def direct_research(request: ResearchRequest):
    
     try:
         config = AgentConfig(
             max_iterations=request.max_iterations,
-            min_search_results=request.min_search_results
+            min_search_results=request.min_search_results,
+            bypass_search_cache=request.bypass_search_cache
         )
         
         runner = ResearchRunner(output_dir=None)  # Set to None to prevent saving files
         
         print(f"🔍 Starting direct research on: {request.query}")
-        result = runner.run_research(request.query, config)
+        result = await run_in_threadpool(runner.run_research, request.query, config)
         
         if result['summary']['has_document'] and result['state']['final_document']:
             document_content = ""
@@ -50,5 +97,83 @@ async def direct_research(request: ResearchRequest):
         else:
             raise HTTPException(status_code=500, detail="Research completed but no document was generated")
     
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Research error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Research error: {str(e)}")
+
+
+@router.post("/jobs", response_model=ResearchJobResponse, status_code=202)
+async def start_research_job(request: ResearchRequest):
+    
+    config = AgentConfig(
+        max_iterations=request.max_iterations,
+        min_search_results=request.min_search_results,
+        bypass_search_cache=request.bypass_search_cache
+    )
+    job = job_manager.submit(request.query, config)
+    return _job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=ResearchJobResponse)
+async def get_research_job(job_id: str):
+    
+    return _job_response(_get_job(job_id))
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_research_job_events(job_id: str, request: Request):
+    """Server-sent events: one per node transition, ending with completed/failed/cancelled"""
+    job = _get_job(job_id)
+    heartbeat_seconds = get_settings().research_sse_heartbeat_seconds
+    
+    # Reconnecting EventSource clients resume after the last event they received
+    last_event_id = request.headers.get("last-event-id")
+    after = int(last_event_id) + 1 if last_event_id and last_event_id.isdigit() else 0
+    
+    async def event_stream():
+        seen = after
+        while True:
+            events, finished = await job.wait_for_events(seen, heartbeat_seconds)
+            
+            for event in events:
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+            seen += len(events)
+            
+            if finished:
+                break
+            if not events:
+                yield ": keep-alive\n\n"
+            if await request.is_disconnected():
+                break
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=ResearchJobResponse)
+async def cancel_research_job(job_id: str):
+    """Stop the job before its next node; the node already running finishes first"""
+    _get_job(job_id)
+    return _job_response(job_manager.cancel(job_id))
+
+
+@router.post("/jobs/{job_id}/resume", response_model=ResearchJobResponse, status_code=202)
+async def resume_research_job(job_id: str):
+    """Continue a failed or cancelled job from its last checkpoint, keeping completed searches"""
+    try:
+        job = await run_in_threadpool(job_manager.resume, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _job_response(job)
+
+
+@router.get("/search-cache/metrics")
+async def get_search_cache_metrics():
+    """Per-provider search cache hit/miss counters since startup"""
+    return search_cache.get_metrics()
\ No newline at end of file
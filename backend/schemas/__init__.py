@@ -8,7 +8,17 @@ from .paper import (
 from .chat import (
     ChatRequest,
     ChatResponse,
-    SourceDocument
+    SourceDocument,
+    PaperRoutingRequest,
+    PaperRoutingResponse,
+    RelevantPaper
+)
+from .bulk import (
+    BulkIngestItem,
+    BulkIngestRequest,
+    BulkIngestItemStatus,
+    BulkIngestStats,
+    BulkIngestJobResponse
 )
 
 __all__ = [
@@ -19,5 +29,13 @@ __all__ = [
     "PaperStatusResponse",
     "ChatRequest",
     "ChatResponse",
-    "SourceDocument"
+    "SourceDocument",
+    "PaperRoutingRequest",
+    "PaperRoutingResponse",
+    "RelevantPaper",
+    "BulkIngestItem",
+    "BulkIngestRequest",
+    "BulkIngestItemStatus",
+    "BulkIngestStats",
+    "BulkIngestJobResponse"
 ]
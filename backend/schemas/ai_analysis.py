@@ -16,6 +16,19 @@ class ResearchPaperSummary(BaseModel):
     future_work: str = Field(..., description="Suggested future research directions")
 
 
+class SectionNotes(BaseModel):
+    """Notes extracted from one part of a long paper (map step of map-reduce summarization)"""
+    summary: str = Field("", description="Main points made in this part")
+    background: str = Field("", description="Background or prior work covered in this part")
+    problem: str = Field("", description="Research problem or motivation stated in this part")
+    methods: str = Field("", description="Methods or models described in this part")
+    experiments: str = Field("", description="Experimental setup described in this part")
+    results: str = Field("", description="Findings reported in this part")
+    limitations: str = Field("", description="Limitations discussed in this part")
+    implications: str = Field("", description="Implications discussed in this part")
+    future_work: str = Field("", description="Future work mentioned in this part")
+
+
 class SummaryRequest(BaseModel):
     """Request model for paper summary"""
     paper_id: str = Field(..., description="Paper identifier")
@@ -25,6 +38,8 @@ class SummaryResponse(BaseModel):
     """Response model for paper summary"""
     paper_id: str = Field(..., description="Paper identifier")
     summary: ResearchPaperSummary = Field(..., description="Comprehensive paper summary")
+    mode: Literal["single_pass", "map_reduce"] = Field(..., description="Summarization strategy used")
+    cached: bool = Field(False, description="Whether the summary was served from the artifact cache")
     processing_time_seconds: float = Field(..., description="Processing duration")
     message: str = Field(..., description="Status message")
 
@@ -80,5 +95,29 @@ class MCQSet(BaseModel):
 class QuizResponse(BaseModel):
     paper_id: UUID = Field(..., description="UUID of the paper")
     questions: List[QuestionModel] = Field(..., description="List of quiz questions")  # Changed from MCQSet
+    cached: bool = Field(False, description="Whether the quiz was served from the artifact cache")
+    processing_time_seconds: float = Field(..., description="Processing duration")
+    message: str = Field(..., description="Status message")
+
+
+class ArtifactUsage(BaseModel):
+    """Latency and token usage for one step of a combined analysis"""
+    artifact: str = Field(..., description="summary, quiz, mindmap or cache_warm_up")
+    cached: bool = Field(..., description="Whether the artifact was served from the artifact cache")
+    latency_seconds: float = Field(..., description="Model call duration")
+    input_tokens: int = Field(..., description="Input tokens billed at the full rate")
+    output_tokens: int = Field(..., description="Output tokens")
+    cache_read_input_tokens: int = Field(..., description="Input tokens read from the Bedrock prompt cache")
+    cache_write_input_tokens: int = Field(..., description="Input tokens written to the Bedrock prompt cache")
+
+
+class CombinedAnalysisResponse(BaseModel):
+    """Response model for summary, quiz and mindmap generated in one job"""
+    paper_id: UUID = Field(..., description="UUID of the paper")
+    summary: ResearchPaperSummary = Field(..., description="Comprehensive paper summary")
+    questions: List[QuestionModel] = Field(..., description="List of quiz questions")
+    mindmap_markdown: str = Field(..., description="Markmap markdown for the mindmap")
+    usage: List[ArtifactUsage] = Field(..., description="Per-artifact latency and token usage")
+    cache_read_input_tokens: int = Field(..., description="Total input tokens served from the prompt cache")
     processing_time_seconds: float = Field(..., description="Processing duration")
     message: str = Field(..., description="Status message")
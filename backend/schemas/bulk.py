@@ -0,0 +1,59 @@
+from pydantic import BaseModel, Field, HttpUrl, model_validator
+from typing import List, Literal, Optional
+
+
+class BulkIngestItem(BaseModel):
+    """One PDF to ingest: an object in the papers bucket or a public URL"""
+    s3_key: Optional[str] = Field(None, description="Key of a PDF in the configured S3 bucket")
+    url: Optional[HttpUrl] = Field(None, description="HTTP(S) URL of a PDF")
+    
+    @model_validator(mode="after")
+    def exactly_one_source(self):
+        if bool(self.s3_key) == bool(self.url):
+            raise ValueError("Provide exactly one of s3_key or url")
+        return self
+    
+    @property
+    def source(self) -> str:
+        return f"s3://{self.s3_key}" if self.s3_key else str(self.url)
+
+
+class BulkIngestRequest(BaseModel):
+    """Request model for bulk ingestion"""
+    items: List[BulkIngestItem] = Field(..., description="Manifest of PDFs to ingest", min_length=1)
+    job_id: Optional[str] = Field(
+        None,
+        description="Existing job to resume; finished items are skipped and new items are appended"
+    )
+    embed: bool = Field(True, description="Embed and store each new paper after OCR")
+
+
+class BulkIngestItemStatus(BaseModel):
+    """Outcome of one manifest item"""
+    source: str = Field(..., description="s3://key, URL or local path of the PDF")
+    status: Literal["pending", "done", "duplicate", "failed"]
+    paper_id: Optional[str] = Field(None, description="New or existing paper identifier")
+    error: Optional[str] = None
+    seconds: Optional[float] = Field(None, description="Processing time for this item")
+
+
+class BulkIngestStats(BaseModel):
+    """Progress and throughput of a bulk ingestion job"""
+    total: int
+    done: int
+    duplicates: int
+    failed: int
+    pending: int
+    bytes_processed: int = 0
+    elapsed_seconds: float = Field(0.0, description="Wall-clock time across all runs of the job")
+    papers_per_minute: float = Field(0.0, description="Items finished per minute of wall-clock time")
+    avg_item_seconds: float = Field(0.0, description="Average processing time of finished items")
+
+
+class BulkIngestJobResponse(BaseModel):
+    """Response model for bulk ingestion job status"""
+    job_id: str
+    status: Literal["queued", "running", "completed", "failed"]
+    stats: BulkIngestStats
+    failures: List[BulkIngestItemStatus] = Field(default_factory=list, description="Items that failed")
+    message: str
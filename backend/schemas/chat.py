@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 
 
@@ -19,12 +19,32 @@ class ChatRequest(BaseModel):
         ge=1,
         le=50
     )
+    diversify: bool = Field(
+        True,
+        description="When searching all papers, rank papers first and retrieve diverse chunks per paper"
+    )
+    page_start: Optional[int] = Field(
+        None,
+        description="First PDF page to search (single-paper queries only)",
+        ge=1
+    )
+    page_end: Optional[int] = Field(
+        None,
+        description="Last PDF page to search (single-paper queries only)",
+        ge=1
+    )
+    
+    @model_validator(mode="after")
+    def page_range_must_be_ordered(self):
+        if self.page_start and self.page_end and self.page_end < self.page_start:
+            raise ValueError("page_end must be greater than or equal to page_start")
+        return self
 
 
 class SourceDocument(BaseModel):
     """Source document chunk"""
     content: str = Field(..., description="Text content of the chunk")
-    metadata: dict = Field(..., description="Chunk metadata (paper_id, chunk_index, source)")
+    metadata: dict = Field(..., description="Chunk metadata (paper_id, chunk_index, source, section_path, page_start, page_end)")
 
 
 class ChatResponse(BaseModel):
@@ -37,3 +57,23 @@ class ChatResponse(BaseModel):
         description="Source chunks used to generate the answer"
     )
     message: str = Field(..., description="Status message")
+
+
+class PaperRoutingRequest(BaseModel):
+    """Request model for finding the papers relevant to a question"""
+    question: str = Field(..., description="Question to route", min_length=3)
+    top_n: int = Field(5, description="Number of papers to return", ge=1, le=50)
+
+
+class RelevantPaper(BaseModel):
+    """Paper matched by the routing index"""
+    paper_id: str = Field(..., description="Paper identifier")
+    title: str = Field(..., description="Paper title")
+    score: float = Field(..., description="Similarity score")
+
+
+class PaperRoutingResponse(BaseModel):
+    """Response model for paper routing"""
+    question: str = Field(..., description="Original question")
+    papers: List[RelevantPaper] = Field(..., description="Most relevant papers, best first")
+    message: str = Field(..., description="Status message")
@@ -1,4 +1,5 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 
 
 class PaperProcessResponse(BaseModel):
@@ -24,6 +25,9 @@ class ChunkMetadata(BaseModel):
     paper_id: str
     chunk_index: int
     source: str
+    section_path: Optional[str] = None
+    page_start: Optional[int] = None
+    page_end: Optional[int] = None
 
 
 class TextChunk(BaseModel):
@@ -1,7 +1,7 @@
-from typing import List, Dict, Any, Optional, TypedDict, Annotated
+from typing import List, Dict, Any, Literal, Optional, TypedDict, Annotated
 from langchain_core.messages import BaseMessage
 from langgraph.graph import add_messages
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 
@@ -11,7 +11,10 @@ class SearchResult(BaseModel):
     url: str
     content: str
     source: str  # 'tavily' or 'perplexity'
-    relevance_score: Optional[float] = None
+    relevance_score: Optional[float] = None  # provider score, when the provider returns one
+    raw_content: Optional[str] = None  # full page text (Tavily with include_raw_content)
+    published_date: Optional[str] = None
+    rank_score: Optional[float] = None  # cosine similarity to the research query
     timestamp: datetime = datetime.now()
 
 
@@ -43,14 +46,33 @@ class ResearchDocument(BaseModel):
     generated_at: datetime = datetime.now()
 
 
+class ReasoningDecision(BaseModel):
+    """Next step chosen by the reasoning node."""
+    action: Literal["search", "analyze", "generate"] = Field(
+        description="search for more sources, analyze unanalyzed results, or generate the report"
+    )
+    queries: List[str] = Field(default_factory=list, description="New search queries when action is search")
+    confidence: float = Field(ge=0.0, le=1.0, description="How well the collected evidence answers the query")
+    done: bool = Field(description="True when the evidence is sufficient for the report")
+    rationale: str = Field(description="Short explanation of the decision")
+
+
 class AgentState(TypedDict):
     """State schema for the ReAct Research Agent."""
+    run_id: str  # checkpoint thread of the run
     messages: Annotated[List[BaseMessage], add_messages]
+    history_summary: str  # running summary of turns compacted out of messages
+    context_keep_turns: int
+    context_token_budget: int
+    context_tokens: List[int]  # estimated prompt tokens of each reasoning call
+    node_models: Dict[str, str]  # Bedrock model id per LLM node
+    node_metrics: Dict[str, Dict[str, Any]]  # calls, latency and tokens per LLM node
     
     original_query: str
     research_plan: List[str]  
     current_step: int
     search_results: List[SearchResult]
+    analyzed_result_keys: List[str]  # canonical URLs of results already sent to analysis
     evidence_collected: List[ResearchEvidence]
     
     document_outline: List[str]
@@ -58,12 +80,20 @@ class AgentState(TypedDict):
     
     current_reasoning: str
     next_action: str
+    last_decision: Optional[ReasoningDecision]
+    pending_queries: List[str]  # queries proposed by the last decision, consumed by the next search
+    stalled_searches: int  # consecutive searches without new results
     iteration_count: int
     max_iterations: int
     
+    max_parallel_queries: int
+    search_concurrency: int
+    bypass_search_cache: bool
+    
     last_tool_result: Optional[str]
     error_count: int
     max_errors: int
+    failed_node: Optional[str]  # node of the last handled error, retried on resume
     
     status: str 
     completion_reason: str
@@ -74,7 +104,16 @@ class AgentConfig(BaseModel):
     max_errors: int = 3
     min_search_results: int = 10
     confidence_threshold: float = 0.7
+    min_evidence: int = 3
+    max_stalled_searches: int = 2
     enable_tavily: bool = True
     enable_perplexity: bool = True
+    max_parallel_queries: int = 4  # queries searched in one search step
+    search_concurrency: int = 6  # provider calls in flight at once
+    bypass_search_cache: bool = False
+    context_keep_turns: int = 3  # most recent turns sent verbatim, older ones are summarized
+    context_token_budget: int = 12000  # estimated prompt tokens per reasoning call
+    # Per-node overrides of DEFAULT_NODE_MODELS: "fast", "large" or a Bedrock model id
+    node_models: Dict[str, str] = Field(default_factory=dict)
     research_depth: str = "comprehensive" 
     output_format: str = "markdown" 
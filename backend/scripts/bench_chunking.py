@@ -0,0 +1,94 @@
+"""
+Chunking throughput on synthetic OCR markdown: structural chunker vs recursive splitter.
+
+Usage:
+    python scripts/bench_chunking.py --sizes 100000 1000000 5000000
+
+The generated papers mix headings, long paragraphs, tables, display and
+inline equations in the shape Mistral OCR produces. Runs offline.
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tests.fakes  # noqa: F401,E402  (dummy settings)
+from utils.chunking import MarkdownChunker  # noqa: E402
+
+WORDS = (
+    "model training data results method loss gradient attention layer network "
+    "baseline accuracy evaluation corpus token sequence embedding parameter"
+).split()
+
+
+def generate_paper(target_chars: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = ["# A Synthetic Paper\n\n"]
+    size = 0
+    section = 0
+    while size < target_chars:
+        section += 1
+        block = [f"## {section}. Section {section}\n\n"]
+        for subsection in range(1, rng.randint(2, 4)):
+            block.append(f"### {section}.{subsection} Subsection\n\n")
+            for _ in range(rng.randint(2, 5)):
+                sentences = [
+                    " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 25))).capitalize() + "."
+                    for _ in range(rng.randint(3, 12))
+                ]
+                block.append(" ".join(sentences) + "\n\n")
+            roll = rng.random()
+            if roll < 0.3:
+                block.append("$$\n\\mathcal{L}(\\theta) = \\sum_{i=1}^{N} \\log p_\\theta(x_i)\n$$\n\n")
+            elif roll < 0.45:
+                block.append("$$\\alpha$$ is the learning rate used in the experiments below.\n\n")
+            elif roll < 0.65:
+                rows = "".join(f"| {rng.choice(WORDS)} | {rng.random():.3f} | {rng.random():.3f} |\n" for _ in range(rng.randint(3, 15)))
+                block.append("| Model | Accuracy | F1 |\n|---|---|---|\n" + rows + "\n")
+        text = "".join(block)
+        parts.append(text)
+        size += len(text)
+    return "".join(parts)
+
+
+def run(chunker: MarkdownChunker, strategy: str, markdown: str, repeat: int) -> dict:
+    chunker.strategy = strategy
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = chunker.chunk_markdown(markdown, paper_id="bench")
+        best = min(best, time.perf_counter() - start)
+    sizes = [len(chunk.content) for chunk in chunks]
+    return {
+        "seconds": best,
+        "mb_per_second": len(markdown) / (1024 * 1024) / best,
+        "chunks": len(chunks),
+        "max_chunk": max(sizes),
+        "mean_chunk": sum(sizes) / len(sizes)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark markdown chunking throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100_000, 1_000_000, 5_000_000], help="Paper sizes in characters")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args()
+    
+    chunker = MarkdownChunker()
+    print(f"chunk_size={chunker.chunk_size} chunk_overlap={chunker.chunk_overlap}")
+    print(f"{'chars':>10} {'strategy':>10} {'seconds':>9} {'MB/s':>8} {'chunks':>7} {'max':>6} {'mean':>7}")
+    for size in args.sizes:
+        markdown = generate_paper(size)
+        for strategy in ("structural", "recursive"):
+            result = run(chunker, strategy, markdown, args.repeat)
+            print(
+                f"{len(markdown):>10} {strategy:>10} {result['seconds']:>9.3f} {result['mb_per_second']:>8.2f} "
+                f"{result['chunks']:>7} {result['max_chunk']:>6} {result['mean_chunk']:>7.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
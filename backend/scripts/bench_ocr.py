@@ -0,0 +1,61 @@
+"""
+OCR wall-clock time versus page count: one request per PDF vs concurrent page ranges.
+
+Usage:
+    python scripts/bench_ocr.py --pages 10 50 100 300
+
+Runs OCRService against FakeMistralOCR, which sleeps a fixed overhead per
+request plus a time per page. With --fail-first-request the request that
+starts at page 0 fails once, showing that a retry only redoes its range.
+Times are simulated and scaled by --time-scale; runs offline.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fakes import FakeMistralOCR  # noqa: E402  (also sets dummy settings)
+from services.ocr_service import OCRService  # noqa: E402
+
+
+def run(service: OCRService, args, page_count: int, ranged: bool) -> tuple:
+    service.client = FakeMistralOCR(
+        page_count,
+        seconds_per_request=args.seconds_per_request * args.time_scale,
+        seconds_per_page=args.seconds_per_page * args.time_scale,
+        failures={0: 1} if args.fail_first_request else None
+    )
+    start = time.perf_counter()
+    response = service.process_pdf_from_url("https://s3.test/paper.pdf", page_count=page_count if ranged else None)
+    elapsed = time.perf_counter() - start
+    assert [page["index"] for page in response["pages"]] == list(range(page_count))
+    return elapsed / args.time_scale, len(service.client.requests)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark page-range OCR against a fake Mistral OCR endpoint")
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 50, 100, 300], help="Page counts to benchmark")
+    parser.add_argument("--seconds-per-request", type=float, default=2.0, help="Simulated fixed latency per request")
+    parser.add_argument("--seconds-per-page", type=float, default=0.5, help="Simulated latency per page")
+    parser.add_argument("--time-scale", type=float, default=0.01, help="Multiplier applied to the simulated latencies")
+    parser.add_argument("--fail-first-request", action="store_true", help="Fail the request starting at page 0 once")
+    args = parser.parse_args()
+    
+    service = OCRService()
+    service.settings.ocr_retry_backoff_seconds = 0
+    print(
+        f"range_size={service.settings.ocr_page_range_size} "
+        f"max_concurrency={service.settings.ocr_max_concurrency} "
+        f"(simulated seconds)"
+    )
+    print(f"{'pages':>6} {'single':>9} {'ranged':>9} {'speedup':>8} {'requests':>9}")
+    for page_count in args.pages:
+        single, _ = run(service, args, page_count, ranged=False)
+        ranged, requests = run(service, args, page_count, ranged=True)
+        print(f"{page_count:>6} {single:>9.1f} {ranged:>9.1f} {single / ranged:>7.1f}x {requests:>9}")
+
+
+if __name__ == "__main__":
+    main()
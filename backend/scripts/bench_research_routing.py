@@ -0,0 +1,213 @@
+"""
+Model calls per completed research report: structured routing vs the keyword router.
+
+Usage:
+    python scripts/bench_research_routing.py --max-iterations 15
+
+Runs the research graph offline on canned transcripts. The models and
+search providers are replaced with fakes that replay each scenario, once
+with the structured ReasoningDecision router and once with the previous
+router, which matched keywords in the free-text next action.
+"""
+import os
+import sys
+import argparse
+from typing import List, Literal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tests.fakes  # noqa: F401,E402  (dummy settings, no checkpoints)
+import agent.nodes as nodes  # noqa: E402
+from langchain_core.messages import AIMessage, AIMessageChunk  # noqa: E402
+from agent.graph import ResearchAgent  # noqa: E402
+from schemas.state import AgentConfig, AgentState, ReasoningDecision, SearchResult  # noqa: E402
+
+QUERY = "How does prompt caching change LLM serving latency and cost?"
+
+PLAN = """1. Search for prompt caching latency measurements
+2. Search for prompt caching pricing and cost savings
+3. Investigate cache hit rates in production deployments"""
+
+
+def decision(action: str, confidence: float, done: bool = False, queries: List[str] = ()) -> ReasoningDecision:
+    return ReasoningDecision(action=action, queries=list(queries), confidence=confidence, done=done, rationale=f"{action} at {confidence:.2f}")
+
+
+# Each reasoning step is (free-text transcript, structured decision); the last step repeats
+SCENARIOS = {
+    "decisive": {
+        "results_per_call": 3,
+        "max_unique_results": 60,
+        "findings_per_analysis": 2,
+        "reasoning": [
+            ("Thought: the plan is ready.\nAction: search for prompt caching latency benchmarks.",
+             decision("search", 0.2, queries=["prompt caching latency benchmarks"])),
+            ("Thought: the sources cover latency and cost.\nNext: write the final report.",
+             decision("generate", 0.85, done=True))
+        ]
+    },
+    "hedging": {
+        "results_per_call": 1,
+        "max_unique_results": 60,
+        "findings_per_analysis": 1,
+        "reasoning": [
+            ("Thought: nothing is known yet.\nNext: find sources on cache hit rates.",
+             decision("search", 0.2, queries=["prompt cache hit rates production"])),
+            ("Thought: some results are still unread.\nNext: review the findings and find any remaining gaps.",
+             decision("analyze", 0.5)),
+            ("Thought: the evidence answers the question.\nNext: review the findings and find any remaining gaps.",
+             decision("generate", 0.8, done=True))
+        ]
+    },
+    "sparse": {
+        "results_per_call": 1,
+        "max_unique_results": 4,
+        "findings_per_analysis": 1,
+        "reasoning": [
+            ("Thought: few sources exist.\nAction: investigate 'prompt caching' further.",
+             decision("search", 0.4, queries=["prompt caching case study"])),
+            ("Thought: still few sources.\nAction: investigate 'prompt caching' further.",
+             decision("search", 0.5, queries=["prompt caching evaluation"]))
+        ]
+    }
+}
+
+
+class ScenarioReplay:
+    """Fake models and search providers replaying one scenario"""
+    
+    def __init__(self, scenario: dict, structured: bool):
+        self.scenario = scenario
+        self.structured = structured
+        self.reasoning_steps = 0
+        self.analyses = 0
+        self.unique_results = 0
+    
+    def get_model(self, model_id: str, schema=None):
+        return self if schema is None else StructuredReplay(self)
+    
+    def invoke(self, messages) -> AIMessage:
+        prompt = messages[-1].content
+        if "Analyze the search results for" in prompt:
+            self.analyses += 1
+            findings = "\n".join(
+                f"- Finding {self.analyses}.{index}: cached prefixes cut time to first token for long prompts"
+                for index in range(self.scenario["findings_per_analysis"])
+            )
+            return AIMessage(content=findings)
+        return AIMessage(content=PLAN)
+    
+    def stream(self, messages):
+        for line in ("# Prompt Caching\n\n", "## Executive Summary\n\n", "Prompt caching lowers latency and cost.\n"):
+            yield AIMessageChunk(content=line)
+    
+    def next_reasoning(self):
+        steps = self.scenario["reasoning"]
+        step = steps[min(self.reasoning_steps, len(steps) - 1)]
+        self.reasoning_steps += 1
+        return step
+    
+    def search(self, query: str, bypass_cache: bool = False) -> List[SearchResult]:
+        results = []
+        for _ in range(self.scenario["results_per_call"]):
+            # Past the scenario's supply, providers only return results already seen
+            if self.unique_results < self.scenario["max_unique_results"]:
+                number = self.unique_results
+                self.unique_results += 1
+            else:
+                number = 0
+            results.append(SearchResult(
+                title=f"Source {number}",
+                url=f"https://source{number}.test/prompt-caching",
+                content=f"Measurements of prompt caching from source {number}.",
+                source="tavily"
+            ))
+        return results
+
+
+class StructuredReplay:
+    """Structured-output model: the scripted decision, or only the raw text for the keyword router"""
+    
+    def __init__(self, replay: ScenarioReplay):
+        self.replay = replay
+    
+    def invoke(self, messages) -> dict:
+        text, scripted = self.replay.next_reasoning()
+        return {
+            "raw": AIMessage(content=text),
+            "parsed": scripted if self.replay.structured else None,
+            "parsing_error": None
+        }
+
+
+class KeywordRoutingAgent(ResearchAgent):
+    """The previous router: substring matches on the next action extracted from free text"""
+    
+    def _route_from_reasoning(self, state: AgentState) -> Literal["search", "analysis", "generate", "end"]:
+        if state["status"] == "error" or state["error_count"] >= state["max_errors"]:
+            return "end"
+        if state["status"] == "completed":
+            return "end"
+        if state["iteration_count"] >= state["max_iterations"]:
+            return "generate"
+        if state["status"] == "generating":
+            return "generate"
+        
+        # Without a parsed decision, the rationale holds the extracted next action
+        next_action = state["current_reasoning"].lower()
+        if any(keyword in next_action for keyword in ["search", "look up", "investigate", "find"]):
+            return "search"
+        if any(keyword in next_action for keyword in ["analyze", "examine", "review", "synthesize"]):
+            return "analysis"
+        if any(keyword in next_action for keyword in ["generate", "write", "create", "document", "report"]):
+            return "generate"
+        if len(state["search_results"]) < self.config.min_search_results:
+            return "search"
+        if len(state["evidence_collected"]) < 3:
+            return "analysis"
+        return "generate"
+
+
+def run(scenario: dict, structured: bool, config: AgentConfig) -> dict:
+    replay = ScenarioReplay(scenario, structured)
+    nodes._get_model = replay.get_model
+    nodes.run_tavily_search = nodes.run_perplexity_search = replay.search
+    
+    agent = (ResearchAgent if structured else KeywordRoutingAgent)(config)
+    state = agent.research(QUERY)
+    return {
+        "model_calls": sum(metrics["calls"] for metrics in state["node_metrics"].values()),
+        "iterations": state["iteration_count"],
+        "sources": len(state["search_results"]),
+        "evidence": len(state["evidence_collected"]),
+        "completed": state["final_document"] is not None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark research routing on canned fake-LLM transcripts")
+    parser.add_argument("--max-iterations", type=int, default=15, help="Agent iteration budget")
+    args = parser.parse_args()
+    
+    # Result scoring would call the embedding model
+    nodes.result_store.score = lambda query, results: None
+    config = AgentConfig(max_iterations=args.max_iterations)
+    
+    print(f"{'scenario':>10} {'router':>10} {'calls':>6} {'iters':>6} {'sources':>8} {'evidence':>9} {'report':>7}")
+    totals = {"keyword": [0, 0], "structured": [0, 0]}
+    for name, scenario in SCENARIOS.items():
+        for router, structured in (("keyword", False), ("structured", True)):
+            result = run(scenario, structured, config)
+            totals[router][0] += result["model_calls"]
+            totals[router][1] += result["completed"]
+            print(
+                f"{name:>10} {router:>10} {result['model_calls']:>6} {result['iterations']:>6} "
+                f"{result['sources']:>8} {result['evidence']:>9} {'yes' if result['completed'] else 'no':>7}"
+            )
+    
+    for router, (calls, reports) in totals.items():
+        print(f"{router}: {calls / reports if reports else float('nan'):.1f} model calls per completed report")
+
+
+if __name__ == "__main__":
+    main()
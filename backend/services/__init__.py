@@ -2,18 +2,22 @@ from .ocr_service import OCRService
 from .paper_service import PaperService
 from .embedding_service import EmbeddingService
 from .vector_store_service import VectorStoreService
+from .paper_index_service import PaperIndexService
 from .embed_store_service import EmbedStoreService
 from .chat_service import ChatService
 from .llm_service import LLMService
 from .ai_analysis_service import AIAnalysisService
+from .bulk_ingest_service import BulkIngestService
 
 __all__ = [
     "OCRService",
     "PaperService",
     "EmbeddingService",
     "VectorStoreService",
+    "PaperIndexService",
     "EmbedStoreService",
     "ChatService",
     "LLMService",
-    "AIAnalysisService"
+    "AIAnalysisService",
+    "BulkIngestService"
 ]
@@ -1,47 +1,31 @@
+import re
+import json
+import math
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from langchain.prompts import PromptTemplate
-from typing import List
-from utils import S3Client
-from schemas.ai_analysis import ResearchPaperSummary, MCQSet
+from langchain_aws import ChatBedrockConverse
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.output_parsers import JsonOutputParser, PydanticOutputParser
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pydantic import ValidationError
+from typing import Callable, Iterator, List, Optional
+from utils import S3Client, ArtifactCache, SingleFlight, make_etag
+from schemas.ai_analysis import ResearchPaperSummary, SectionNotes, MCQSet, QuestionModel
 from services.llm_service import LLMService
 from config import get_settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever a prompt or output schema changes so cached artifacts are regenerated
+ANALYSIS_PROMPT_VERSION = "1"
 
-class AIAnalysisService:
-    
-    def __init__(self):
-        self.s3_client = S3Client()
-        self.llm_service = LLMService()
-        self.settings = get_settings()
-        self.llm = self.llm_service.get_llm()
-    
-    def _fetch_paper_markdown(self, paper_id: str) -> str:
-        markdown_s3_key = f"{self.settings.s3_parsed_markdown_prefix}/{paper_id}/paper.md"
-        
-        if not self.s3_client.file_exists(markdown_s3_key):
-            raise Exception(f"Markdown file not found for paper_id: {paper_id}")
-        
-        markdown_content = self.s3_client.download_file(markdown_s3_key).decode('utf-8')
-        logger.info(f"Fetched markdown for paper {paper_id}")
-        return markdown_content
-    
-    def generate_summary(self, paper_id: str) -> dict:
-        start_time = time.time()
-        
-        try:
-           
-            paper_content = self._fetch_paper_markdown(paper_id)
-            
-            summary_prompt = """You are an expert academic summarizer and research analyst.
-
-Analyze the following research paper in depth, using the text below:
+# Payload field holding the generated content of each artifact, and its field in a combined analysis result
+ARTIFACT_CONTENT_FIELDS = {"summary": "summary", "quiz": "questions", "mindmap": "markdown"}
+COMBINED_CONTENT_FIELDS = {"summary": "summary", "quiz": "questions", "mindmap": "mindmap_markdown"}
 
-{paper_markdown}
-
-Your task:
+SUMMARY_OUTPUT_INSTRUCTIONS = """Your task:
 Provide a **comprehensive, detailed, and well-structured analysis** of the paper in **strict JSON format**.
 Each field in the JSON must contain **Markdown-formatted content**, written in full academic prose — not bullet-point fragments or one-line summaries.
 
@@ -73,46 +57,42 @@ Each field in the JSON must contain **Markdown-formatted content**, written in f
 ---
 
 Return only valid JSON."""
-            
-            structured_llm = self.llm.with_structured_output(ResearchPaperSummary)
-            
-            prompt = PromptTemplate(
-                template=summary_prompt,
-                input_variables=["paper_markdown"]
-            )
-            summary_chain = prompt | structured_llm
-            
-            logger.info(f"Generating summary for paper {paper_id}")
-            summary = summary_chain.invoke({"paper_markdown": paper_content})
-            
-            processing_time = time.time() - start_time
-            logger.info(f"Generated summary for paper {paper_id} in {processing_time:.2f}s")
-            
-            return {
-                "paper_id": paper_id,
-                "summary": summary.model_dump(),
-                "processing_time_seconds": round(processing_time, 2),
-                "message": "Summary generated successfully"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error generating summary for paper {paper_id}: {e}")
-            raise
-    
-    def generate_quiz(self, paper_id: str, num_questions: int = 10) -> dict:
-        """Generate quiz questions for a research paper"""
-        start_time = time.time()
-        
-        try:
-            paper_content = self._fetch_paper_markdown(paper_id)
-            
-            quiz_prompt = """You are an expert educator creating assessment questions for research papers.
 
-Based on the following research paper:
+SUMMARY_PROMPT = """You are an expert academic summarizer and research analyst.
+
+Analyze the following research paper in depth, using the text below:
 
 {paper_markdown}
 
-Generate {num_questions} high-quality multiple-choice questions that test deep understanding of the paper.
+""" + SUMMARY_OUTPUT_INSTRUCTIONS
+
+SECTION_NOTES_PROMPT = """You are an expert academic summarizer and research analyst.
+
+Below is part {section_number} of {total_sections} of a research paper:
+
+{section_markdown}
+
+Extract detailed notes from this part only, one field per aspect of the paper (summary, background, problem, methods, experiments, results, limitations, implications, future_work).
+
+- Keep concrete details: numbers, dataset names, equations ($$...$$) and table values.
+- Leave a field empty if this part does not cover that aspect.
+- Do not speculate about content outside this part.
+
+Return only valid JSON."""
+
+SUMMARY_REDUCE_PROMPT = """You are an expert academic summarizer and research analyst.
+
+A long research paper was split into {total_sections} parts and each part was analyzed separately.
+Below are the notes from every part, grouped by field:
+
+{section_notes}
+
+Merge these notes into a single coherent analysis of the whole paper. Resolve overlaps, keep the most specific details and order the content logically.
+
+""" + SUMMARY_OUTPUT_INSTRUCTIONS
+
+
+QUIZ_INSTRUCTIONS = """Generate {num_questions} high-quality multiple-choice questions that test deep understanding of the paper.
 
 Each question should:
 - Test conceptual understanding, not just memorization
@@ -120,52 +100,20 @@ Each question should:
 - Have exactly one correct answer 
 - Include an explanation of why the correct answer is right
 
-Cover diverse aspects: methodology, results, implications, limitations, and key concepts.
+Cover diverse aspects: methodology, results, implications, limitations, and key concepts."""
 
-
-"""
-            
-           
-            structured_llm = self.llm.with_structured_output(MCQSet)
-            
-            prompt = PromptTemplate(
-                template=quiz_prompt,
-                input_variables=["paper_markdown", "num_questions"]
-            )
-            quiz_chain = prompt | structured_llm
-            
-            logger.info(f"Generating {num_questions} quiz questions for paper {paper_id}")
-            quiz_result = quiz_chain.invoke({
-                "paper_markdown": paper_content,
-                "num_questions": num_questions
-            })
-            processing_time = time.time() - start_time
-            
-            return {
-                "paper_id": paper_id,
-                "questions": quiz_result.questions,  # Changed from 'questions' to 'quiz_result.questions'
-                "processing_time_seconds": round(processing_time, 2),
-                "message": "Quiz generated successfully"
-            }
-            
-        except Exception as e:
-            logger.error(f"Error generating quiz for paper {paper_id}: {e}")
-            raise
-    
-    def generate_mindmap(self, paper_id: str) -> dict:
-        """Generate interactive mindmap for a research paper"""
-        start_time = time.time()
-        
-        try:
-            paper_content = self._fetch_paper_markdown(paper_id)
-            
-            mindmap_prompt = """You are an expert at creating structured knowledge representations.
+QUIZ_PROMPT = """You are an expert educator creating assessment questions for research papers.
 
 Based on the following research paper:
 
 {paper_markdown}
 
-Create a comprehensive mindmap in Markmap markdown format.
+""" + QUIZ_INSTRUCTIONS + """
+
+
+"""
+
+MINDMAP_INSTRUCTIONS = """Create a comprehensive mindmap in Markmap markdown format.
 
 The mindmap should:
 - Start with the paper title as the root node
@@ -175,105 +123,745 @@ The mindmap should:
 - Be comprehensive but well-organized
 
 Return ONLY the markdown content for the mindmap, starting with # (the paper title)."""
+
+MINDMAP_PROMPT = """You are an expert at creating structured knowledge representations.
+
+Based on the following research paper:
+
+{paper_markdown}
+
+""" + MINDMAP_INSTRUCTIONS
+
+QUIZ_BATCH_PROMPT = """You are an expert educator creating assessment questions for research papers.
+
+Based on the following part {section_number} of {total_sections} of a research paper:
+
+{section_markdown}
+
+""" + QUIZ_INSTRUCTIONS + """
+
+Base every question on this part of the paper.
+{avoid_questions}
+
+{format_instructions}"""
+
+# Combined analysis: every artifact shares this system prefix so Bedrock can cache it
+ANALYSIS_PAPER_PREFIX = """You are an expert academic analyst, educator and knowledge-representation specialist.
+
+You will be asked for several different analyses of the following research paper:
+
+{paper_markdown}"""
+
+COMBINED_SUMMARY_TASK = """Analyze the research paper above in depth.
+
+""" + SUMMARY_OUTPUT_INSTRUCTIONS + """
+
+{format_instructions}"""
+
+COMBINED_QUIZ_TASK = """Based on the research paper above:
+
+""" + QUIZ_INSTRUCTIONS + """
+
+{format_instructions}"""
+
+COMBINED_MINDMAP_TASK = """Based on the research paper above:
+
+""" + MINDMAP_INSTRUCTIONS
+
+# Static page: the mindmap markdown is fetched (and HTTP-cached) separately
+MINDMAP_HTML_SHELL = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Mindmap for PDF</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #ffffff; min-height: 100vh; padding: 20px; }
+        h1 { text-align: center; color: #333; font-size: 2rem; margin-bottom: 20px; font-weight: 600; }
+        .markmap { width: 100%; height: 85vh; border: 1px solid #e0e0e0; border-radius: 8px; background: #fafafa; }
+        @media (max-width: 768px) { h1 { font-size: 1.5rem; } .markmap { height: 80vh; } }
+    </style>
+    <script>window.markmap = { autoLoader: { manual: true } };</script>
+    <script src="https://cdn.jsdelivr.net/npm/markmap-autoloader@0.18.12/dist/index.js"></script>
+</head>
+<body>
+    <h1>MindMap</h1>
+    <div class="markmap"></div>
+    <script>
+        fetch(__MARKDOWN_URL__)
+            .then((response) => {
+                if (!response.ok) throw new Error("Failed to load mindmap");
+                return response.text();
+            })
+            .then((markdown) => {
+                const template = document.createElement("script");
+                template.type = "text/template";
+                template.textContent = markdown;
+                document.querySelector(".markmap").appendChild(template);
+                markmap.autoLoader.renderAll();
+            })
+            .catch((error) => {
+                document.querySelector(".markmap").textContent = error.message;
+            });
+    </script>
+</body>
+</html>
+"""
+
+
+class AIAnalysisService:
+    
+    def __init__(self):
+        self.s3_client = S3Client()
+        self.llm_service = LLMService()
+        self.settings = get_settings()
+        self.llm = self.llm_service.get_llm()
+        self.artifact_cache = ArtifactCache(self.s3_client)
+        self.single_flight = SingleFlight()
+        self.summary_parser = PydanticOutputParser(pydantic_object=ResearchPaperSummary)
+        self.quiz_parser = PydanticOutputParser(pydantic_object=MCQSet)
+        # Parses without validating so each question can be validated on its own
+        self.quiz_json_parser = JsonOutputParser(pydantic_object=MCQSet)
+        self.quiz_section_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.settings.quiz_stream_section_chars,
+            chunk_overlap=0,
+            separators=["\n# ", "\n## ", "\n### ", "\n\n", "\n", " ", ""],
+            length_function=len,
+        )
+        self.section_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self.settings.summary_section_chars,
+            chunk_overlap=0,
+            separators=["\n# ", "\n## ", "\n### ", "\n\n", "\n", " ", ""],
+            length_function=len,
+        )
+    
+    def paper_exists(self, paper_id: str) -> bool:
+        """Whether the paper has been processed (its markdown is in S3)"""
+        return self.s3_client.file_exists(f"{self.settings.s3_parsed_markdown_prefix}/{paper_id}/paper.md")
+    
+    def _fetch_paper_markdown(self, paper_id: str) -> str:
+        markdown_s3_key = f"{self.settings.s3_parsed_markdown_prefix}/{paper_id}/paper.md"
+        
+        if not self.s3_client.file_exists(markdown_s3_key):
+            raise Exception(f"Markdown file not found for paper_id: {paper_id}")
+        
+        markdown_content = self.s3_client.download_file(markdown_s3_key).decode('utf-8')
+        logger.info(f"Fetched markdown for paper {paper_id}")
+        return markdown_content
+    
+    def _artifact_key(self, paper_id: str, artifact: str, params: dict) -> str:
+        """Cache key covering everything that changes a generated artifact"""
+        return self.artifact_cache.build_key(paper_id, artifact, {
+            **params,
+            "prompt_version": ANALYSIS_PROMPT_VERSION,
+            "model": self.settings.bedrock_chat_model
+        })
+    
+    def get_artifact_etag(self, paper_id: str, artifact: str, params: dict) -> Optional[str]:
+        """
+        HTTP ETag of the stored artifact, looked up without generating it.
+        
+        The ETag hashes the artifact content (see content_etag), so it changes
+        whenever the artifact is regenerated, e.g. after ?refresh=true.
+        
+        Args:
+            paper_id: Paper identifier
+            artifact: Artifact name (summary, quiz, mindmap, analysis)
+            params: Parameters that select the artifact variant
             
+        Returns:
+            Quoted ETag, or None when the artifact has not been generated yet
+        """
+        if artifact != "analysis":
+            stored = self.artifact_cache.get(self._artifact_key(paper_id, artifact, params), record=False)
+            return self.content_etag(artifact, stored) if stored else None
+        
+        result = {}
+        for name, cache_key in self._combined_cache_keys(paper_id, params["num_questions"]).items():
+            stored = self.artifact_cache.get(cache_key, record=False)
+            if not stored:
+                return None
+            result[COMBINED_CONTENT_FIELDS[name]] = stored[ARTIFACT_CONTENT_FIELDS[name]]
+        return self.content_etag("analysis", result)
+    
+    @staticmethod
+    def content_etag(artifact: str, result: dict) -> str:
+        """
+        ETag over the generated content of an artifact result, ignoring
+        per-response fields such as timings and the cached flag
+        
+        Args:
+            artifact: Artifact name (summary, quiz, mindmap, analysis)
+            result: Artifact payload, or the combined analysis result for "analysis"
+        """
+        if artifact == "analysis":
+            return make_etag(*(
+                AIAnalysisService.content_etag(name, {ARTIFACT_CONTENT_FIELDS[name]: result[field]})
+                for name, field in COMBINED_CONTENT_FIELDS.items()
+            ))
+        return make_etag(artifact, json.dumps(result[ARTIFACT_CONTENT_FIELDS[artifact]], sort_keys=True))
+    
+    def _load_cached(self, cache_key: str, refresh: bool) -> Optional[dict]:
+        if refresh:
+            self.artifact_cache.record_refresh()
+            return None
+        return self.artifact_cache.get(cache_key)
+    
+    @staticmethod
+    def _from_cache(cached: dict, start_time: float, message: str) -> dict:
+        return {
+            **cached,
+            "cached": True,
+            "processing_time_seconds": round(time.time() - start_time, 2),
+            "message": message
+        }
+    
+    def _generate_once(self, cache_key: str, refresh: bool, generate: Callable[[], dict], start_time: float, cached_message: str) -> dict:
+        """
+        Generate an artifact once across concurrent callers of the same key
+        
+        The leader reads the cache again before generating: a caller that
+        missed the cache just before the previous leader stored its result
+        gets that result instead of starting a second generation.
+        """
+        def lead() -> dict:
+            if not refresh:
+                stored = self.artifact_cache.get(cache_key, record=False)
+                if stored:
+                    return self._from_cache(stored, start_time, cached_message)
+            return {**generate(), "cached": False}
+        
+        return self.single_flight.do((cache_key, refresh), lead)
+    
+    def get_metrics(self) -> dict:
+        return {
+            "artifact_cache": self.artifact_cache.get_metrics(),
+            "coalescing": self.single_flight.get_metrics()
+        }
+    
+    def generate_summary(self, paper_id: str, mode: str = "auto", refresh: bool = False) -> dict:
+        """
+        Generate a structured summary for a research paper
+        
+        Args:
+            paper_id: Paper identifier
+            mode: 'single_pass' sends the whole paper in one prompt, 'map_reduce'
+                summarizes sections in parallel and merges them, 'auto' picks
+                map_reduce for papers longer than summary_map_reduce_threshold_chars
+            refresh: Regenerate even if a cached summary exists
+        """
+        start_time = time.time()
+        
+        try:
+            cache_key = self._artifact_key(paper_id, "summary", {"mode": mode})
+            cached = self._load_cached(cache_key, refresh)
+            if cached:
+                logger.info(f"Loaded cached summary for paper {paper_id}")
+                return self._from_cache(cached, start_time, "Summary loaded from cache")
+            
+            return self._generate_once(
+                cache_key,
+                refresh,
+                lambda: self._generate_summary_artifact(paper_id, mode, cache_key, start_time),
+                start_time,
+                "Summary loaded from cache"
+            )
+            
+        except Exception as e:
+            logger.error(f"Error generating summary for paper {paper_id}: {e}")
+            raise
+    
+    def _generate_summary_artifact(self, paper_id: str, mode: str, cache_key: str, start_time: float) -> dict:
+        paper_content = self._fetch_paper_markdown(paper_id)
+        
+        if mode == "auto":
+            use_map_reduce = len(paper_content) > self.settings.summary_map_reduce_threshold_chars
+            mode = "map_reduce" if use_map_reduce else "single_pass"
+        
+        structured_llm = self.llm.with_structured_output(ResearchPaperSummary)
+        
+        if mode == "map_reduce":
+            summary = self._generate_summary_map_reduce(paper_id, paper_content, structured_llm)
+        else:
             prompt = PromptTemplate(
-                template=mindmap_prompt,
+                template=SUMMARY_PROMPT,
                 input_variables=["paper_markdown"]
             )
-            mindmap_chain = prompt | self.llm
+            summary_chain = prompt | structured_llm
             
-            logger.info(f"Generating mindmap for paper {paper_id}")
-            mindmap_markdown = mindmap_chain.invoke({"paper_markdown": paper_content})
+            logger.info(f"Generating summary for paper {paper_id}")
+            summary = summary_chain.invoke({"paper_markdown": paper_content})
+        
+        processing_time = time.time() - start_time
+        logger.info(f"Generated {mode} summary for paper {paper_id} in {processing_time:.2f}s")
+        
+        result = {
+            "paper_id": paper_id,
+            "summary": summary.model_dump(),
+            "mode": mode,
+            "processing_time_seconds": round(processing_time, 2),
+            "message": "Summary generated successfully"
+        }
+        self.artifact_cache.put(cache_key, result)
+        return result
+    
+    def _generate_summary_map_reduce(self, paper_id: str, paper_content: str, structured_llm) -> ResearchPaperSummary:
+        """Summarize sections in parallel, then merge the section notes into one summary"""
+        sections = self.section_splitter.split_text(paper_content)
+        logger.info(f"Summarizing paper {paper_id} as {len(sections)} sections")
+        
+        map_chain = PromptTemplate(
+            template=SECTION_NOTES_PROMPT,
+            input_variables=["section_markdown", "section_number", "total_sections"]
+        ) | self.llm.with_structured_output(SectionNotes)
+        
+        section_notes = map_chain.batch(
+            [
+                {
+                    "section_markdown": section,
+                    "section_number": i,
+                    "total_sections": len(sections)
+                }
+                for i, section in enumerate(sections, 1)
+            ],
+            config={"max_concurrency": self.settings.summary_map_concurrency}
+        )
+        
+        # A section whose structured output failed to parse comes back as None
+        missing = sum(1 for notes in section_notes if notes is None)
+        if missing == len(section_notes):
+            raise ValueError(f"No section notes could be generated for paper {paper_id}")
+        if missing:
+            logger.warning(f"No notes for {missing} of {len(sections)} sections of paper {paper_id}")
+        
+        reduce_chain = PromptTemplate(
+            template=SUMMARY_REDUCE_PROMPT,
+            input_variables=["section_notes", "total_sections"]
+        ) | structured_llm
+        
+        logger.info(f"Merging section notes for paper {paper_id}")
+        return reduce_chain.invoke({
+            "section_notes": self._format_section_notes(section_notes),
+            "total_sections": len(sections)
+        })
+    
+    @staticmethod
+    def _format_section_notes(section_notes: List[Optional[SectionNotes]]) -> str:
+        """Group section notes by summary field so the reduce prompt reads field by field"""
+        formatted = []
+        for field in ResearchPaperSummary.model_fields:
+            values = [
+                (i, (getattr(notes, field, None) or "").strip())
+                for i, notes in enumerate(section_notes, 1)
+                if notes is not None
+            ]
+            entries = [f"- [Section {i}] {value}" for i, value in values if value]
+            formatted.append(f"### {field}\n" + ("\n".join(entries) if entries else "- (not covered)"))
+        return "\n\n".join(formatted)
+    
+    def generate_quiz(self, paper_id: str, num_questions: int = 10, refresh: bool = False) -> dict:
+        """Generate quiz questions for a research paper"""
+        start_time = time.time()
+        
+        try:
+            cache_key = self._artifact_key(paper_id, "quiz", {"num_questions": num_questions})
+            cached = self._load_cached(cache_key, refresh)
+            if cached:
+                logger.info(f"Loaded cached quiz for paper {paper_id}")
+                return self._from_cache(cached, start_time, "Quiz loaded from cache")
             
-            print("\n\n\n",mindmap_markdown,"\n\n\n")
+            return self._generate_once(
+                cache_key,
+                refresh,
+                lambda: self._generate_quiz_artifact(paper_id, num_questions, cache_key, start_time),
+                start_time,
+                "Quiz loaded from cache"
+            )
             
-            html_content = self._create_markmap_html(mindmap_markdown.content)
+        except Exception as e:
+            logger.error(f"Error generating quiz for paper {paper_id}: {e}")
+            raise
+    
+    def _generate_quiz_artifact(self, paper_id: str, num_questions: int, cache_key: str, start_time: float) -> dict:
+        paper_content = self._fetch_paper_markdown(paper_id)
+        
+        structured_llm = self.llm.with_structured_output(MCQSet)
+        
+        prompt = PromptTemplate(
+            template=QUIZ_PROMPT,
+            input_variables=["paper_markdown", "num_questions"]
+        )
+        quiz_chain = prompt | structured_llm
+        
+        logger.info(f"Generating {num_questions} quiz questions for paper {paper_id}")
+        quiz_result = quiz_chain.invoke({
+            "paper_markdown": paper_content,
+            "num_questions": num_questions
+        })
+        processing_time = time.time() - start_time
+        
+        result = {
+            "paper_id": paper_id,
+            "questions": [question.model_dump() for question in quiz_result.questions],
+            "processing_time_seconds": round(processing_time, 2),
+            "message": "Quiz generated successfully"
+        }
+        self.artifact_cache.put(cache_key, result)
+        return result
+    
+    def stream_quiz(self, paper_id: str, num_questions: int = 10, refresh: bool = False) -> Iterator[str]:
+        """
+        Generate quiz questions incrementally and yield them as NDJSON lines
+        
+        Questions are generated in small batches, each from one section of the
+        paper, in parallel. Every question is validated on its own; only the
+        failed ones are requested again. Near-duplicate questions across
+        batches are dropped. Lines have the shape
+        {"type": "question", "question": {...}}, followed by one final
+        {"type": "done", ...} line (or {"type": "error", ...} on failure).
+        """
+        start_time = time.time()
+        
+        try:
+            cache_key = self._artifact_key(paper_id, "quiz", {"num_questions": num_questions})
+            cached = self._load_cached(cache_key, refresh)
+            if cached:
+                logger.info(f"Streaming cached quiz for paper {paper_id}")
+                for question in cached["questions"]:
+                    yield json.dumps({"type": "question", "question": question}) + "\n"
+                yield json.dumps({
+                    "type": "done",
+                    "cached": True,
+                    "total_questions": len(cached["questions"]),
+                    "processing_time_seconds": round(time.time() - start_time, 2)
+                }) + "\n"
+                return
+            
+            paper_content = self._fetch_paper_markdown(paper_id)
+            sections = self.quiz_section_splitter.split_text(paper_content)
+            batches = self._plan_quiz_batches(len(sections), num_questions)
+            logger.info(f"Streaming {num_questions} quiz questions for paper {paper_id} in {len(batches)} batches")
+            
+            questions = []
+            failed_items = 0
+            duplicates_removed = 0
+            
+            executor = ThreadPoolExecutor(max_workers=self.settings.quiz_stream_concurrency)
+            try:
+                futures = [
+                    executor.submit(self._generate_quiz_batch, sections, section_index, count)
+                    for section_index, count in batches
+                ]
+                for future in as_completed(futures):
+                    try:
+                        batch_questions, batch_failures = future.result()
+                    except Exception as e:
+                        logger.warning(f"Quiz batch failed for paper {paper_id}: {e}")
+                        yield json.dumps({"type": "error", "detail": f"Quiz batch failed: {str(e)}"}) + "\n"
+                        continue
+                    
+                    failed_items += batch_failures
+                    for question in batch_questions:
+                        if len(questions) >= num_questions:
+                            break
+                        if self._is_duplicate_question(question, questions):
+                            duplicates_removed += 1
+                            continue
+                        
+                        question = question.model_copy(update={"id": len(questions) + 1})
+                        questions.append(question)
+                        yield json.dumps({"type": "question", "question": question.model_dump()}) + "\n"
+                    
+                    if len(questions) >= num_questions:
+                        break
+            finally:
+                # Enough questions, or the client went away (GeneratorExit):
+                # batches not started yet are cancelled instead of awaited
+                executor.shutdown(wait=False, cancel_futures=True)
             
             processing_time = time.time() - start_time
-            logger.info(f"Generated mindmap for paper {paper_id} in {processing_time:.2f}s")
+            logger.info(f"Streamed {len(questions)} quiz questions for paper {paper_id} in {processing_time:.2f}s")
+            
+            if len(questions) == num_questions:
+                self.artifact_cache.put(cache_key, {
+                    "paper_id": paper_id,
+                    "questions": [question.model_dump() for question in questions],
+                    "processing_time_seconds": round(processing_time, 2),
+                    "message": "Quiz generated successfully"
+                })
+            
+            yield json.dumps({
+                "type": "done",
+                "cached": False,
+                "total_questions": len(questions),
+                "failed_items": failed_items,
+                "duplicates_removed": duplicates_removed,
+                "processing_time_seconds": round(processing_time, 2)
+            }) + "\n"
+            
+        except Exception as e:
+            logger.error(f"Error streaming quiz for paper {paper_id}: {e}")
+            yield json.dumps({"type": "error", "detail": f"Failed to generate quiz: {str(e)}"}) + "\n"
+    
+    def _plan_quiz_batches(self, total_sections: int, num_questions: int) -> List[tuple]:
+        """Split num_questions into small batches spread evenly over the paper sections"""
+        batch_size = self.settings.quiz_stream_batch_size
+        total_batches = math.ceil(num_questions / batch_size)
+        
+        batches = []
+        remaining = num_questions
+        for i in range(total_batches):
+            count = min(batch_size, remaining)
+            batches.append((i * total_sections // total_batches, count))
+            remaining -= count
+        return batches
+    
+    def _generate_quiz_batch(self, sections: List[str], section_index: int, count: int) -> tuple:
+        """Generate up to count valid questions from one section, retrying only the failed items"""
+        chain = PromptTemplate(
+            template=QUIZ_BATCH_PROMPT,
+            input_variables=["section_markdown", "section_number", "total_sections", "num_questions", "avoid_questions"],
+            partial_variables={"format_instructions": self.quiz_json_parser.get_format_instructions()}
+        ) | self.llm | self.quiz_json_parser
+        
+        accepted = []
+        failures = 0
+        for attempt in range(self.settings.quiz_stream_max_retries + 1):
+            remaining = count - len(accepted)
+            if remaining <= 0:
+                break
+            
+            avoid_questions = ""
+            if accepted:
+                avoid_questions = "Do not repeat these questions:\n" + "\n".join(f"- {q.question}" for q in accepted)
+            
+            try:
+                output = chain.invoke({
+                    "section_markdown": sections[section_index],
+                    "section_number": section_index + 1,
+                    "total_sections": len(sections),
+                    "num_questions": remaining,
+                    "avoid_questions": avoid_questions
+                })
+                items = output.get("questions", []) if isinstance(output, dict) else []
+            except Exception as e:
+                logger.warning(f"Quiz batch attempt {attempt + 1} returned unparseable output: {e}")
+                items = []
+            
+            for item in items[:remaining]:
+                try:
+                    accepted.append(QuestionModel.model_validate({**item, "id": 0}))
+                except (ValidationError, TypeError):
+                    failures += 1
+            failures += max(0, remaining - len(items))
+        
+        return accepted, failures
+    
+    @staticmethod
+    def _is_duplicate_question(question: QuestionModel, existing: List[QuestionModel], threshold: float = 0.8) -> bool:
+        """Treat questions as duplicates when their word sets overlap by at least threshold (Jaccard)"""
+        words = set(re.findall(r"\w+", question.question.lower()))
+        for other in existing:
+            other_words = set(re.findall(r"\w+", other.question.lower()))
+            union = words | other_words
+            if union and len(words & other_words) / len(union) >= threshold:
+                return True
+        return False
+    
+    def generate_mindmap(self, paper_id: str, refresh: bool = False) -> dict:
+        """Generate Markmap markdown for a research paper"""
+        start_time = time.time()
+        
+        try:
+            cache_key = self._artifact_key(paper_id, "mindmap", {})
+            cached = self._load_cached(cache_key, refresh)
+            if cached:
+                logger.info(f"Loaded cached mindmap for paper {paper_id}")
+                return self._from_cache(cached, start_time, "Mindmap loaded from cache")
             
-            return {
-                "paper_id": paper_id,
-                "html_content": html_content,
-                "processing_time_seconds": round(processing_time, 2),
-                "message": "Mindmap generated successfully"
-            }
+            return self._generate_once(
+                cache_key,
+                refresh,
+                lambda: self._generate_mindmap_artifact(paper_id, cache_key, start_time),
+                start_time,
+                "Mindmap loaded from cache"
+            )
             
         except Exception as e:
             logger.error(f"Error generating mindmap for paper {paper_id}: {e}")
             raise
     
-    def _create_markmap_html(self, markdown_content: str) -> str:
-        """Create HTML page with embedded markmap visualization"""
-        import html  # for escaping <, >, &, etc.
-
-        safe_markdown = html.escape(markdown_content)
-
-        html_template = f"""
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta name="x-poe-datastore-behavior" content="local_only">
-            <meta http-equiv="Content-Security-Policy" content="default-src 'self' 'unsafe-inline' 'unsafe-eval' data: blob: https://cdnjs.cloudflare.com https://cdn.jsdelivr.net https://code.jquery.com https://unpkg.com https://d3js.org https://threejs.org https://cdn.plot.ly https://stackpath.bootstrapcdn.com https://maps.googleapis.com https://cdn.tailwindcss.com https://ajax.googleapis.com https://kit.fontawesome.com https://cdn.datatables.net https://maxcdn.bootstrapcdn.com https://code.highcharts.com https://tako-static-assets-production.s3.amazonaws.com https://www.youtube.com https://fonts.googleapis.com https://fonts.gstatic.com https://pfst.cf2.poecdn.net https://puc.poecdn.net https://i.imgur.com https://wikimedia.org https://*.icons8.com https://*.giphy.com https://picsum.photos https://images.unsplash.com; frame-src 'self' https://www.youtube.com https://trytako.com; child-src 'self'; manifest-src 'self'; worker-src 'self'; upgrade-insecure-requests; block-all-mixed-content;">
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Mindmap for PDF</title>
-            <style>
-                * {{
-                    margin: 0;
-                    padding: 0;
-                    box-sizing: border-box;
-                }}
-
-                body {{
-                    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                    background: #ffffff;
-                    min-height: 100vh;
-                    padding: 20px;
-                }}
-
-                h1 {{
-                    text-align: center;
-                    color: #333;
-                    font-size: 2rem;
-                    margin-bottom: 20px;
-                    font-weight: 600;
-                }}
-
-                .markmap {{
-                    width: 100%;
-                    height: 85vh;
-                    border: 1px solid #e0e0e0;
-                    border-radius: 8px;
-                    background: #fafafa;
-                }}
-
-                @media (max-width: 768px) {{
-                    h1 {{
-                        font-size: 1.5rem;
-                    }}
-
-                    .markmap {{
-                        height: 80vh;
-                    }}
-                }}
-            </style>
-            <script src="https://puc.poecdn.net/authenticated_preview_page/syncedState.bd4eeeb8e8e02052ee92.js"></script>
-        </head>
-        <body>
-            <h1>MindMap</h1>
-            <div class="markmap">
-                <pre id="mm-content" style="display:none;">{safe_markdown}</pre>
-            </div>
-
-            <script src="https://cdn.jsdelivr.net/npm/markmap-autoloader@0.18.12/dist/index.js"></script>
-            <script>
-                // Read escaped markdown and render with Markmap
-                const md = document.getElementById("mm-content").textContent;
-                markmap.autoLoader.render(document.querySelector(".markmap"), md);
-            </script>
-        </body>
-        </html>
+    def _generate_mindmap_artifact(self, paper_id: str, cache_key: str, start_time: float) -> dict:
+        paper_content = self._fetch_paper_markdown(paper_id)
+        
+        prompt = PromptTemplate(
+            template=MINDMAP_PROMPT,
+            input_variables=["paper_markdown"]
+        )
+        mindmap_chain = prompt | self.llm
+        
+        logger.info(f"Generating mindmap for paper {paper_id}")
+        mindmap_markdown = mindmap_chain.invoke({"paper_markdown": paper_content})
+        
+        processing_time = time.time() - start_time
+        logger.info(f"Generated mindmap for paper {paper_id} in {processing_time:.2f}s")
+        
+        result = {
+            "paper_id": paper_id,
+            "markdown": mindmap_markdown.content,
+            "processing_time_seconds": round(processing_time, 2),
+            "message": "Mindmap generated successfully"
+        }
+        self.artifact_cache.put(cache_key, result)
+        return result
+    
+    def generate_all(self, paper_id: str, num_questions: int = 10, refresh: bool = False) -> dict:
+        """
+        Generate summary, quiz and mindmap for a paper in one job
+        
+        The paper markdown is sent as a shared system prefix followed by a
+        Bedrock cache point. A one-token warm-up request writes the prefix to
+        the prompt cache, then the remaining generations run concurrently and
+        read it from cache instead of paying full input price and prefill
+        latency for every artifact. Results are stored in the artifact cache
+        under the same keys as the single-artifact endpoints.
         """
+        start_time = time.time()
+        
+        try:
+            cache_key = self._artifact_key(paper_id, "combined", {"num_questions": num_questions, "refresh": refresh})
+            return self.single_flight.do(
+                cache_key,
+                lambda: self._generate_all_artifacts(paper_id, num_questions, refresh, start_time)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error generating combined analysis for paper {paper_id}: {e}")
+            raise
+    
+    def _combined_cache_keys(self, paper_id: str, num_questions: int) -> dict:
+        """Artifact cache keys of the artifacts a combined analysis is made of"""
+        return {
+            "summary": self._artifact_key(paper_id, "summary", {"mode": "single_pass"}),
+            "quiz": self._artifact_key(paper_id, "quiz", {"num_questions": num_questions}),
+            "mindmap": self._artifact_key(paper_id, "mindmap", {})
+        }
+    
+    def _generate_all_artifacts(self, paper_id: str, num_questions: int, refresh: bool, start_time: float) -> dict:
+        cache_keys = self._combined_cache_keys(paper_id, num_questions)
+        
+        artifacts = {}
+        usage = []
+        for artifact, cache_key in cache_keys.items():
+            cached = self._load_cached(cache_key, refresh)
+            if cached:
+                artifacts[artifact] = cached
+                usage.append(self._usage_entry(artifact, cached=True))
+        
+        pending = [artifact for artifact in cache_keys if artifact not in artifacts]
+        if pending:
+            paper_content = self._fetch_paper_markdown(paper_id)
+            prefix = SystemMessage(content=[
+                {"type": "text", "text": ANALYSIS_PAPER_PREFIX.format(paper_markdown=paper_content)},
+                ChatBedrockConverse.create_cache_point()
+            ])
+            
+            if len(pending) > 1:
+                logger.info(f"Warming prompt cache for paper {paper_id}")
+                warm_up_start = time.time()
+                warm_up = self.llm.invoke([prefix, HumanMessage(content="Reply with OK.")], max_tokens=1)
+                usage.append(self._usage_entry("cache_warm_up", response=warm_up, latency=time.time() - warm_up_start))
+            
+            logger.info(f"Generating {', '.join(pending)} for paper {paper_id} concurrently")
+            with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+                futures = {
+                    artifact: executor.submit(self._run_combined_task, artifact, prefix, paper_id, num_questions)
+                    for artifact in pending
+                }
+                for artifact, future in futures.items():
+                    payload, artifact_usage = future.result()
+                    artifacts[artifact] = payload
+                    usage.append(artifact_usage)
+                    self.artifact_cache.put(cache_keys[artifact], payload)
+            
+            # A single-pass summary is also what 'auto' mode produces for short papers
+            if "summary" in pending and len(paper_content) <= self.settings.summary_map_reduce_threshold_chars:
+                self.artifact_cache.put(self._artifact_key(paper_id, "summary", {"mode": "auto"}), artifacts["summary"])
         
-        return html_template
+        processing_time = time.time() - start_time
+        cache_read_tokens = sum(entry["cache_read_input_tokens"] for entry in usage)
+        logger.info(
+            f"Generated combined analysis for paper {paper_id} in {processing_time:.2f}s "
+            f"({cache_read_tokens} input tokens read from prompt cache)"
+        )
+        
+        return {
+            "paper_id": paper_id,
+            "summary": artifacts["summary"]["summary"],
+            "questions": artifacts["quiz"]["questions"],
+            "mindmap_markdown": artifacts["mindmap"]["markdown"],
+            "usage": usage,
+            "cache_read_input_tokens": cache_read_tokens,
+            "processing_time_seconds": round(processing_time, 2),
+            "message": "Analysis generated successfully"
+        }
+    
+    def _run_combined_task(self, artifact: str, prefix: SystemMessage, paper_id: str, num_questions: int) -> tuple:
+        """Generate one artifact on top of the shared paper prefix"""
+        if artifact == "summary":
+            task = COMBINED_SUMMARY_TASK.format(format_instructions=self.summary_parser.get_format_instructions())
+        elif artifact == "quiz":
+            task = COMBINED_QUIZ_TASK.format(
+                num_questions=num_questions,
+                format_instructions=self.quiz_parser.get_format_instructions()
+            )
+        else:
+            task = COMBINED_MINDMAP_TASK
+        
+        task_start = time.time()
+        response = self.llm.invoke([prefix, HumanMessage(content=task)])
+        latency = time.time() - task_start
+        
+        payload = {
+            "paper_id": paper_id,
+            "processing_time_seconds": round(latency, 2)
+        }
+        if artifact == "summary":
+            payload["summary"] = self.summary_parser.parse(response.content).model_dump()
+            payload["mode"] = "single_pass"
+            payload["message"] = "Summary generated successfully"
+        elif artifact == "quiz":
+            payload["questions"] = [question.model_dump() for question in self.quiz_parser.parse(response.content).questions]
+            payload["message"] = "Quiz generated successfully"
+        else:
+            payload["markdown"] = response.content
+            payload["message"] = "Mindmap generated successfully"
+        
+        return payload, self._usage_entry(artifact, response=response, latency=latency)
+    
+    @staticmethod
+    def _usage_entry(artifact: str, cached: bool = False, response=None, latency: float = 0.0) -> dict:
+        """Latency and token usage for one step of a combined analysis"""
+        usage = (response.usage_metadata if response is not None else None) or {}
+        input_details = usage.get("input_token_details") or {}
+        return {
+            "artifact": artifact,
+            "cached": cached,
+            "latency_seconds": round(latency, 2),
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "cache_read_input_tokens": input_details.get("cache_read", 0),
+            "cache_write_input_tokens": input_details.get("cache_creation", 0)
+        }
+    
+    def create_mindmap_html(self, markdown_url: str) -> str:
+        """Render the static Markmap page that loads the mindmap markdown from markdown_url"""
+        # The URL lands in an inline <script>: escape what could close the script element or start markup
+        url_literal = (
+            json.dumps(markdown_url)
+            .replace("<", "\\u003c")
+            .replace(">", "\\u003e")
+            .replace("&", "\\u0026")
+        )
+        return MINDMAP_HTML_SHELL.replace("__MARKDOWN_URL__", url_literal)
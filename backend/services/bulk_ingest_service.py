@@ -0,0 +1,356 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterable, Optional, Tuple
+from utils import S3Client, RateLimiter, open_public_url
+from services.paper_service import PaperService
+from services.embed_store_service import EmbedStoreService
+from schemas.bulk import BulkIngestJobResponse, BulkIngestItemStatus, BulkIngestStats
+from config import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+FINISHED_STATUSES = ("done", "duplicate")
+COPY_BUFFER_BYTES = 1024 * 1024
+
+
+class S3ProgressStore:
+    """Job progress persisted as one JSON object in S3 (API jobs)"""
+    
+    def __init__(self, s3_client: S3Client, s3_key: str):
+        self.s3_client = s3_client
+        self.s3_key = s3_key
+    
+    def load(self) -> Optional[dict]:
+        if not self.s3_client.file_exists(self.s3_key):
+            return None
+        return json.loads(self.s3_client.download_file(self.s3_key))
+    
+    def save(self, progress: dict):
+        self.s3_client.upload_file(
+            file_content=json.dumps(progress).encode('utf-8'),
+            s3_key=self.s3_key,
+            content_type="application/json"
+        )
+
+
+class LocalProgressStore:
+    """Job progress persisted as a local JSON file (CLI jobs)"""
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def load(self) -> Optional[dict]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding='utf-8') as f:
+            return json.load(f)
+    
+    def save(self, progress: dict):
+        # Write then rename, so an interrupted save never corrupts the report
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding='utf-8') as f:
+            json.dump(progress, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class BulkIngestService:
+    """
+    Ingests many PDFs in one job: dedup against the hash catalog, then
+    upload/OCR and embedding with bounded concurrency and rate limits,
+    recording resumable progress after each batch of items.
+    """
+    
+    def __init__(self):
+        self.settings = get_settings()
+        # Shared by all jobs in this process, so limits are global. A paper fans out
+        # into concurrent page-range OCR requests, so OCR is limited per request
+        self.ocr_limiter = RateLimiter(self.settings.bulk_ocr_requests_per_minute)
+        self.embed_limiter = RateLimiter(self.settings.bulk_embed_requests_per_minute)
+        self.s3_client = S3Client()
+        self.paper_service = PaperService(ocr_limiter=self.ocr_limiter)
+        self.embed_store_service = EmbedStoreService()
+        self._running_jobs = set()
+        self._running_lock = threading.Lock()
+    
+    def s3_progress_store(self, job_id: str) -> S3ProgressStore:
+        return S3ProgressStore(self.s3_client, f"{self.settings.s3_bulk_jobs_prefix}/{job_id}.json")
+    
+    def is_running(self, job_id: str) -> bool:
+        with self._running_lock:
+            return job_id in self._running_jobs
+    
+    def create_job(self, job_id: str, sources: Iterable[str], embed: bool, store) -> dict:
+        """
+        Create a job, or extend an existing one with new sources
+        
+        Items already finished in a previous run are kept as they are; failed
+        items are reset to pending so the next run retries them.
+        
+        Args:
+            job_id: Job identifier
+            sources: s3://key, http(s) URL or local path of each PDF
+            embed: Whether new papers are embedded after OCR
+            store: Progress store for this job
+        
+        Returns:
+            Saved progress document
+        """
+        now = datetime.now(timezone.utc).isoformat()
+        progress = store.load() or {
+            "job_id": job_id,
+            "created_at": now,
+            "elapsed_seconds": 0.0,
+            "bytes_processed": 0,
+            "items": {}
+        }
+        progress.update({"status": "queued", "embed": embed, "updated_at": now})
+        progress.pop("error", None)
+        
+        items = progress["items"]
+        for source in sources:
+            if items.get(source, {}).get("status") not in FINISHED_STATUSES:
+                items[source] = {"status": "pending"}
+        
+        store.save(progress)
+        logger.info(f"Bulk ingest job {job_id}: {len(items)} items queued")
+        return progress
+    
+    def run_job(self, job_id: str, store, max_workers: Optional[int] = None, allow_local_files: bool = False) -> dict:
+        """
+        Process every unfinished item of a job
+        
+        Args:
+            job_id: Job identifier
+            store: Progress store holding the job created by create_job
+            max_workers: Items processed concurrently (defaults to bulk_max_workers)
+            allow_local_files: Accept local paths as sources (CLI jobs only; API jobs must never read server files)
+        
+        Returns:
+            Final progress document
+        """
+        with self._running_lock:
+            if job_id in self._running_jobs:
+                raise Exception(f"Bulk ingest job {job_id} is already running")
+            self._running_jobs.add(job_id)
+        
+        progress = store.load()
+        run_start = time.time()
+        base_elapsed = progress.get("elapsed_seconds", 0.0)
+        progress_lock = threading.Lock()
+        last_save = run_start
+        
+        def save():
+            progress["elapsed_seconds"] = round(base_elapsed + time.time() - run_start, 2)
+            progress["updated_at"] = datetime.now(timezone.utc).isoformat()
+            store.save(progress)
+        
+        try:
+            progress["status"] = "running"
+            save()
+            
+            catalog = self._load_hash_catalog()
+            claimed = {}
+            pending = [source for source, item in progress["items"].items() if item["status"] not in FINISHED_STATUSES]
+            logger.info(f"Bulk ingest job {job_id}: {len(pending)} items to process, {len(catalog)} papers in catalog")
+            
+            with ThreadPoolExecutor(max_workers=max_workers or self.settings.bulk_max_workers) as executor:
+                futures = {
+                    executor.submit(self._ingest_one, source, progress["embed"], catalog, claimed, progress_lock, allow_local_files): source
+                    for source in pending
+                }
+                
+                for future in as_completed(futures):
+                    source = futures[future]
+                    item, size = future.result()
+                    with progress_lock:
+                        progress["items"][source] = item
+                        progress["bytes_processed"] += size
+                        
+                        if time.time() - last_save >= self.settings.bulk_progress_save_interval_seconds:
+                            save()
+                            last_save = time.time()
+                            stats = self.compute_stats(progress)
+                            logger.info(
+                                f"Bulk ingest job {job_id}: {stats.done} done, {stats.duplicates} duplicates, "
+                                f"{stats.failed} failed, {stats.pending} pending ({stats.papers_per_minute} papers/min)"
+                            )
+            
+            progress["status"] = "completed"
+        
+        except Exception as e:
+            logger.error(f"Bulk ingest job {job_id} failed: {e}")
+            progress["status"] = "failed"
+            progress["error"] = str(e)
+        
+        finally:
+            save()
+            with self._running_lock:
+                self._running_jobs.discard(job_id)
+        
+        return progress
+    
+    def _load_hash_catalog(self) -> set:
+        """Hashes of all ingested PDFs, from one listing of the hash index prefix"""
+        prefix = f"{self.settings.s3_hash_index_prefix}/"
+        return {
+            key[len(prefix):].removesuffix(".txt")
+            for key in self.s3_client.list_keys(prefix)
+        }
+    
+    def _ingest_one(self, source: str, embed: bool, catalog: set, claimed: dict, lock: threading.Lock, allow_local_files: bool = False) -> Tuple[dict, int]:
+        """Returns the item result and the number of bytes read; never raises"""
+        start_time = time.time()
+        size = 0
+        
+        try:
+            fileobj, size, file_hash = self._open_hashed(source, allow_local_files)
+            
+            try:
+                # Dedup against the catalog and against other items of this job
+                with lock:
+                    duplicate_of = claimed.get(file_hash)
+                    in_catalog = file_hash in catalog and duplicate_of is None
+                    if duplicate_of is None:
+                        claimed[file_hash] = source
+                
+                if duplicate_of:
+                    return {
+                        "status": "duplicate",
+                        "duplicate_of": duplicate_of,
+                        "seconds": round(time.time() - start_time, 2)
+                    }, size
+                
+                if in_catalog:
+                    paper_id = self._existing_paper_id(file_hash)
+                    # The hash index is written at upload, so a paper whose embedding
+                    # failed is in the catalog without vectors: embed it instead
+                    if not embed or not paper_id or self._has_vectors(paper_id):
+                        return {
+                            "status": "duplicate",
+                            "paper_id": paper_id,
+                            "seconds": round(time.time() - start_time, 2)
+                        }, size
+                    logger.info(f"{source} was uploaded as {paper_id} but has no vectors, embedding it")
+                else:
+                    paper_id = self.paper_service.upload_and_process_stream(fileobj, self._filename(source)).paper_id
+            finally:
+                fileobj.close()
+            
+            if embed:
+                self.embed_limiter.acquire()
+                self.embed_store_service.embed_and_store_paper(paper_id)
+            
+            return {
+                "status": "done",
+                "paper_id": paper_id,
+                "seconds": round(time.time() - start_time, 2)
+            }, size
+        
+        except Exception as e:
+            logger.error(f"Failed to ingest {source}: {e}")
+            return {
+                "status": "failed",
+                "error": str(e),
+                "seconds": round(time.time() - start_time, 2)
+            }, size
+    
+    def _open_hashed(self, source: str, allow_local_files: bool = False) -> Tuple[BinaryIO, int, str]:
+        """
+        Open a source as a seekable file and hash it
+        
+        Remote sources are copied into a spooled temporary file while hashing,
+        so they are downloaded once and memory stays bounded. URLs must point
+        at public hosts; local paths are only opened when allowed.
+        
+        Raises:
+            UnsafeURLError: A URL (or redirect) is not a public http(s) URL
+            ValueError: A local path while local files are not allowed
+        
+        Returns:
+            (file object positioned at the start, size in bytes, SHA256 hex digest)
+        """
+        digest = hashlib.sha256()
+        size = 0
+        
+        if source.startswith("s3://") or source.startswith(("http://", "https://")):
+            if source.startswith("s3://"):
+                stream = self.s3_client.open_stream(source[len("s3://"):])
+            else:
+                stream = open_public_url(source, timeout=self.settings.bulk_download_timeout_seconds)
+            
+            fileobj = tempfile.SpooledTemporaryFile(max_size=self.settings.bulk_spool_max_mb * 1024 * 1024)
+            with stream:
+                while chunk := stream.read(COPY_BUFFER_BYTES):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    fileobj.write(chunk)
+        elif allow_local_files:
+            fileobj = open(source, "rb")
+            while chunk := fileobj.read(COPY_BUFFER_BYTES):
+                digest.update(chunk)
+                size += len(chunk)
+        else:
+            raise ValueError(f"Unsupported source (expected s3:// or an http(s) URL): {source}")
+        
+        fileobj.seek(0)
+        return fileobj, size, digest.hexdigest()
+    
+    def _existing_paper_id(self, file_hash: str) -> Optional[str]:
+        try:
+            hash_index_key = f"{self.settings.s3_hash_index_prefix}/{file_hash}.txt"
+            return self.s3_client.download_file(hash_index_key).decode('utf-8').split('|')[0]
+        except Exception:
+            return None
+    
+    def _has_vectors(self, paper_id: str) -> bool:
+        exists, _ = self.embed_store_service.vector_store_service.check_paper_exists(paper_id)
+        return exists
+    
+    @staticmethod
+    def _filename(source: str) -> str:
+        name = os.path.basename(source.split("?")[0].rstrip("/")) or "paper.pdf"
+        return name if name.lower().endswith(".pdf") else f"{name}.pdf"
+    
+    @staticmethod
+    def compute_stats(progress: dict) -> BulkIngestStats:
+        """Progress counts and throughput of a job"""
+        items = progress["items"].values()
+        counts = {status: 0 for status in ("pending", "done", "duplicate", "failed")}
+        for item in items:
+            counts[item["status"]] += 1
+        
+        done_seconds = [item["seconds"] for item in items if item["status"] == "done" and item.get("seconds")]
+        elapsed = progress.get("elapsed_seconds", 0.0)
+        finished = counts["done"] + counts["duplicate"]
+        
+        return BulkIngestStats(
+            total=len(progress["items"]),
+            done=counts["done"],
+            duplicates=counts["duplicate"],
+            failed=counts["failed"],
+            pending=counts["pending"],
+            bytes_processed=progress.get("bytes_processed", 0),
+            elapsed_seconds=elapsed,
+            papers_per_minute=round(finished / (elapsed / 60), 2) if elapsed else 0.0,
+            avg_item_seconds=round(sum(done_seconds) / len(done_seconds), 2) if done_seconds else 0.0
+        )
+    
+    def to_response(self, progress: dict, message: str) -> BulkIngestJobResponse:
+        return BulkIngestJobResponse(
+            job_id=progress["job_id"],
+            status=progress["status"],
+            stats=self.compute_stats(progress),
+            failures=[
+                BulkIngestItemStatus(source=source, **item)
+                for source, item in progress["items"].items()
+                if item["status"] == "failed"
+            ],
+            message=message
+        )
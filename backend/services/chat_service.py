@@ -5,18 +5,27 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from services.embedding_service import EmbeddingService
 from services.vector_store_service import VectorStoreService
+from services.paper_index_service import PaperIndexService
 from config import get_settings
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
 import boto3
 import os
+import time
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class PaperRoutingDisabledError(RuntimeError):
+    """Raised for routing-only operations when paper_routing_enabled is off"""
+
+
 class ChatService:
     
     def __init__(self):
         settings = get_settings()
+        self.settings = settings
         
         os.environ['AWS_ACCESS_KEY_ID'] = settings.access_key_id
         os.environ['AWS_SECRET_ACCESS_KEY'] = settings.secret_access_key
@@ -42,6 +51,7 @@ class ChatService:
         
         self.embedding_service = EmbeddingService()
         self.vector_store_service = VectorStoreService(self.embedding_service.get_embeddings())
+        self.paper_index_service = PaperIndexService() if settings.paper_routing_enabled else None
         
         self.prompt_template = """
 You are an expert research assistant analyzing academic papers. Your goal is to provide a thorough, accurate, and well-structured answer.
@@ -102,7 +112,9 @@ You are an expert research assistant analyzing academic papers. Your goal is to
         self, 
         paper_id: str, 
         question: str, 
-        top_k: int = 15
+        top_k: int = 15,
+        page_start: Optional[int] = None,
+        page_end: Optional[int] = None
     ) -> dict:
        
         try:
@@ -112,7 +124,7 @@ You are an expert research assistant analyzing academic papers. Your goal is to
                 search_type="similarity",
                 search_kwargs={
                     "k": top_k,
-                    "filter": {"paper_id": {"$eq": paper_id}}
+                    "filter": self._paper_filter(paper_id, page_start, page_end)
                 }
             )
             
@@ -144,17 +156,32 @@ You are an expert research assistant analyzing academic papers. Your goal is to
             logger.error(f"Error querying paper {paper_id}: {e}")
             raise
     
+    @staticmethod
+    def _paper_filter(paper_id: str, page_start: Optional[int] = None, page_end: Optional[int] = None) -> dict:
+        """Pinecone filter for a paper, optionally limited to chunks overlapping a page range"""
+        search_filter = {"paper_id": {"$eq": paper_id}}
+        # Chunks embedded without page metadata never match a page-limited filter
+        if page_start is not None:
+            search_filter["page_end"] = {"$gte": page_start}
+        if page_end is not None:
+            search_filter["page_start"] = {"$lte": page_end}
+        return search_filter
+    
     def query_all_papers(
         self, 
         question: str, 
-        top_k: int = 15
+        top_k: int = 15,
+        diversify: bool = True
     ) -> dict:
         """
-        Query across all papers (no paper_id filter)
+        Query across all papers
         
         Args:
             question: User's question
-            top_k: Number of relevant chunks to retrieve
+            top_k: Maximum number of relevant chunks to retrieve
+            diversify: Rank papers first, then retrieve diverse chunks from each
+                top-ranked paper in parallel. When False, a single unfiltered
+                similarity search is used.
             
         Returns:
             dict with 'query', 'result', and 'source_documents'
@@ -162,6 +189,26 @@ You are an expert research assistant analyzing academic papers. Your goal is to
         try:
             logger.info(f"Querying all papers with question: {question}")
             
+            if diversify:
+                documents = self._fanout_retrieve(question, top_k)
+                
+                logger.info("Executing RAG query across all papers")
+                answer = self._answer_from_documents(question, documents)
+                
+                logger.info("Successfully answered question across all papers")
+                
+                return {
+                    "query": question,
+                    "result": answer,
+                    "source_documents": [
+                        {
+                            "content": doc.page_content,
+                            "metadata": doc.metadata
+                        }
+                        for doc in documents
+                    ]
+                }
+            
             retriever = self.vector_store_service.vector_store.as_retriever(
                 search_type="similarity",
                 search_kwargs={"k": top_k}
@@ -194,3 +241,121 @@ You are an expert research assistant analyzing academic papers. Your goal is to
         except Exception as e:
             logger.error(f"Error querying all papers: {e}")
             raise
+    
+    def _fanout_retrieve(self, question: str, top_k: int) -> list:
+        """
+        Two-stage retrieval across papers
+        
+        The query is embedded once, papers are ranked through the routing
+        index (see _rank_papers), and each top-ranked paper is then
+        searched in parallel with MMR so a single long paper cannot take
+        every slot.
+        
+        Args:
+            question: User's question
+            top_k: Upper bound on the total number of chunks returned
+            
+        Returns:
+            List of LangChain Document objects ordered by paper rank
+        """
+        start_time = time.time()
+        query_embedding = self.embedding_service.get_embeddings().embed_query(question)
+        
+        paper_ids = self._rank_papers(query_embedding)
+        if not paper_ids:
+            logger.info("No candidate papers found for cross-paper query")
+            return []
+        
+        chunks_per_paper = max(1, min(self.settings.all_papers_chunks_per_paper, top_k // len(paper_ids)))
+        
+        with ThreadPoolExecutor(max_workers=min(len(paper_ids), self.settings.all_papers_max_workers)) as executor:
+            per_paper_results = list(executor.map(
+                lambda paper_id: self._retrieve_from_paper(paper_id, query_embedding, chunks_per_paper),
+                paper_ids
+            ))
+        
+        documents = [doc for docs in per_paper_results for doc in docs][:top_k]
+        
+        logger.info(
+            f"Fan-out retrieval returned {len(documents)} chunks from {len(paper_ids)} papers "
+            f"in {time.time() - start_time:.2f}s"
+        )
+        return documents
+    
+    def _rank_papers(self, query_embedding: List[float]) -> List[str]:
+        """
+        Select the papers to search for a query
+        
+        Papers are ranked by the routing index (two vectors per paper), so the
+        cost does not grow with the number of chunks. The coarse chunk
+        candidate pool is only scanned when routing is disabled or returns
+        fewer than `all_papers_max_papers` papers; it then adds papers that
+        have no routing vectors (embedded before routing existed, or whose
+        upsert failed). Both scores are cosine similarities to the same query
+        embedding.
+        """
+        max_papers = self.settings.all_papers_max_papers
+        if not self.paper_index_service:
+            paper_scores = self._chunk_pool_scores(query_embedding)
+            return sorted(paper_scores, key=paper_scores.get, reverse=True)[:max_papers]
+        
+        routed = self.paper_index_service.route(query_embedding, top_n=max_papers)
+        paper_scores = {paper["paper_id"]: paper["score"] for paper in routed}
+        if len(paper_scores) >= max_papers:
+            return list(paper_scores)[:max_papers]
+        
+        for paper_id, score in self._chunk_pool_scores(query_embedding).items():
+            if paper_id not in paper_scores and not self.paper_index_service.has_paper(paper_id):
+                paper_scores[paper_id] = score
+        
+        ranked = sorted(paper_scores, key=paper_scores.get, reverse=True)
+        return ranked[:max_papers]
+    
+    def _chunk_pool_scores(self, query_embedding: List[float]) -> dict:
+        """Best chunk score per paper in the coarse candidate pool"""
+        candidates = self.vector_store_service.vector_store.similarity_search_by_vector_with_score(
+            query_embedding,
+            k=self.settings.all_papers_candidate_pool
+        )
+        
+        paper_scores = {}
+        for doc, score in candidates:
+            paper_id = doc.metadata.get("paper_id")
+            if paper_id and score > paper_scores.get(paper_id, float("-inf")):
+                paper_scores[paper_id] = score
+        return paper_scores
+    
+    def _retrieve_from_paper(self, paper_id: str, query_embedding: List[float], k: int) -> list:
+        """Retrieve diverse chunks from a single paper using MMR"""
+        return self.vector_store_service.vector_store.max_marginal_relevance_search_by_vector(
+            query_embedding,
+            k=k,
+            fetch_k=max(k, self.settings.all_papers_mmr_fetch_k),
+            lambda_mult=self.settings.all_papers_mmr_lambda,
+            filter={"paper_id": {"$eq": paper_id}}
+        )
+    
+    def find_relevant_papers(self, question: str, top_n: int = 5) -> List[dict]:
+        """
+        Return the papers most relevant to a question from the routing index
+        
+        Args:
+            question: User's question
+            top_n: Number of papers to return
+            
+        Returns:
+            List of dicts with 'paper_id', 'title' and 'score', best first
+        """
+        if not self.paper_index_service:
+            raise PaperRoutingDisabledError("Paper routing is disabled")
+        
+        query_embedding = self.embedding_service.get_embeddings().embed_query(question)
+        papers = self.paper_index_service.route(query_embedding, top_n=top_n)
+        logger.info(f"Routed question to {len(papers)} papers")
+        return papers
+    
+    def _answer_from_documents(self, question: str, documents: list) -> str:
+        """Answer a question from already retrieved documents"""
+        context = "\n\n".join(doc.page_content for doc in documents)
+        answer_chain = self.prompt | self.llm | StrOutputParser()
+        return answer_chain.invoke({"context": context, "question": question})
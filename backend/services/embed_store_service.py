@@ -1,7 +1,11 @@
 import time
-from utils import S3Client, MarkdownChunker
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+from utils import S3Client, MarkdownChunker, PageIndex, RunningCentroid
 from services.embedding_service import EmbeddingService
-from services.vector_store_service import VectorStoreService
+from services.vector_store_service import VectorStoreService, TEXT_KEY
+from services.paper_index_service import PaperIndexService
 from schemas import EmbedStoreResponse
 from config import get_settings
 import logging
@@ -17,6 +21,7 @@ class EmbedStoreService:
         self.embedding_service = EmbeddingService()
         self.vector_store_service = VectorStoreService(self.embedding_service.get_embeddings())
         self.settings = get_settings()
+        self.paper_index_service = PaperIndexService() if self.settings.paper_routing_enabled else None
     
     def embed_and_store_paper(self, paper_id: str) -> EmbedStoreResponse:
        
@@ -27,6 +32,8 @@ class EmbedStoreService:
         
         if paper_exists:
             logger.info(f"Paper {paper_id} already embedded with {existing_vector_count} vectors")
+            if self.paper_index_service:
+                self._backfill_routing_vectors(paper_id)
             processing_time = time.time() - start_time
             
             return EmbedStoreResponse(
@@ -39,44 +46,139 @@ class EmbedStoreService:
         
         markdown_s3_key = f"{self.settings.s3_parsed_markdown_prefix}/{paper_id}/paper.md"
         
-        logger.info(f"Downloading markdown from S3: {markdown_s3_key}")
-        
         if not self.s3_client.file_exists(markdown_s3_key):
             raise Exception(f"Markdown file not found for paper_id: {paper_id}")
         
-        markdown_content = self.s3_client.download_file(markdown_s3_key).decode('utf-8')
-        
-        logger.info(f"Chunking markdown for paper {paper_id}")
-        chunks = self.chunker.chunk_markdown(
-            markdown_content=markdown_content,
+        logger.info(f"Streaming markdown from S3 for chunking: {markdown_s3_key}")
+        chunks = self.chunker.iter_chunks(
+            lines=self.s3_client.iter_lines(markdown_s3_key),
             paper_id=paper_id,
-            source=markdown_s3_key
+            source=markdown_s3_key,
+            page_index=self._load_page_index(paper_id)
         )
         
-        from langchain_core.documents import Document
-        documents = [
-            Document(
-                page_content=chunk.content,
-                metadata={
-                    "paper_id": chunk.metadata.paper_id,
-                    "chunk_index": chunk.metadata.chunk_index,
-                    "source": chunk.metadata.source
-                }
-            )
-            for chunk in chunks
-        ]
+        embeddings = self.embedding_service.get_embeddings()
+        running_centroid = RunningCentroid()
+        leading_text = []
+        leading_chars = 0
+        total_chunks = 0
+        stored_ids = []
+        
+        try:
+            # Embed and upsert one batch at a time so memory does not grow with the paper
+            for batch in self._batched(chunks, self.settings.embed_batch_size):
+                documents = [
+                    Document(
+                        page_content=chunk.content,
+                        # Pinecone rejects null metadata values, so unset fields are dropped
+                        metadata=chunk.metadata.model_dump(exclude_none=True)
+                    )
+                    for chunk in batch
+                ]
+                
+                vectors = embeddings.embed_documents([doc.page_content for doc in documents])
+                stored_ids.extend(
+                    self.vector_store_service.add_embedded_documents_batch(documents, vectors, batch_size=100)
+                )
+                
+                for vector in vectors:
+                    running_centroid.add(vector)
+                # Keep just enough leading text for the routing title/abstract
+                for doc in documents:
+                    if leading_chars >= self.settings.paper_routing_abstract_chars:
+                        break
+                    leading_text.append(doc.page_content)
+                    leading_chars += len(doc.page_content) + 2
+                
+                total_chunks += len(documents)
+                logger.info(f"Embedded {total_chunks} chunks for paper {paper_id}")
+        
+        except Exception:
+            # A partially stored paper would look already embedded on retry
+            if stored_ids:
+                logger.warning(f"Embedding failed for paper {paper_id}; removing {len(stored_ids)} stored vectors")
+                self.vector_store_service.delete_vectors(stored_ids)
+            raise
         
-        logger.info(f"Generating embeddings and storing in Pinecone for paper {paper_id}")
-        vector_ids = self.vector_store_service.add_documents_batch(documents, batch_size=100)
+        total_vectors = len(stored_ids)
+        
+        if self.paper_index_service and total_vectors:
+            self._store_routing_vectors(paper_id, "\n\n".join(leading_text), running_centroid.value())
         
         processing_time = time.time() - start_time
         
-        logger.info(f"Vectorized paper {paper_id}: {len(chunks)} chunks, {len(vector_ids)} vectors")
+        logger.info(f"Vectorized paper {paper_id}: {total_chunks} chunks, {total_vectors} vectors")
         
         return EmbedStoreResponse(
             paper_id=paper_id,
-            total_chunks=len(chunks),
-            total_vectors=len(vector_ids),
+            total_chunks=total_chunks,
+            total_vectors=total_vectors,
             processing_time_seconds=round(processing_time, 2),
             message="Paper embedded and stored successfully"
         )
+    
+    @staticmethod
+    def _batched(items: Iterable, batch_size: int) -> Iterator[list]:
+        iterator = iter(items)
+        while batch := list(islice(iterator, batch_size)):
+            yield batch
+    
+    def _load_page_index(self, paper_id: str) -> Optional[PageIndex]:
+        """Page offset table saved at ingest; papers processed before it existed have none"""
+        pages_s3_key = f"{self.settings.s3_parsed_markdown_prefix}/{paper_id}/pages.json"
+        if not self.s3_client.file_exists(pages_s3_key):
+            logger.info(f"No page index for paper {paper_id}; chunks will have no page numbers")
+            return None
+        return PageIndex.from_json(self.s3_client.download_file(pages_s3_key))
+    
+    def _backfill_routing_vectors(self, paper_id: str):
+        """Store routing vectors for an embedded paper that has none (embedded before routing, or a failed upsert)"""
+        try:
+            if self.paper_index_service.has_paper(paper_id):
+                return
+            
+            stored = self.vector_store_service.get_paper_vectors(paper_id)
+            if not stored:
+                return
+            
+            running_centroid = RunningCentroid()
+            leading_text = []
+            leading_chars = 0
+            for vector, metadata in stored:
+                running_centroid.add(vector)
+                if leading_chars < self.settings.paper_routing_abstract_chars:
+                    text = metadata.get(TEXT_KEY, "")
+                    leading_text.append(text)
+                    leading_chars += len(text) + 2
+            
+            logger.info(f"Backfilling routing vectors for paper {paper_id} from {len(stored)} stored chunks")
+        except Exception as e:
+            logger.warning(f"Failed to backfill routing vectors for paper {paper_id}: {e}")
+            return
+        
+        self._store_routing_vectors(paper_id, "\n\n".join(leading_text), running_centroid.value())
+    
+    def _store_routing_vectors(self, paper_id: str, leading_text: str, chunk_centroid: List[float]):
+        """Store paper-level routing vectors: title/abstract embedding and chunk centroid"""
+        try:
+            abstract_text = leading_text[:self.settings.paper_routing_abstract_chars]
+            abstract_vector = self.embedding_service.get_embeddings().embed_query(abstract_text)
+            
+            self.paper_index_service.upsert_paper(
+                paper_id=paper_id,
+                title=self._extract_title(leading_text),
+                abstract_vector=abstract_vector,
+                centroid_vector=chunk_centroid
+            )
+        except Exception as e:
+            # Routing vectors are an optimization; the chunk vectors are already stored
+            logger.warning(f"Failed to store routing vectors for paper {paper_id}: {e}")
+    
+    @staticmethod
+    def _extract_title(markdown_content: str) -> str:
+        """Use the first heading (or first non-empty line) as the paper title"""
+        lines = [line.strip() for line in markdown_content.splitlines() if line.strip()]
+        for line in lines:
+            if line.startswith("#"):
+                return line.lstrip("#").strip()[:200]
+        return lines[0][:200] if lines else ""
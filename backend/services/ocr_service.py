@@ -1,6 +1,9 @@
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
 from mistralai import Mistral
-from typing import Dict
+from typing import Dict, List, Optional
+from utils import PageIndex, RateLimiter
 from config import get_settings
 import logging
 
@@ -10,37 +13,92 @@ logger = logging.getLogger(__name__)
 class OCRService:
     """Service for processing PDFs using Mistral OCR"""
     
-    def __init__(self):
-        settings = get_settings()
-        self.client = Mistral(api_key=settings.mistral_api_key)
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None):
+        self.settings = get_settings()
+        self.client = Mistral(api_key=self.settings.mistral_api_key)
+        # Acquired before every OCR request, page ranges and retries included
+        self.rate_limiter = rate_limiter
     
-    def process_pdf_from_url(self, pdf_url: str) -> Dict:
+    def process_pdf_from_url(self, pdf_url: str, page_count: Optional[int] = None) -> Dict:
         """
         Process PDF from URL using Mistral OCR
         
+        PDFs with more than `ocr_page_range_size` pages are split into page
+        ranges that are processed concurrently, each with its own retries, and
+        stitched back together in page order.
+        
         Args:
             pdf_url: Public URL to PDF document
+            page_count: Number of pages in the PDF, when known
             
         Returns:
             Dictionary containing OCR response with pages and markdown
         """
-        try:
-            pdf_response = self.client.ocr.process(
-                model="mistral-ocr-latest",
-                document={
-                    "type": "document_url",
-                    "document_url": pdf_url
-                },
-                include_image_base64=False
+        range_size = self.settings.ocr_page_range_size
+        if not page_count or page_count <= range_size:
+            return self._process_pages(pdf_url)
+        
+        page_ranges = [
+            list(range(start, min(start + range_size, page_count)))
+            for start in range(0, page_count, range_size)
+        ]
+        logger.info(f"Processing {page_count} pages with Mistral OCR in {len(page_ranges)} ranges")
+        
+        with ThreadPoolExecutor(max_workers=self.settings.ocr_max_concurrency) as executor:
+            # map keeps range order and re-raises the first range that exhausted its retries
+            responses = list(executor.map(lambda pages: self._process_pages(pdf_url, pages), page_ranges))
+        
+        return self._merge_responses(responses)
+    
+    def _process_pages(self, pdf_url: str, pages: Optional[List[int]] = None) -> Dict:
+        """OCR the whole document or the given 0-based pages, retrying with exponential backoff"""
+        max_retries = self.settings.ocr_max_retries
+        label = f"pages {pages[0]}-{pages[-1]}" if pages else "all pages"
+        
+        for attempt in range(max_retries + 1):
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                pdf_response = self.client.ocr.process(
+                    model="mistral-ocr-latest",
+                    document={
+                        "type": "document_url",
+                        "document_url": pdf_url
+                    },
+                    include_image_base64=False,
+                    **({"pages": pages} if pages else {})
+                )
+                
+                response_dict = json.loads(pdf_response.model_dump_json())
+                logger.info(f"Successfully processed PDF ({label}) from URL: {pdf_url}")
+                return response_dict
+                
+            except Exception as e:
+                if attempt == max_retries:
+                    logger.error(f"Failed to process PDF ({label}) from URL: {e}")
+                    raise
+                
+                delay = self.settings.ocr_retry_backoff_seconds * (2 ** attempt)
+                logger.warning(f"OCR failed for {label} (attempt {attempt + 1}/{max_retries + 1}), retrying in {delay}s: {e}")
+                time.sleep(delay)
+    
+    @staticmethod
+    def _merge_responses(responses: List[Dict]) -> Dict:
+        """Stitch page-range OCR responses into a single response ordered by page index"""
+        pages = sorted(
+            (page for response in responses for page in response.get("pages", [])),
+            key=lambda page: page.get("index", 0)
+        )
+        
+        merged = dict(responses[0])
+        merged["pages"] = pages
+        merged["usage_info"] = {
+            **responses[0].get("usage_info", {}),
+            "pages_processed": sum(
+                (response.get("usage_info") or {}).get("pages_processed", 0) for response in responses
             )
-            
-            response_dict = json.loads(pdf_response.model_dump_json())
-            logger.info(f"Successfully processed PDF from URL: {pdf_url}")
-            return response_dict
-            
-        except Exception as e:
-            logger.error(f"Failed to process PDF from URL: {e}")
-            raise
+        }
+        return merged
     
     @staticmethod
     def extract_combined_markdown(ocr_response: Dict) -> str:
@@ -61,6 +119,30 @@ class OCRService:
         
         return "\n\n".join(combined_md)
     
+    @staticmethod
+    def build_page_index(ocr_response: Dict) -> PageIndex:
+        """
+        Build the page offset table for the markdown from extract_combined_markdown
+        
+        Args:
+            ocr_response: OCR response dictionary
+            
+        Returns:
+            PageIndex with the start offset and page number of each non-empty page
+        """
+        page_starts = []
+        page_numbers = []
+        offset = 0
+        for position, page in enumerate(ocr_response.get("pages", [])):
+            markdown_text = page.get("markdown", "")
+            if markdown_text:
+                page_starts.append(offset)
+                page_numbers.append(page.get("index", position) + 1)
+                # Pages are joined with "\n\n"
+                offset += len(markdown_text) + 2
+        
+        return PageIndex(page_starts, page_numbers)
+    
     @staticmethod
     def get_page_count(ocr_response: Dict) -> int:
         """Get total number of pages in OCR response"""
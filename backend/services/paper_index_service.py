@@ -0,0 +1,104 @@
+from pinecone import Pinecone, ServerlessSpec
+from config import get_settings
+from typing import List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PaperIndexService:
+    """Service for the paper-level routing index in Pinecone
+    
+    Each paper is represented by a handful of vectors (an embedding of its
+    title/abstract and the centroid of its chunk embeddings), so finding the
+    papers relevant to a query is a single query against a small index
+    instead of a scan over every chunk vector.
+    """
+    
+    def __init__(self):
+        settings = get_settings()
+        
+        self.pc = Pinecone(api_key=settings.pinecone_api_key)
+        self.index_name = settings.pinecone_paper_index_name
+        self._ensure_index_exists()
+        
+        self.index = self.pc.Index(self.index_name)
+    
+    def _ensure_index_exists(self):
+        """Create the paper routing index if it doesn't exist"""
+        settings = get_settings()
+        
+        if not self.pc.has_index(self.index_name):
+            logger.info(f"Creating Pinecone paper index: {self.index_name}")
+            self.pc.create_index(
+                name=self.index_name,
+                dimension=settings.embedding_dimension,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud="aws",
+                    region=settings.aws_default_region
+                )
+            )
+            logger.info(f"Pinecone paper index created: {self.index_name}")
+        else:
+            logger.info(f"Pinecone paper index already exists: {self.index_name}")
+    
+    def upsert_paper(
+        self,
+        paper_id: str,
+        title: str,
+        abstract_vector: List[float],
+        centroid_vector: List[float]
+    ):
+        """
+        Store the routing vectors for a paper
+        
+        Args:
+            paper_id: Paper identifier
+            title: Paper title (stored as metadata for display)
+            abstract_vector: Embedding of the title and abstract
+            centroid_vector: Normalized mean of the paper's chunk embeddings
+        """
+        metadata = {"paper_id": paper_id, "title": title}
+        self.index.upsert(vectors=[
+            (f"{paper_id}#abstract", abstract_vector, {**metadata, "kind": "abstract"}),
+            (f"{paper_id}#centroid", centroid_vector, {**metadata, "kind": "centroid"})
+        ])
+        logger.info(f"Stored routing vectors for paper {paper_id}")
+    
+    def has_paper(self, paper_id: str) -> bool:
+        """Whether both routing vectors of a paper are stored"""
+        response = self.index.fetch(ids=[f"{paper_id}#abstract", f"{paper_id}#centroid"])
+        return len(response.vectors) == 2
+    
+    def route(self, query_embedding: List[float], top_n: int = 5) -> List[dict]:
+        """
+        Find the papers most relevant to a query embedding
+        
+        Args:
+            query_embedding: Embedded query
+            top_n: Number of papers to return
+            
+        Returns:
+            List of dicts with 'paper_id', 'title' and 'score', best first
+        """
+        query_response = self.index.query(
+            vector=query_embedding,
+            top_k=top_n * 2,  # Up to two routing vectors per paper
+            include_metadata=True
+        )
+        
+        papers = {}
+        for match in query_response.matches:
+            paper_id = match.metadata.get("paper_id")
+            if not paper_id:
+                continue
+            if paper_id not in papers or match.score > papers[paper_id]["score"]:
+                papers[paper_id] = {
+                    "paper_id": paper_id,
+                    "title": match.metadata.get("title", ""),
+                    "score": match.score
+                }
+        
+        ranked = sorted(papers.values(), key=lambda paper: paper["score"], reverse=True)
+        return ranked[:top_n]
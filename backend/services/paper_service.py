@@ -1,7 +1,8 @@
+import io
 import uuid
 import time
-import hashlib
-from utils import S3Client
+from typing import BinaryIO, Optional
+from utils import S3Client, EmptyFileError, RateLimiter, count_pdf_pages, hash_file
 from services.ocr_service import OCRService
 from services.embedding_service import EmbeddingService
 from services.vector_store_service import VectorStoreService
@@ -15,18 +16,14 @@ logger = logging.getLogger(__name__)
 class PaperService:
     """Service for handling paper upload and processing"""
     
-    def __init__(self):
+    def __init__(self, ocr_limiter: Optional[RateLimiter] = None):
         self.s3_client = S3Client()
-        self.ocr_service = OCRService()
+        self.ocr_service = OCRService(rate_limiter=ocr_limiter)
         self.settings = get_settings()
         # Initialize vector store service for duplicate checking
         self.embedding_service = EmbeddingService()
         self.vector_store_service = VectorStoreService(self.embedding_service.get_embeddings())
     
-    def _compute_file_hash(self, file_content: bytes) -> str:
-        """Compute SHA256 hash of file content"""
-        return hashlib.sha256(file_content).hexdigest()
-    
     def _check_duplicate(self, file_hash: str) -> tuple[bool, str | None, str | None, int, bool]:
         """
         Check if paper with same hash already exists and is fully processed
@@ -89,14 +86,33 @@ class PaperService:
             file_content: PDF file bytes
             filename: Original filename
             
+        Returns:
+            PaperProcessResponse with processing results
+        """
+        return self.upload_and_process_stream(io.BytesIO(file_content), filename)
+    
+    def upload_and_process_stream(self, fileobj: BinaryIO, filename: str) -> PaperProcessResponse:
+        """
+        Hash a PDF, then stream it to S3 and process it with OCR
+        
+        The file is hashed in chunks and rewound before anything is uploaded,
+        so a duplicate is answered from the hash index without an upload, and
+        memory use does not depend on the file size.
+        
+        Args:
+            fileobj: Seekable binary file object positioned at the start of the PDF
+            filename: Original filename
+            
         Returns:
             PaperProcessResponse with processing results
         """
         start_time = time.time()
         
-        # Compute file hash for duplicate detection
-        file_hash = self._compute_file_hash(file_content)
-        logger.info(f"File hash: {file_hash}")
+        # Hash first, enforcing the size limit on the way
+        file_hash, size = hash_file(fileobj, self.settings.max_file_size_mb * 1024 * 1024)
+        if size == 0:
+            raise EmptyFileError()
+        logger.info(f"File hash: {file_hash} ({size} bytes)")
         
         # Check for duplicates with comprehensive validation
         is_duplicate, existing_paper_id, existing_markdown_s3_key, vector_count, is_embedded = self._check_duplicate(file_hash)
@@ -125,13 +141,9 @@ class PaperService:
         paper_id = str(uuid.uuid4())
         raw_pdf_s3_key = f"{self.settings.s3_raw_pdf_prefix}/{paper_id}/{filename}"
         
-        # Upload PDF to S3
-        logger.info(f"Uploading paper {paper_id} to S3: {raw_pdf_s3_key}")
-        self.s3_client.upload_file(
-            file_content=file_content,
-            s3_key=raw_pdf_s3_key,
-            content_type="application/pdf"
-        )
+        # Stream PDF to S3
+        logger.info(f"Streaming paper {paper_id} to S3: {raw_pdf_s3_key}")
+        self.s3_client.upload_stream(fileobj, raw_pdf_s3_key, content_type="application/pdf")
         
         # Generate presigned URL for OCR processing
         logger.info(f"Generating presigned URL for paper {paper_id}")
@@ -140,9 +152,12 @@ class PaperService:
         if not presigned_url:
             raise Exception("Failed to generate presigned URL for PDF")
         
+        # Page count lets OCR split large PDFs into concurrent page ranges
+        page_count = count_pdf_pages(fileobj)
+        
         # Process with Mistral OCR using URL
-        logger.info(f"Processing PDF with Mistral OCR for paper {paper_id}")
-        ocr_response = self.ocr_service.process_pdf_from_url(presigned_url)
+        logger.info(f"Processing PDF with Mistral OCR for paper {paper_id} ({page_count or 'unknown'} pages)")
+        ocr_response = self.ocr_service.process_pdf_from_url(presigned_url, page_count=page_count)
         
         # Extract combined markdown
         combined_markdown = self.ocr_service.extract_combined_markdown(ocr_response)
@@ -156,6 +171,14 @@ class PaperService:
             content_type="text/markdown"
         )
         
+        # Save page offset table so chunks can be mapped back to PDF pages
+        page_index = self.ocr_service.build_page_index(ocr_response)
+        self.s3_client.upload_file(
+            file_content=page_index.to_json(),
+            s3_key=f"{self.settings.s3_parsed_markdown_prefix}/{paper_id}/pages.json",
+            content_type="application/json"
+        )
+        
         # Save hash index for future duplicate detection
         self._save_hash_index(file_hash, paper_id, markdown_s3_key)
         
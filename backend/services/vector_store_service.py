@@ -1,11 +1,15 @@
 from pinecone import Pinecone, ServerlessSpec
 from langchain_pinecone.vectorstores import PineconeVectorStore
 from config import get_settings
-from typing import Tuple
+from typing import List, Tuple
+import uuid
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Metadata key holding chunk text, shared with PineconeVectorStore
+TEXT_KEY = "text"
+
 
 class VectorStoreService:
     """Service for managing Pinecone vector store"""
@@ -24,7 +28,8 @@ class VectorStoreService:
         # Initialize vector store
         self.vector_store = PineconeVectorStore(
             index=self.index,
-            embedding=embeddings
+            embedding=embeddings,
+            text_key=TEXT_KEY
         )
     
     def _ensure_index_exists(self):
@@ -114,6 +119,29 @@ class VectorStoreService:
             logger.error(f"Error counting vectors for paper {paper_id}: {e}")
             return 0
     
+    def get_paper_vectors(self, paper_id: str, max_count: int = 10000) -> List[Tuple[List[float], dict]]:
+        """
+        Fetch the stored chunk vectors of a paper
+        
+        Args:
+            paper_id: Paper identifier
+            max_count: Maximum vectors to fetch (Pinecone caps top_k at 10000)
+            
+        Returns:
+            (vector, metadata) pairs ordered by chunk_index
+        """
+        query_response = self.index.query(
+            vector=[0.0] * 1024,  # Dummy vector for metadata-only query
+            filter={"paper_id": {"$eq": paper_id}},
+            top_k=max_count,
+            include_values=True,
+            include_metadata=True
+        )
+        
+        vectors = [(list(match.values), dict(match.metadata or {})) for match in query_response.matches]
+        vectors.sort(key=lambda item: item[1].get("chunk_index", 0))
+        return vectors
+    
     def add_documents(self, documents):
         """
         Add documents to Pinecone vector store
@@ -151,3 +179,42 @@ class VectorStoreService:
         
         logger.info(f"Successfully added {len(all_ids)} documents to Pinecone")
         return all_ids
+    
+    def add_embedded_documents_batch(self, documents, vectors: List[List[float]], batch_size: int = 100):
+        """
+        Upsert documents whose embeddings were already computed
+        
+        Args:
+            documents: List of LangChain Document objects
+            vectors: Embedding for each document, in the same order
+            batch_size: Number of vectors per upsert request
+            
+        Returns:
+            List of all document IDs
+        """
+        logger.info(f"Upserting {len(documents)} pre-embedded documents to Pinecone in batches of {batch_size}")
+        all_ids = []
+        
+        for i in range(0, len(documents), batch_size):
+            batch = [
+                (str(uuid.uuid4()), vector, {**doc.metadata, TEXT_KEY: doc.page_content})
+                for doc, vector in zip(documents[i:i + batch_size], vectors[i:i + batch_size])
+            ]
+            self.index.upsert(vectors=batch)
+            all_ids.extend(vector_id for vector_id, _, _ in batch)
+            logger.info(f"Processed batch {i//batch_size + 1}: {len(batch)} vectors")
+        
+        logger.info(f"Successfully added {len(all_ids)} documents to Pinecone")
+        return all_ids
+    
+    def delete_vectors(self, vector_ids: List[str], batch_size: int = 1000):
+        """
+        Delete vectors by ID
+        
+        Args:
+            vector_ids: IDs returned by the add methods
+            batch_size: Number of IDs per delete request
+        """
+        for i in range(0, len(vector_ids), batch_size):
+            self.index.delete(ids=vector_ids[i:i + batch_size])
+        logger.info(f"Deleted {len(vector_ids)} vectors from Pinecone")
@@ -0,0 +1,66 @@
+import tests.fakes  # noqa: F401  (dummy settings before any application import)
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import services.ai_analysis_service as ai_analysis_service
+from config import get_settings
+from routes import cache_policies
+from utils import HTTPCacheMiddleware
+from tests.fakes import FakeS3Client, FakePromptCachingLLM
+
+
+@pytest.fixture
+def papers():
+    """Parsed markdown by paper id in the fake bucket; test modules override this"""
+    return {}
+
+
+@pytest.fixture
+def respond():
+    """Reply of the fake LLM to a message list; test modules override this"""
+    return lambda messages: ""
+
+
+@pytest.fixture
+def s3_client(papers):
+    prefix = get_settings().s3_parsed_markdown_prefix
+    return FakeS3Client({
+        f"{prefix}/{paper_id}/paper.md": markdown.encode("utf-8") for paper_id, markdown in papers.items()
+    })
+
+
+@pytest.fixture
+def llm(respond):
+    return FakePromptCachingLLM(respond)
+
+
+@pytest.fixture
+def fake_analysis_backends(monkeypatch, s3_client, llm):
+    """Points AIAnalysisService at the fake bucket and LLM"""
+    
+    class FakeLLMService:
+        def get_llm(self):
+            return llm
+    
+    monkeypatch.setattr(ai_analysis_service, "S3Client", lambda: s3_client)
+    monkeypatch.setattr(ai_analysis_service, "LLMService", FakeLLMService)
+
+
+@pytest.fixture
+def analysis_service(fake_analysis_backends):
+    return ai_analysis_service.AIAnalysisService()
+
+
+@pytest.fixture
+def analysis_client(fake_analysis_backends, monkeypatch):
+    """Client for the real AI analysis router behind the app's HTTP cache middleware"""
+    # The router module builds its controller on import, so it is imported once the fakes are in place
+    from routes import ai_analysis_routes
+    from controllers.ai_analysis_controller import AIAnalysisController
+    
+    monkeypatch.setattr(ai_analysis_routes, "controller", AIAnalysisController())
+    
+    app = FastAPI()
+    app.add_middleware(HTTPCacheMiddleware, policies=cache_policies(get_settings()))
+    app.include_router(ai_analysis_routes.router)
+    return TestClient(app)
@@ -0,0 +1,216 @@
+"""
+In-memory doubles for the external services (S3, Bedrock, Mistral OCR), so tests and
+benchmarks run offline. Importing this module fills in the required settings
+with dummy values unless they are already set, and disables research checkpoints.
+"""
+import io
+import os
+import json
+import hashlib
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.runnables import Runnable
+
+for _name in ("MISTRAL_API_KEY", "ACCESS_KEY_ID", "SECRET_ACCESS_KEY", "PINECONE_API_KEY", "TAVILY_API_KEY", "PERPLEXITY_API_KEY", "BEDROCK_CHAT_MODEL"):
+    os.environ.setdefault(_name, "test")
+# Research runs in tests keep no checkpoint database
+os.environ.setdefault("RESEARCH_CHECKPOINTS_ENABLED", "false")
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return max(len(text) // CHARS_PER_TOKEN, 1) if text else 0
+
+
+class FakeS3Client:
+    """Dict-backed stand-in for utils.S3Client"""
+    
+    def __init__(self, objects: Optional[Dict[str, bytes]] = None):
+        self.objects: Dict[str, bytes] = dict(objects or {})
+        self._lock = threading.Lock()
+    
+    def upload_file(self, file_content: bytes, s3_key: str, content_type: str = "application/pdf") -> bool:
+        with self._lock:
+            self.objects[s3_key] = bytes(file_content)
+        return True
+    
+    def upload_stream(self, fileobj, s3_key: str, content_type: str = "application/pdf") -> bool:
+        return self.upload_file(fileobj.read(), s3_key, content_type)
+    
+    def download_file(self, s3_key: str) -> bytes:
+        with self._lock:
+            if s3_key not in self.objects:
+                raise KeyError(s3_key)
+            return self.objects[s3_key]
+    
+    def open_stream(self, s3_key: str):
+        return io.BytesIO(self.download_file(s3_key))
+    
+    def list_keys(self, prefix: str) -> Iterator[str]:
+        with self._lock:
+            keys = sorted(key for key in self.objects if key.startswith(prefix))
+        yield from keys
+    
+    def iter_lines(self, s3_key: str, encoding: str = "utf-8") -> Iterator[str]:
+        for line in io.BytesIO(self.download_file(s3_key)):
+            yield line.decode(encoding)
+    
+    def get_presigned_url(self, s3_key: str, expiration: int = 3600) -> Optional[str]:
+        return f"https://s3.test/{s3_key}"
+    
+    def file_exists(self, s3_key: str) -> bool:
+        with self._lock:
+            return s3_key in self.objects
+    
+    def delete_file(self, s3_key: str) -> bool:
+        with self._lock:
+            self.objects.pop(s3_key, None)
+        return True
+
+
+def _blocks(message: BaseMessage) -> List:
+    return [message.content] if isinstance(message.content, str) else list(message.content)
+
+
+class FakePromptCachingLLM(Runnable):
+    """
+    Chat model double that models Bedrock prompt caching
+    
+    Everything before a `cachePoint` content block is the cacheable prefix.
+    The first request with a prefix writes it to the cache, and requests
+    started after that write has completed read it; a concurrent request
+    that starts earlier misses, as on Bedrock. Token counts are estimated
+    from characters and reported like ChatBedrockConverse: `input_tokens`
+    only counts uncached input, cached input is in `input_token_details`.
+    
+    Args:
+        respond: Returns the response text for the request messages
+        seconds_per_1k_input_tokens: Simulated prefill latency of uncached input
+    """
+    
+    def __init__(self, respond: Callable[[List[BaseMessage]], str], seconds_per_1k_input_tokens: float = 0.0):
+        self.respond = respond
+        self.seconds_per_1k_input_tokens = seconds_per_1k_input_tokens
+        self.calls: List[dict] = []
+        self._cache = set()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _split_prefix(messages: List[BaseMessage]):
+        prefix, rest, cached = [], [], False
+        for message in messages:
+            for block in _blocks(message):
+                if isinstance(block, dict) and "cachePoint" in block:
+                    prefix, rest, cached = prefix + rest, [], True
+                    continue
+                rest.append(block["text"] if isinstance(block, dict) else block)
+        return ("".join(prefix) if cached else None), "".join(rest)
+    
+    def invoke(self, messages, config=None, **kwargs) -> AIMessage:
+        if hasattr(messages, "to_messages"):
+            # Prompt template output
+            messages = messages.to_messages()
+        prefix, rest = self._split_prefix(messages)
+        prefix_key = hashlib.sha256(prefix.encode("utf-8")).hexdigest() if prefix is not None else None
+        with self._lock:
+            hit = prefix_key in self._cache
+        
+        prefix_tokens = estimate_tokens(prefix or "")
+        cache_read = prefix_tokens if hit else 0
+        cache_write = prefix_tokens if prefix is not None and not hit else 0
+        input_tokens = estimate_tokens(rest) + (0 if prefix is not None else prefix_tokens)
+        
+        time.sleep((input_tokens + cache_write) / 1000 * self.seconds_per_1k_input_tokens)
+        content = self.respond(messages)
+        if kwargs.get("max_tokens"):
+            content = content[:kwargs["max_tokens"] * CHARS_PER_TOKEN]
+        output_tokens = estimate_tokens(content)
+        
+        with self._lock:
+            if prefix_key:
+                self._cache.add(prefix_key)
+            self.calls.append({"cache_read": cache_read, "cache_write": cache_write, "input_tokens": input_tokens})
+        
+        return AIMessage(content=content, usage_metadata={
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + cache_read + cache_write + output_tokens,
+            "input_token_details": {"cache_read": cache_read, "cache_creation": cache_write}
+        })
+
+
+class FakeOCRError(RuntimeError):
+    """Transient OCR failure raised by FakeMistralOCR"""
+
+
+class _FakeOCRResponse:
+    def __init__(self, payload: dict):
+        self.payload = payload
+    
+    def model_dump_json(self) -> str:
+        return json.dumps(self.payload)
+
+
+class FakeMistralOCR:
+    """
+    Stand-in for the Mistral client's OCR endpoint (`client.ocr.process`)
+    
+    Serves a synthetic PDF of `page_count` pages. Each request sleeps for a
+    fixed overhead plus a per-page time, and requests can be made to fail
+    transiently after doing their work, like a timeout would.
+    
+    Args:
+        page_count: Number of pages in the document
+        seconds_per_request: Simulated fixed latency of a request
+        seconds_per_page: Simulated latency per requested page
+        failures: First page of a request (0 for the whole document) -> number of attempts that fail
+    """
+    
+    def __init__(self, page_count: int, seconds_per_request: float = 0.0, seconds_per_page: float = 0.0, failures: Optional[Dict[int, int]] = None):
+        self.page_count = page_count
+        self.seconds_per_request = seconds_per_request
+        self.seconds_per_page = seconds_per_page
+        self.failures = dict(failures or {})
+        self.requests: List[Optional[List[int]]] = []
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def ocr(self):
+        return self
+    
+    @staticmethod
+    def page_markdown(index: int) -> str:
+        return f"## Page {index + 1}\n\nText of page {index + 1}."
+    
+    def process(self, model: str, document: dict, include_image_base64: bool = False, pages: Optional[List[int]] = None, **kwargs) -> _FakeOCRResponse:
+        indices = list(pages) if pages is not None else list(range(self.page_count))
+        first_page = indices[0] if indices else 0
+        with self._lock:
+            self.requests.append(list(pages) if pages is not None else None)
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            fail = self.failures.get(first_page, 0) > 0
+            if fail:
+                self.failures[first_page] -= 1
+        
+        try:
+            time.sleep(self.seconds_per_request + self.seconds_per_page * len(indices))
+            if fail:
+                raise FakeOCRError(f"OCR request starting at page {first_page} failed")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        
+        return _FakeOCRResponse({
+            "model": model,
+            "pages": [
+                {"index": index, "markdown": self.page_markdown(index), "images": [], "dimensions": None}
+                for index in indices
+            ],
+            "usage_info": {"pages_processed": len(indices), "doc_size_bytes": None}
+        })
@@ -0,0 +1,60 @@
+import itertools
+import json
+import pytest
+import services.ai_analysis_service as ai_analysis_service
+
+PAPER_ID = "6f1c2b1e-8c47-4d1e-9a51-0d5b7e3f2a10"
+
+
+@pytest.fixture
+def papers():
+    return {PAPER_ID: "# Paper\n\nBody.\n"}
+
+
+@pytest.fixture
+def respond():
+    generation = itertools.count(1)
+    
+    def reply(messages) -> str:
+        task = messages[-1].content
+        if task == "Reply with OK.":
+            return "OK"
+        if "markmap" in task.lower():
+            # Every generation produces different content
+            return f"# Paper\\n## Generation {next(generation)}"
+        if "questions" in task:
+            return json.dumps({"questions": []})
+        return json.dumps({field: "text" for field in ai_analysis_service.ResearchPaperSummary.model_fields})
+    
+    return reply
+
+
+@pytest.fixture
+def client(analysis_client):
+    return analysis_client
+
+
+@pytest.mark.parametrize("path", ["mindmap/markdown", "analysis"])
+def test_refresh_changes_etag(client, path):
+    url = f"/api/papers/{PAPER_ID}/{path}"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    
+    refreshed = client.get(f"{url}?refresh=true")
+    assert refreshed.status_code == 200
+    assert refreshed.headers["Cache-Control"] == "no-store"
+    assert refreshed.headers["ETag"] != etag
+    
+    # The old validator no longer matches; the regenerated artifact is served with the new one
+    revalidated = client.get(url, headers={"If-None-Match": etag})
+    assert revalidated.status_code == 200
+    assert revalidated.headers["ETag"] == refreshed.headers["ETag"]
+    assert client.get(url, headers={"If-None-Match": refreshed.headers["ETag"]}).status_code == 304
+
+
+def test_etag_of_unchanged_artifact_is_stable(client):
+    url = f"/api/papers/{PAPER_ID}/mindmap/markdown"
+    
+    assert client.get(url).headers["ETag"] == client.get(url).headers["ETag"]
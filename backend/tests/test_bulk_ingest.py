@@ -0,0 +1,174 @@
+import hashlib
+import pytest
+from pydantic import ValidationError
+import services.bulk_ingest_service as bulk_ingest_service
+from services.bulk_ingest_service import BulkIngestService, LocalProgressStore
+from schemas.paper import PaperProcessResponse
+from schemas.bulk import BulkIngestItem
+from utils import RateLimiter, UnsafeURLError
+from config import Settings, get_settings
+from tests.fakes import FakeS3Client
+
+PDF_BYTES = b"%PDF-1.4 synthetic paper"
+
+
+class FakePaperService:
+    """Uploads by writing the hash index entry, as PaperService does before embedding"""
+    
+    def __init__(self, s3_client: FakeS3Client):
+        self.s3_client = s3_client
+        self.uploads = []
+    
+    def upload_and_process_stream(self, fileobj, filename: str) -> PaperProcessResponse:
+        file_hash = hashlib.sha256(fileobj.read()).hexdigest()
+        paper_id = f"paper-{len(self.uploads) + 1}"
+        self.uploads.append(filename)
+        self.s3_client.upload_file(
+            f"{paper_id}|parsed/{paper_id}/paper.md".encode("utf-8"),
+            f"{get_settings().s3_hash_index_prefix}/{file_hash}.txt"
+        )
+        return PaperProcessResponse(
+            paper_id=paper_id,
+            markdown_s3_key=f"parsed/{paper_id}/paper.md",
+            total_pages=1,
+            processing_time_seconds=0.0,
+            message="Processed"
+        )
+
+
+class NoRateLimit:
+    def acquire(self):
+        pass
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self.papers = set()
+    
+    def check_paper_exists(self, paper_id: str):
+        return paper_id in self.papers, int(paper_id in self.papers)
+
+
+class FakeEmbedStoreService:
+    def __init__(self, failures: int = 0):
+        self.vector_store_service = FakeVectorStore()
+        self.failures = failures
+        self.calls = []
+    
+    def embed_and_store_paper(self, paper_id: str):
+        self.calls.append(paper_id)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("Bedrock throttled the embedding request")
+        self.vector_store_service.papers.add(paper_id)
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    def make(embed_store: FakeEmbedStoreService):
+        s3_client = FakeS3Client()
+        paper_service = FakePaperService(s3_client)
+        monkeypatch.setattr(bulk_ingest_service, "S3Client", lambda: s3_client)
+        monkeypatch.setattr(bulk_ingest_service, "PaperService", lambda ocr_limiter=None: paper_service)
+        monkeypatch.setattr(bulk_ingest_service, "EmbedStoreService", lambda: embed_store)
+        service = BulkIngestService()
+        service.embed_limiter = NoRateLimit()
+        return service, paper_service
+    return make
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "paper.pdf"
+    path.write_bytes(PDF_BYTES)
+    return str(path)
+
+
+def run(service: BulkIngestService, store: LocalProgressStore, sources, embed: bool = True) -> dict:
+    service.create_job("job-1", sources, embed=embed, store=store)
+    return service.run_job("job-1", store, allow_local_files=True)
+
+
+def test_retry_embeds_a_paper_whose_embedding_failed(make_service, pdf_path, tmp_path):
+    embed_store = FakeEmbedStoreService(failures=1)
+    service, paper_service = make_service(embed_store)
+    store = LocalProgressStore(str(tmp_path / "job.json"))
+    
+    first = run(service, store, [pdf_path])
+    assert first["items"][pdf_path]["status"] == "failed"
+    
+    second = run(service, store, [pdf_path])
+    
+    item = second["items"][pdf_path]
+    assert item["status"] == "done"
+    assert item["paper_id"] == "paper-1"
+    # Re-embedded from the existing upload, not uploaded and OCR'd again
+    assert len(paper_service.uploads) == 1
+    assert embed_store.calls == ["paper-1", "paper-1"]
+    assert embed_store.vector_store_service.papers == {"paper-1"}
+
+
+def test_embedded_catalog_paper_is_a_duplicate(make_service, pdf_path, tmp_path):
+    embed_store = FakeEmbedStoreService()
+    service, paper_service = make_service(embed_store)
+    run(service, LocalProgressStore(str(tmp_path / "first.json")), [pdf_path])
+    
+    progress = run(service, LocalProgressStore(str(tmp_path / "second.json")), [pdf_path])
+    
+    assert progress["items"][pdf_path] == {
+        "status": "duplicate",
+        "paper_id": "paper-1",
+        "seconds": progress["items"][pdf_path]["seconds"]
+    }
+    assert embed_store.calls == ["paper-1"]
+    assert len(paper_service.uploads) == 1
+
+
+def test_catalog_paper_without_vectors_is_a_duplicate_when_not_embedding(make_service, pdf_path, tmp_path):
+    embed_store = FakeEmbedStoreService()
+    service, paper_service = make_service(embed_store)
+    run(service, LocalProgressStore(str(tmp_path / "first.json")), [pdf_path], embed=False)
+    
+    progress = run(service, LocalProgressStore(str(tmp_path / "second.json")), [pdf_path], embed=False)
+    
+    assert progress["items"][pdf_path]["status"] == "duplicate"
+    assert embed_store.calls == []
+
+
+@pytest.mark.parametrize("url", ["/etc/passwd", "file:///etc/passwd", "ftp://example.com/paper.pdf"])
+def test_api_items_only_accept_http_urls(url):
+    with pytest.raises(ValidationError):
+        BulkIngestItem(url=url)
+
+
+def test_api_jobs_never_open_local_paths(make_service, pdf_path, tmp_path):
+    service, paper_service = make_service(FakeEmbedStoreService())
+    store = LocalProgressStore(str(tmp_path / "job.json"))
+    service.create_job("job-1", [pdf_path], embed=True, store=store)
+    
+    progress = service.run_job("job-1", store)
+    
+    assert progress["items"][pdf_path]["status"] == "failed"
+    assert "Unsupported source" in progress["items"][pdf_path]["error"]
+    assert paper_service.uploads == []
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/paper.pdf",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://10.0.0.5/paper.pdf",
+    "http://[::1]/paper.pdf"
+])
+def test_urls_on_internal_hosts_are_refused(make_service, url):
+    service, _ = make_service(FakeEmbedStoreService())
+    
+    with pytest.raises(UnsafeURLError):
+        service._open_hashed(url)
+
+
+@pytest.mark.parametrize("field", ["bulk_ocr_requests_per_minute", "bulk_embed_requests_per_minute"])
+def test_rate_limits_must_be_positive(field):
+    with pytest.raises(ValidationError):
+        Settings(**{field: 0})
+    with pytest.raises(ValueError):
+        RateLimiter(0)
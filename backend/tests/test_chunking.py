@@ -0,0 +1,86 @@
+import pytest
+from utils.chunking import MarkdownChunker
+from config import get_settings
+
+FILLER = "The model is trained on a large corpus and evaluated on held-out data. "
+
+
+def section(title: str, paragraphs: int = 6) -> str:
+    return f"## {title}\n\n" + "".join(FILLER * 8 + "\n\n" for _ in range(paragraphs))
+
+
+def chunk(markdown: str):
+    return MarkdownChunker().chunk_markdown(markdown, paper_id="paper-1")
+
+
+def test_inline_equation_with_trailing_text_does_not_swallow_the_document():
+    markdown = (
+        "# Paper\n\n"
+        "$$\\alpha$$ is the learning rate used below.\n\n"
+        + "".join(section(f"Section {i}") for i in range(1, 30))
+    )
+    chunker = MarkdownChunker()
+    
+    chunks = chunk(markdown)
+    
+    assert len(chunks) > 20
+    assert max(len(c.content) for c in chunks) <= chunker.chunk_size
+    assert chunks[0].content.startswith("# Paper\n\n$$\\alpha$$ is the learning rate used below.")
+    assert chunks[-1].metadata.section_path == "Paper > Section 29"
+
+
+def test_display_equation_is_kept_whole():
+    equation = "$$\n\\mathcal{L} = \\sum_i \\log p(x_i)\n$$"
+    markdown = "# Paper\n\n" + section("Method", 1) + equation + "\n\n" + section("Results", 1)
+    
+    chunks = chunk(markdown)
+    
+    assert sum(equation in c.content for c in chunks) == 1
+    assert sum("$$" in c.content for c in chunks) == 1
+
+
+def test_single_line_equation_is_its_own_block():
+    blocks = list(MarkdownChunker._iter_blocks(["Text before.\n", "$$E = mc^2$$\n", "Text after.\n"]))
+    
+    assert [block.kind for block in blocks] == ["paragraph", "equation", "paragraph"]
+
+
+def test_unclosed_equation_ends_at_next_heading():
+    markdown = "# Paper\n\n## Method\n\n$$\nx = y\n\n" + section("Results")
+    
+    blocks = list(MarkdownChunker._iter_blocks(markdown.splitlines(keepends=True)))
+    
+    assert [block.kind for block in blocks[:4]] == ["heading", "heading", "equation", "heading"]
+    assert blocks[3].text == "## Results"
+
+
+def test_oversized_atomic_blocks_are_capped_at_chunk_size():
+    chunker = MarkdownChunker()
+    code = "```\n" + "".join(f"value_{i} = compute({i})\n" for i in range(400)) + "```"
+    table = "| a | b |\n|---|---|\n" + "".join(f"| {i} | {i * i} |\n" for i in range(400))
+    
+    chunks = chunk("# Paper\n\n" + code + "\n\n" + table)
+    
+    assert max(len(c.content) for c in chunks) <= chunker.chunk_size
+    assert any("value_399 = compute(399)" in c.content for c in chunks)
+    assert any("| 399 | 159201 |" in c.content for c in chunks)
+
+
+def test_chunk_spans_follow_document_order():
+    markdown = "# Paper\n\n" + "".join(section(f"Section {i}") for i in range(1, 6))
+    
+    spans = list(MarkdownChunker()._chunk_structural(markdown.splitlines(keepends=True)))
+    
+    starts = [start for _, _, start, _ in spans]
+    assert starts == sorted(starts)
+    assert all(start < end <= len(markdown) for _, _, start, end in spans)
+
+
+@pytest.mark.parametrize("chunk_overlap", [1500, 2000, -1])
+def test_overlap_must_be_smaller_than_chunk_size(monkeypatch, chunk_overlap):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "chunk_size", 1500)
+    monkeypatch.setattr(settings, "chunk_overlap", chunk_overlap)
+    
+    with pytest.raises(ValueError, match="chunk_overlap"):
+        MarkdownChunker()
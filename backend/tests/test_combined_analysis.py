@@ -0,0 +1,117 @@
+import json
+import pytest
+
+PAPER_ID = "paper-1"
+PAPER_MARKDOWN = "# A Study of Caching\n\n" + "The paper body discusses prompt caching in depth. " * 400
+
+SUMMARY = {field: f"{field} text" for field in (
+    "summary", "background", "problem", "methods", "experiments",
+    "results", "limitations", "implications", "future_work"
+)}
+QUIZ = {"questions": [
+    {
+        "id": 1,
+        "question": "What is cached?",
+        "options": {"A": "The prefix", "B": "The answer", "C": "Nothing", "D": "Everything"},
+        "correct_answer": "A",
+        "explanation": "The shared paper prefix is cached."
+    }
+]}
+MINDMAP = "# Caching\n## Prefix\n## Tasks"
+
+
+def reply(messages) -> str:
+    task = messages[-1].content
+    if task == "Reply with OK.":
+        return "OK"
+    if "mind map" in task.lower() or "markmap" in task.lower():
+        return MINDMAP
+    if "questions" in task:
+        return json.dumps(QUIZ)
+    return json.dumps(SUMMARY)
+
+
+@pytest.fixture
+def papers():
+    return {PAPER_ID: PAPER_MARKDOWN}
+
+
+@pytest.fixture
+def respond():
+    return reply
+
+
+@pytest.fixture
+def service(analysis_service):
+    return analysis_service
+
+
+def test_generate_all_reads_paper_prefix_from_prompt_cache(service):
+    result = service.generate_all(PAPER_ID, num_questions=1)
+    
+    usage = {entry["artifact"]: entry for entry in result["usage"]}
+    prefix_tokens = usage["cache_warm_up"]["cache_write_input_tokens"]
+    assert prefix_tokens > 0
+    assert usage["cache_warm_up"]["cache_read_input_tokens"] == 0
+    
+    for artifact in ("summary", "quiz", "mindmap"):
+        assert usage[artifact]["cache_read_input_tokens"] == prefix_tokens
+        assert usage[artifact]["cache_write_input_tokens"] == 0
+        # Only the task instructions are paid at the full input rate
+        assert usage[artifact]["input_tokens"] < prefix_tokens
+    
+    assert result["cache_read_input_tokens"] == 3 * prefix_tokens
+    assert result["summary"] == SUMMARY
+    assert result["questions"] == QUIZ["questions"]
+    assert result["mindmap_markdown"] == MINDMAP
+    assert len(service.llm.calls) == 4
+
+
+def test_generate_all_fills_single_artifact_cache(service):
+    service.generate_all(PAPER_ID, num_questions=1)
+    calls = len(service.llm.calls)
+    
+    assert service.generate_summary(PAPER_ID, mode="single_pass")["cached"] is True
+    assert service.generate_quiz(PAPER_ID, num_questions=1)["cached"] is True
+    assert service.generate_mindmap(PAPER_ID)["cached"] is True
+    assert len(service.llm.calls) == calls
+
+
+def test_generate_all_skips_warm_up_for_a_single_missing_artifact(service):
+    service.generate_all(PAPER_ID, num_questions=1)
+    service.llm.calls.clear()
+    
+    result = service.generate_all(PAPER_ID, num_questions=2)
+    
+    generated = [entry["artifact"] for entry in result["usage"] if not entry["cached"]]
+    assert generated == ["quiz"]
+    # The prefix written by the first job is still cached
+    assert service.llm.calls[0]["cache_read"] > 0
+    assert len(service.llm.calls) == 1
+
+
+@pytest.mark.parametrize("generate", [
+    lambda service: service.generate_summary(PAPER_ID, mode="single_pass"),
+    lambda service: service.generate_quiz(PAPER_ID, num_questions=1),
+    lambda service: service.generate_mindmap(PAPER_ID)
+])
+def test_leader_rereads_the_cache_before_generating(service, monkeypatch, generate):
+    service.generate_all(PAPER_ID, num_questions=1)
+    calls = len(service.llm.calls)
+    # A request that missed the cache just before the previous leader stored its result
+    monkeypatch.setattr(service, "_load_cached", lambda cache_key, refresh: None)
+    
+    result = generate(service)
+    
+    assert result["cached"] is True
+    assert len(service.llm.calls) == calls
+
+
+def test_refresh_leader_regenerates(service):
+    service.generate_mindmap(PAPER_ID)
+    calls = len(service.llm.calls)
+    
+    result = service.generate_mindmap(PAPER_ID, refresh=True)
+    
+    assert result["cached"] is False
+    assert len(service.llm.calls) == calls + 1
@@ -0,0 +1,27 @@
+import pytest
+from langchain_core.messages import AIMessage
+import agent.nodes as nodes
+from agent.graph import ResearchAgent
+from schemas.state import AgentConfig
+
+REPORT = "# Prompt Caching\n\n## Executive Summary\n\nCaching the shared prefix cuts latency.\n"
+
+
+@pytest.fixture
+def state():
+    return ResearchAgent(AgentConfig())._initial_state("prompt caching", "run-1")
+
+
+def stream_report(state, node, messages, on_text):
+    for line in REPORT.splitlines(keepends=True):
+        on_text(line)
+    return AIMessage(content=REPORT), {}
+
+
+def test_report_is_generated_outside_a_graph_run(monkeypatch, state):
+    monkeypatch.setattr(nodes, "_stream_model", stream_report)
+    
+    updated = nodes.document_generation_node(state)
+    
+    assert updated["status"] == "completed"
+    assert "Caching the shared prefix" in updated["final_document"].content
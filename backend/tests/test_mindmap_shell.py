@@ -0,0 +1,59 @@
+import re
+import pytest
+import services.ai_analysis_service as ai_analysis_service
+from config import get_settings
+
+PAPER_ID = "paper-1"
+
+
+@pytest.fixture
+def papers():
+    return {PAPER_ID: "# Paper\n"}
+
+
+@pytest.fixture
+def respond():
+    return lambda messages: "# Paper"
+
+
+@pytest.fixture
+def client(analysis_client):
+    return analysis_client
+
+
+def test_mindmap_shell_escapes_markdown_url():
+    html = ai_analysis_service.AIAnalysisService.create_mindmap_html(
+        None, "https://api.test/api/papers/</script><script>alert(1)</script>/mindmap/markdown?a=1&b=2"
+    )
+    
+    # The inline script still ends at its own closing tag, after the fetch chain
+    inline_script = html[html.index("fetch("):].split("</script>", 1)[0]
+    assert ".catch(" in inline_script
+    assert "\\u003c/script\\u003e" in html
+    assert "\\u0026b=2" in html
+
+
+def test_mindmap_shell_for_unknown_paper_is_404(client):
+    response = client.get("/api/papers/%3C%2Fscript%3E%3Cscript%3Ealert(1)%3C%2Fscript%3E/mindmap")
+    
+    assert response.status_code == 404
+    assert "<script>alert(1)" not in response.text
+
+
+def test_mindmap_shell_loads_markdown_url(client):
+    response = client.get(f"/api/papers/{PAPER_ID}/mindmap")
+    
+    assert response.status_code == 200
+    url = re.search(r'fetch\("([^"]+)"\)', response.text).group(1)
+    assert url == f"http://testserver/api/papers/{PAPER_ID}/mindmap/markdown"
+    assert client.get(url).text == "# Paper"
+
+
+def test_mindmap_shell_revalidates(client):
+    url = f"/api/papers/{PAPER_ID}/mindmap"
+    etag = client.get(url).headers["ETag"]
+    
+    response = client.get(url, headers={"If-None-Match": etag})
+    
+    assert response.status_code == 304
+    assert response.headers["Cache-Control"] == get_settings().mindmap_shell_cache_control
@@ -0,0 +1,89 @@
+import threading
+import pytest
+from services.ocr_service import OCRService
+from tests.fakes import FakeMistralOCR, FakeOCRError
+
+PDF_URL = "https://s3.test/paper.pdf"
+
+
+class CountingRateLimit:
+    def __init__(self):
+        self.acquired = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        with self._lock:
+            self.acquired += 1
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    def make(client: FakeMistralOCR, max_retries: int = 3) -> OCRService:
+        service = OCRService()
+        monkeypatch.setattr(service.settings, "ocr_page_range_size", 5)
+        monkeypatch.setattr(service.settings, "ocr_max_concurrency", 2)
+        monkeypatch.setattr(service.settings, "ocr_max_retries", max_retries)
+        monkeypatch.setattr(service.settings, "ocr_retry_backoff_seconds", 0)
+        service.client = client
+        return service
+    return make
+
+
+def test_large_pdf_is_processed_in_ranges_and_stitched_in_page_order(make_service):
+    client = FakeMistralOCR(page_count=12, seconds_per_page=0.002)
+    service = make_service(client)
+    
+    response = service.process_pdf_from_url(PDF_URL, page_count=12)
+    
+    assert sorted(client.requests) == [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9], [10, 11]]
+    assert client.max_in_flight <= 2
+    assert [page["index"] for page in response["pages"]] == list(range(12))
+    assert response["usage_info"]["pages_processed"] == 12
+    assert service.extract_combined_markdown(response) == "\n\n".join(
+        FakeMistralOCR.page_markdown(index) for index in range(12)
+    )
+
+
+def test_failed_range_is_retried_without_redoing_other_ranges(make_service):
+    client = FakeMistralOCR(page_count=12, failures={5: 2})
+    service = make_service(client)
+    
+    response = service.process_pdf_from_url(PDF_URL, page_count=12)
+    
+    first_pages = [pages[0] for pages in client.requests]
+    assert first_pages.count(5) == 3
+    assert first_pages.count(0) == 1
+    assert first_pages.count(10) == 1
+    assert len(response["pages"]) == 12
+
+
+def test_range_that_exhausts_its_retries_fails_the_document(make_service):
+    client = FakeMistralOCR(page_count=12, failures={10: 5})
+    service = make_service(client, max_retries=1)
+    
+    with pytest.raises(FakeOCRError):
+        service.process_pdf_from_url(PDF_URL, page_count=12)
+    
+    assert [pages[0] for pages in client.requests].count(10) == 2
+
+
+@pytest.mark.parametrize("page_count", [None, 5])
+def test_short_or_uncounted_pdf_uses_a_single_request(make_service, page_count):
+    client = FakeMistralOCR(page_count=5, failures={0: 1})
+    service = make_service(client)
+    
+    response = service.process_pdf_from_url(PDF_URL, page_count=page_count)
+    
+    assert client.requests == [None, None]
+    assert len(response["pages"]) == 5
+
+
+def test_every_range_request_and_retry_is_rate_limited(make_service):
+    client = FakeMistralOCR(page_count=12, failures={5: 1})
+    service = make_service(client)
+    service.rate_limiter = CountingRateLimit()
+    
+    service.process_pdf_from_url(PDF_URL, page_count=12)
+    
+    # Three page ranges plus one retry, not one token for the whole paper
+    assert service.rate_limiter.acquired == len(client.requests) == 4
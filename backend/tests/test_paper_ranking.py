@@ -0,0 +1,56 @@
+import pytest
+from types import SimpleNamespace
+import services.chat_service as chat_service
+from services.chat_service import ChatService
+
+
+class FakePaperIndex:
+    def __init__(self, papers: dict):
+        self.papers = papers
+    
+    def route(self, query_embedding, top_n: int = 5):
+        ranked = sorted(self.papers.items(), key=lambda item: item[1], reverse=True)
+        return [{"paper_id": paper_id, "title": "", "score": score} for paper_id, score in ranked[:top_n]]
+    
+    def has_paper(self, paper_id: str) -> bool:
+        return paper_id in self.papers
+
+
+class FakeVectorStore:
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+        self.searches = 0
+    
+    def similarity_search_by_vector_with_score(self, embedding, k: int):
+        self.searches += 1
+        return [(SimpleNamespace(metadata={"paper_id": paper_id}), score) for paper_id, score in self.chunks[:k]]
+
+
+@pytest.fixture
+def make_service(monkeypatch):
+    def make(routed: dict, chunks: list) -> ChatService:
+        vector_store = FakeVectorStore(chunks)
+        monkeypatch.setattr(chat_service, "VectorStoreService", lambda embeddings: SimpleNamespace(vector_store=vector_store))
+        monkeypatch.setattr(chat_service, "PaperIndexService", lambda: FakePaperIndex(routed))
+        service = ChatService()
+        monkeypatch.setattr(service.settings, "all_papers_max_papers", 3)
+        return service
+    return make
+
+
+def test_enough_routed_papers_skip_the_chunk_scan(make_service):
+    service = make_service({"a": 0.9, "b": 0.8, "c": 0.7, "d": 0.6}, [("z", 0.99)])
+    
+    assert service._rank_papers([0.1]) == ["a", "b", "c"]
+    assert service.vector_store_service.vector_store.searches == 0
+
+
+def test_chunk_pool_adds_only_papers_missing_from_the_routing_index(make_service):
+    service = make_service(
+        {"a": 0.9, "b": 0.5},
+        [("b", 0.95), ("legacy", 0.8), ("legacy", 0.6)]
+    )
+    
+    # b keeps its routing score; legacy has no routing vectors and is found by its chunks
+    assert service._rank_papers([0.1]) == ["a", "legacy", "b"]
+    assert service.vector_store_service.vector_store.searches == 1
@@ -0,0 +1,91 @@
+import io
+import hashlib
+import pytest
+import services.paper_service as paper_service
+from services.paper_service import PaperService
+from utils import FileTooLargeError, EmptyFileError
+from tests.fakes import FakeS3Client
+
+PDF_BYTES = b"%PDF-1.4 paper body " * 1000
+
+
+class RecordingS3Client(FakeS3Client):
+    def __init__(self):
+        super().__init__()
+        self.streamed = []
+    
+    def upload_stream(self, fileobj, s3_key: str, content_type: str = "application/pdf") -> bool:
+        self.streamed.append(s3_key)
+        return super().upload_stream(fileobj, s3_key, content_type)
+
+
+class FakeOCRService:
+    def process_pdf_from_url(self, pdf_url: str, page_count=None) -> dict:
+        return {"pages": [{"index": 0, "markdown": "# Paper"}]}
+    
+    @staticmethod
+    def extract_combined_markdown(ocr_response: dict) -> str:
+        return "# Paper"
+    
+    @staticmethod
+    def get_page_count(ocr_response: dict) -> int:
+        return 1
+    
+    @staticmethod
+    def build_page_index(ocr_response: dict):
+        class PageIndex:
+            def to_json(self) -> bytes:
+                return b"[]"
+        return PageIndex()
+
+
+class FakeVectorStoreService:
+    def __init__(self, embeddings):
+        pass
+    
+    def check_paper_exists(self, paper_id: str):
+        return True, 3
+
+
+class FakeEmbeddingService:
+    def get_embeddings(self):
+        return None
+
+
+@pytest.fixture
+def service(monkeypatch):
+    s3_client = RecordingS3Client()
+    monkeypatch.setattr(paper_service, "S3Client", lambda: s3_client)
+    monkeypatch.setattr(paper_service, "OCRService", lambda rate_limiter=None: FakeOCRService())
+    monkeypatch.setattr(paper_service, "EmbeddingService", FakeEmbeddingService)
+    monkeypatch.setattr(paper_service, "VectorStoreService", FakeVectorStoreService)
+    return PaperService()
+
+
+def test_new_paper_is_uploaded_whole_after_hashing(service):
+    response = service.upload_and_process_stream(io.BytesIO(PDF_BYTES), "paper.pdf")
+    
+    raw_key = f"{service.settings.s3_raw_pdf_prefix}/{response.paper_id}/paper.pdf"
+    assert service.s3_client.streamed == [raw_key]
+    assert service.s3_client.objects[raw_key] == PDF_BYTES
+    assert service._check_duplicate(hashlib.sha256(PDF_BYTES).hexdigest())[1] == response.paper_id
+
+
+def test_duplicate_is_answered_without_uploading(service):
+    first = service.upload_and_process_stream(io.BytesIO(PDF_BYTES), "paper.pdf")
+    service.s3_client.streamed.clear()
+    
+    second = service.upload_and_process_stream(io.BytesIO(PDF_BYTES), "copy.pdf")
+    
+    assert second.paper_id == first.paper_id
+    assert service.s3_client.streamed == []
+
+
+@pytest.mark.parametrize("content, error", [(b"", EmptyFileError), (PDF_BYTES, FileTooLargeError)])
+def test_rejected_files_are_never_uploaded(service, monkeypatch, content, error):
+    monkeypatch.setattr(service.settings, "max_file_size_mb", len(PDF_BYTES) / 2 / (1024 * 1024))
+    
+    with pytest.raises(error):
+        service.upload_and_process_stream(io.BytesIO(content), "paper.pdf")
+    
+    assert service.s3_client.objects == {}
@@ -0,0 +1,69 @@
+import json
+import time
+import threading
+import pytest
+from schemas.ai_analysis import QuestionModel
+
+PAPER_ID = "paper-1"
+PAPER_MARKDOWN = "# A Study of Caching\n\n" + "The paper body discusses prompt caching in depth. " * 400
+BATCH_SECONDS = 0.2
+TOPICS = [
+    "cache eviction policy", "prefill latency budget", "token pricing tiers", "warm-up request cost",
+    "prefix length threshold", "concurrent reader misses", "time to first token", "hit rate monitoring",
+    "regional model availability", "output token limits", "structured output parsing", "section splitting strategy"
+]
+
+
+@pytest.fixture
+def papers():
+    return {PAPER_ID: PAPER_MARKDOWN}
+
+
+@pytest.fixture
+def service(analysis_service, monkeypatch):
+    service = analysis_service
+    monkeypatch.setattr(service.settings, "quiz_stream_batch_size", 3)
+    monkeypatch.setattr(service.settings, "quiz_stream_concurrency", 1)
+    
+    service.batches_started = []
+    lock = threading.Lock()
+    
+    def generate_batch(sections, section_index, count):
+        with lock:
+            batch = len(service.batches_started)
+            service.batches_started.append(section_index)
+        time.sleep(BATCH_SECONDS)
+        return [
+            QuestionModel(
+                id=1,
+                question=f"What does the paper report about {TOPICS[(batch * count + index) % len(TOPICS)]}?",
+                options={"A": f"Option {batch}{index}", "B": "Latency", "C": "Cost", "D": "Accuracy"},
+                correct_answer="A",
+                explanation="See the section."
+            )
+            for index in range(count)
+        ], 0
+    
+    monkeypatch.setattr(service, "_generate_quiz_batch", generate_batch)
+    return service
+
+
+def test_closing_the_stream_cancels_pending_batches(service):
+    stream = service.stream_quiz(PAPER_ID, num_questions=12)
+    first = json.loads(next(stream))
+    assert first["type"] == "question"
+    
+    start = time.perf_counter()
+    stream.close()
+    
+    # Only the batch already running is waited for, not the three queued ones
+    assert time.perf_counter() - start < BATCH_SECONDS
+    time.sleep(2 * BATCH_SECONDS)
+    assert len(service.batches_started) <= 2
+
+
+def test_full_stream_yields_every_question(service):
+    lines = [json.loads(line) for line in service.stream_quiz(PAPER_ID, num_questions=6)]
+    
+    assert [line["type"] for line in lines] == ["question"] * 6 + ["done"]
+    assert lines[-1]["total_questions"] == 6
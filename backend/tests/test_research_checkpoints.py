@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from langgraph.checkpoint.base import empty_checkpoint
+from agent.graph import ResearchAgent, get_checkpointer, prune_checkpoints
+from config import get_settings
+
+
+@pytest.fixture
+def checkpointer(monkeypatch, tmp_path):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "research_checkpoints_enabled", True)
+    monkeypatch.setattr(settings, "research_checkpoint_path", str(tmp_path / "checkpoints.sqlite3"))
+    get_checkpointer.cache_clear()
+    yield get_checkpointer()
+    get_checkpointer.cache_clear()
+
+
+def save_checkpoint(checkpointer, run_id: str, age: timedelta):
+    checkpoint = empty_checkpoint()
+    checkpoint["ts"] = (datetime.now(timezone.utc) - age).isoformat()
+    checkpointer.put({"configurable": {"thread_id": run_id, "checkpoint_ns": ""}}, checkpoint, {}, {})
+
+
+def run_ids(checkpointer) -> set:
+    return {checkpoint.config["configurable"]["thread_id"] for checkpoint in checkpointer.list(None)}
+
+
+def test_only_resumable_runs_are_checkpointed(checkpointer):
+    assert ResearchAgent().graph.checkpointer is None
+    assert ResearchAgent(checkpoint=True).graph.checkpointer is checkpointer
+
+
+def test_prune_deletes_runs_past_their_age(checkpointer):
+    save_checkpoint(checkpointer, "old", timedelta(days=10))
+    save_checkpoint(checkpointer, "old-but-running", timedelta(days=10))
+    save_checkpoint(checkpointer, "recent", timedelta(hours=1))
+    # A run is judged by its latest checkpoint
+    save_checkpoint(checkpointer, "resumed", timedelta(days=10))
+    save_checkpoint(checkpointer, "resumed", timedelta(hours=1))
+    
+    pruned = prune_checkpoints(timedelta(days=7), keep=["old-but-running"])
+    
+    assert pruned == 1
+    assert run_ids(checkpointer) == {"old-but-running", "recent", "resumed"}
+
+
+def test_delete_run_drops_its_checkpoints(checkpointer):
+    save_checkpoint(checkpointer, "done", timedelta(0))
+    save_checkpoint(checkpointer, "other", timedelta(0))
+    
+    ResearchAgent(checkpoint=True).delete_run("done")
+    
+    assert run_ids(checkpointer) == {"other"}
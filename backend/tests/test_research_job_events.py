@@ -0,0 +1,79 @@
+import asyncio
+import threading
+import time
+import pytest
+from agent.jobs import ResearchJob
+from schemas.state import AgentConfig
+
+
+@pytest.fixture
+def job():
+    job = ResearchJob("What is prompt caching?", AgentConfig())
+    job.add_event("queued")
+    return job
+
+
+def add_event_later(job: ResearchJob, delay: float, *args, **kwargs) -> threading.Thread:
+    def add():
+        time.sleep(delay)
+        job.add_event(*args, **kwargs)
+    
+    thread = threading.Thread(target=add)
+    thread.start()
+    return thread
+
+
+def test_waiting_streams_are_woken_by_the_worker_thread(job):
+    async def main():
+        threads_before = threading.active_count()
+        waits = [asyncio.create_task(job.wait_for_events(1, timeout=5)) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        # Waiting streams hold no threads
+        assert threading.active_count() == threads_before
+        
+        worker = add_event_later(job, 0.05, "started", status="running")
+        start = time.perf_counter()
+        results = await asyncio.gather(*waits)
+        worker.join()
+        return results, time.perf_counter() - start
+    
+    results, elapsed = asyncio.run(main())
+    
+    assert elapsed < 1
+    for events, finished in results:
+        assert [event["event"] for event in events] == ["started"]
+        assert finished is False
+    assert job._waiters == []
+
+
+def test_wait_times_out_without_events(job):
+    events, finished = asyncio.run(job.wait_for_events(1, timeout=0.05))
+    
+    assert events == []
+    assert finished is False
+    assert job._waiters == []
+
+
+def test_finished_job_returns_immediately(job):
+    job.add_event("completed", status="completed")
+    
+    events, finished = asyncio.run(job.wait_for_events(2, timeout=5))
+    
+    assert events == []
+    assert finished is True
+
+
+def test_cancelled_wait_releases_its_waiter(job):
+    async def main():
+        wait = asyncio.create_task(job.wait_for_events(1, timeout=5))
+        await asyncio.sleep(0.05)
+        assert len(job._waiters) == 1
+        wait.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await wait
+    
+    asyncio.run(main())
+    
+    assert job._waiters == []
+    # Events after the stream went away do not fail
+    job.add_event("started", status="running")
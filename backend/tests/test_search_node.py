@@ -0,0 +1,49 @@
+import logging
+import pytest
+import agent.nodes as nodes
+from agent.graph import ResearchAgent
+from schemas.state import AgentConfig, SearchResult
+
+
+def result(provider: str, query: str) -> SearchResult:
+    return SearchResult(title=f"{provider}: {query}", url=f"https://{provider}.test/{query}", content=query, source=provider)
+
+
+def failing_search(query: str, bypass_cache: bool = False):
+    raise ConnectionError("provider unavailable")
+
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(nodes.result_store, "score", lambda query, results: None)
+    state = ResearchAgent(AgentConfig())._initial_state("prompt caching", "run-1")
+    state["pending_queries"] = ["prompt caching latency"]
+    return state
+
+
+def test_partial_provider_failure_keeps_the_other_results(monkeypatch, state, caplog):
+    monkeypatch.setattr(nodes, "run_tavily_search", lambda query, bypass_cache=False: [result("tavily", query)])
+    monkeypatch.setattr(nodes, "run_perplexity_search", failing_search)
+    
+    with caplog.at_level(logging.WARNING, logger="agent.nodes"):
+        updated = nodes.search_node(state)
+    
+    assert [r.source for r in updated["search_results"]] == ["tavily"]
+    assert updated["error_count"] == 0
+    assert "1 of 2 provider searches failed" in updated["last_tool_result"]
+    failure_logs = [record for record in caplog.records if record.exc_info]
+    assert len(failure_logs) == 1
+    assert "perplexity search failed" in failure_logs[0].getMessage()
+
+
+def test_all_provider_failures_are_handled_as_a_search_error(monkeypatch, state):
+    monkeypatch.setattr(nodes, "run_tavily_search", failing_search)
+    monkeypatch.setattr(nodes, "run_perplexity_search", failing_search)
+    
+    updated = nodes.search_node(state)
+    
+    assert updated["error_count"] == 1
+    assert updated["failed_node"] == "search"
+    assert "all 2 provider searches failed" in updated["last_tool_result"]
+    assert updated["search_results"] == []
+    assert updated["current_step"] == 0
@@ -1,24 +1,160 @@
+from typing import List, Optional
 from langchain_core.tools import tool
 from tavily import TavilyClient
 from perplexity import Perplexity
 from config.settings import get_settings
+from tools.search_cache import SearchCache
+from schemas.state import SearchResult
 
 
 settings = get_settings()
 
 tavily_client = TavilyClient(api_key=settings.tavily_api_key)
 perplexity_client = Perplexity(api_key=settings.perplexity_api_key)
+search_cache = SearchCache()
 
+TAVILY_SEARCH_PARAMS = {
+    "search_depth": "advanced",  # More comprehensive search
+    "max_results": 5,            # Balanced number of results
+    "include_answer": True,      # Include AI-generated answer
+    "include_raw_content": settings.tavily_include_raw_content
+}
+PERPLEXITY_SEARCH_PARAMS = {"max_results": 5}
 
 
+def _tavily_response(query: str, bypass_cache: bool = False) -> dict:
+    """Raw Tavily response, served from the search cache when possible"""
+    response = search_cache.get("tavily", query, TAVILY_SEARCH_PARAMS, bypass=bypass_cache)
+    if response is None:
+        response = tavily_client.search(query=query, **TAVILY_SEARCH_PARAMS)
+        search_cache.put("tavily", query, TAVILY_SEARCH_PARAMS, response)
+    return response
+
+
+def _perplexity_results(query: str, bypass_cache: bool = False) -> list:
+    """Raw Perplexity results as plain dicts, served from the search cache when possible"""
+    cached = search_cache.get("perplexity", query, PERPLEXITY_SEARCH_PARAMS, bypass=bypass_cache)
+    if cached is not None:
+        return cached["results"]
+    
+    try:
+        search = perplexity_client.search(query=query, **PERPLEXITY_SEARCH_PARAMS)
+        results = search.get('results', [])
+    except AttributeError:
+        search = perplexity_client.search.create(query=query, **PERPLEXITY_SEARCH_PARAMS)
+        results = search.results if hasattr(search, 'results') else []
+    
+    results = [_result_to_dict(result) for result in results]
+    search_cache.put("perplexity", query, PERPLEXITY_SEARCH_PARAMS, {"results": results})
+    return results
+
+
+def _result_to_dict(result) -> dict:
+    if isinstance(result, dict):
+        return result
+    if hasattr(result, 'model_dump'):
+        return result.model_dump(mode="json")
+    if hasattr(result, 'title'):
+        return {
+            "title": result.title,
+            "url": getattr(result, 'url', 'No URL'),
+            "snippet": getattr(result, 'snippet', getattr(result, 'content', 'No content available'))
+        }
+    return {"title": str(result)[:100]}
+
+
+
+
+def run_tavily_search(query: str, bypass_cache: bool = False) -> List[SearchResult]:
+    """
+    Search the web with Tavily and return structured results.
+    
+    Args:
+        query: The search query string
+        bypass_cache: Skip cached results and query the API directly
+        
+    Returns:
+        Search results with Tavily's relevance score, raw content and published date when available
+    """
+    return _tavily_results(_tavily_response(query, bypass_cache))
+
+
+def _tavily_results(response: dict) -> List[SearchResult]:
+    return [
+        SearchResult(
+            title=result.get('title') or 'No title',
+            url=result.get('url') or '',
+            content=result.get('content') or '',
+            source="tavily",
+            relevance_score=result.get('score'),
+            raw_content=result.get('raw_content'),
+            published_date=result.get('published_date')
+        )
+        for result in response.get('results', [])
+    ]
+
+
+def run_perplexity_search(query: str, bypass_cache: bool = False) -> List[SearchResult]:
+    """
+    Search the web with Perplexity and return structured results.
+    
+    Args:
+        query: The search query string
+        bypass_cache: Skip cached results and query the API directly
+        
+    Returns:
+        Search results with snippet and publication date when available
+    """
+    return [
+        SearchResult(
+            title=result.get('title') or 'No title',
+            url=result.get('url') or '',
+            content=result.get('snippet') or result.get('content') or '',
+            source="perplexity",
+            published_date=result.get('date') or result.get('published_date')
+        )
+        for result in _perplexity_results(query, bypass_cache)
+    ]
+
+
+def format_search_results(results: List[SearchResult], header: Optional[str] = None) -> str:
+    """
+    Render structured results as markdown for the LLM.
+    
+    Args:
+        results: Search results to render
+        header: Optional first line, e.g. an AI summary or the query
+        
+    Returns:
+        Numbered list with title, URL, publication date and summary of each result
+    """
+    formatted_results = [header] if header else []
+    
+    if not results:
+        formatted_results.append("No results found.")
+        return "\n".join(formatted_results)
+    
+    formatted_results.append("**Search Results:**")
+    for i, result in enumerate(results, 1):
+        published = f"   Published: {result.published_date}\n" if result.published_date else ""
+        formatted_results.append(
+            f"\n{i}. **{result.title}**\n"
+            f"   URL: {result.url or 'No URL'}\n"
+            f"{published}"
+            f"   Summary: {result.content or 'No content available'}"
+        )
+    
+    return "\n".join(formatted_results)
+
 
 @tool
-def tavily_search(query: str) -> str:
+def tavily_search(query: str, bypass_cache: bool = False) -> str:
     """
     Search the web using Tavily API for comprehensive research results.
     
     Args:
         query: The search query string
+        bypass_cache: Skip cached results and query the API directly
         
     Returns:
         Formatted search results with titles, URLs, and content snippets
@@ -27,33 +163,9 @@ def tavily_search(query: str) -> str:
         return "Error: Tavily client not initialized. Please check your API key."
     
     try:
-        response = tavily_client.search(
-            query=query,
-            search_depth="advanced",  # More comprehensive search
-            max_results=5,           # Balanced number of results
-            include_answer=True,     # Include AI-generated answer
-            include_raw_content=False # Focus on summaries
-        )
-        
-        formatted_results = []
-        
-        if response.get('answer'):
-            formatted_results.append(f"**AI Summary:** {response['answer']}\n")
-        
-        if response.get('results'):
-            formatted_results.append("**Search Results:**")
-            for i, result in enumerate(response['results'], 1):
-                title = result.get('title', 'No title')
-                url = result.get('url', 'No URL')
-                content = result.get('content', 'No content available')
-                
-                formatted_results.append(
-                    f"\n{i}. **{title}**\n"
-                    f"   URL: {url}\n"
-                    f"   Summary: {content}"
-                )
-        
-        return "\n".join(formatted_results)
+        response = _tavily_response(query, bypass_cache)
+        answer = response.get('answer')
+        return format_search_results(_tavily_results(response), f"**AI Summary:** {answer}\n" if answer else None)
     
     except Exception as e:
         return f"Error performing search: {str(e)}"
@@ -61,12 +173,13 @@ def tavily_search(query: str) -> str:
 
 
 @tool
-def perplexity_search(query: str) -> str:
+def perplexity_search(query: str, bypass_cache: bool = False) -> str:
     """
     Search using Perplexity AI for intelligent web search with AI-powered summaries.
     
     Args:
         query: The search query string
+        bypass_cache: Skip cached results and query the API directly
         
     Returns:
         AI-generated summary with source citations
@@ -76,43 +189,8 @@ def perplexity_search(query: str) -> str:
         return "Error: Perplexity client not initialized. Please check your API key or package installation."
     
     try:
-        try:
-            search = perplexity_client.search(query=query, max_results=5)
-            results = search.get('results', [])
-        except AttributeError:
-            search = perplexity_client.search.create(
-                query=query,
-                max_results=5,             
-            )
-            results = search.results if hasattr(search, 'results') else []
-        
-        formatted_results = []
-        formatted_results.append(f"**Perplexity Search Results for:** {query}\n")
-        
-        if results:
-            for i, result in enumerate(results, 1):
-                if hasattr(result, 'title'):
-                    title = result.title
-                    url = getattr(result, 'url', 'No URL')
-                    snippet = getattr(result, 'snippet', getattr(result, 'content', 'No content available'))
-                elif isinstance(result, dict):
-                    title = result.get('title', 'No title')
-                    url = result.get('url', 'No URL')
-                    snippet = result.get('snippet', result.get('content', 'No content available'))
-                else:
-                    title = str(result)[:100]
-                    url = 'No URL'
-                    snippet = 'No content available'
-                
-                formatted_results.append(
-                    f"\n{i}. **{title}**\n"
-                    f"   URL: {url}\n"
-                    f"   Summary: {snippet}"
-                )
-        else:
-            formatted_results.append("No results found.")
-        
-        return "\n".join(formatted_results)
+        results = run_perplexity_search(query, bypass_cache)
+        return format_search_results(results, f"**Perplexity Search Results for:** {query}\n")
     
     except Exception as e:
         return f"Error performing Perplexity search: {str(e)}. Falling back to Tavily search."
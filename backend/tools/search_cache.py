@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from contextlib import closing
+from typing import Any, Optional
+from config.settings import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ("tavily", "perplexity")
+
+
+def normalize_query(query: str) -> str:
+    """Case, surrounding quotes/punctuation and whitespace do not change search results"""
+    return " ".join(query.strip().strip("\"'.?!").lower().split())
+
+
+class SearchCache:
+    """Persistent cache of raw search API responses in a local SQLite file
+    
+    Entries are keyed by provider, normalized query and request parameters,
+    and expire after the provider's TTL. Any cache failure is logged and
+    treated as a miss, so searches never fail because of the cache.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        settings = get_settings()
+        self.enabled = settings.search_cache_enabled
+        self.path = path or settings.search_cache_path
+        self.ttls = {
+            "tavily": settings.search_cache_tavily_ttl_seconds,
+            "perplexity": settings.search_cache_perplexity_ttl_seconds
+        }
+        self._lock = threading.Lock()
+        self._metrics = {
+            provider: {"hits": 0, "misses": 0, "writes": 0, "bypasses": 0}
+            for provider in PROVIDERS
+        }
+        
+        if self.enabled:
+            try:
+                self._initialize()
+            except Exception as e:
+                logger.warning(f"Search cache disabled, could not open {self.path}: {e}")
+                self.enabled = False
+    
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation keeps the cache safe to use from search threads
+        return sqlite3.connect(self.path, timeout=10)
+    
+    def _initialize(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, provider TEXT NOT NULL, query TEXT NOT NULL, "
+                "response TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            removed = conn.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),)).rowcount
+        
+        if removed:
+            logger.info(f"Search cache: removed {removed} expired entries")
+    
+    @staticmethod
+    def build_key(provider: str, query: str, params: dict) -> str:
+        """Build the cache key from the provider, normalized query and request parameters"""
+        payload = json.dumps(
+            {"provider": provider, "query": normalize_query(query), "params": params},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, provider: str, query: str, params: dict, bypass: bool = False) -> Optional[Any]:
+        """Return the cached response, or None on a miss, expiry or bypass"""
+        if not self.enabled:
+            return None
+        
+        if bypass:
+            self._count(provider, "bypasses")
+            return None
+        
+        row = None
+        try:
+            with closing(self._connect()) as conn:
+                row = conn.execute(
+                    "SELECT response FROM search_cache WHERE key = ? AND expires_at > ?",
+                    (self.build_key(provider, query, params), time.time())
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"Search cache read failed for {provider} query '{query}': {e}")
+        
+        if row is None:
+            self._count(provider, "misses")
+            return None
+        
+        self._count(provider, "hits")
+        logger.info(f"Search cache hit ({provider}): {query}")
+        return json.loads(row[0])
+    
+    def put(self, provider: str, query: str, params: dict, response: Any):
+        """Store a raw response for the provider's TTL"""
+        ttl = self.ttls.get(provider, 0)
+        if not self.enabled or ttl <= 0:
+            return
+        
+        now = time.time()
+        try:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache "
+                    "(key, provider, query, response, created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        self.build_key(provider, query, params),
+                        provider,
+                        normalize_query(query),
+                        json.dumps(response, default=str),
+                        now,
+                        now + ttl
+                    )
+                )
+        except Exception as e:
+            logger.warning(f"Search cache write failed for {provider} query '{query}': {e}")
+            return
+        
+        self._count(provider, "writes")
+    
+    def _count(self, provider: str, counter: str):
+        with self._lock:
+            self._metrics.setdefault(provider, {"hits": 0, "misses": 0, "writes": 0, "bypasses": 0})[counter] += 1
+    
+    def get_metrics(self) -> dict:
+        """Return per-provider hit/miss counters and hit rates"""
+        with self._lock:
+            providers = {provider: dict(counters) for provider, counters in self._metrics.items()}
+        
+        for counters in providers.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        
+        return {"enabled": self.enabled, "path": self.path, "ttl_seconds": dict(self.ttls), "providers": providers}
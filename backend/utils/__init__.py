@@ -1,4 +1,13 @@
 from .s3_client import S3Client
+from .page_index import PageIndex
+from .pdf import count_pdf_pages
+from .hashing_reader import HashingReader, FileTooLargeError, EmptyFileError, hash_file
 from .chunking import MarkdownChunker
+from .vector_math import normalize, RunningCentroid
+from .artifact_cache import ArtifactCache
+from .single_flight import SingleFlight
+from .rate_limiter import RateLimiter
+from .public_url import open_public_url, check_public_url, UnsafeURLError
+from .http_cache import make_etag, is_not_modified, not_modified_response, CachePolicy, HTTPCacheMiddleware
 
-__all__ = ["S3Client", "MarkdownChunker"]
+__all__ = ["S3Client", "MarkdownChunker", "PageIndex", "count_pdf_pages", "HashingReader", "FileTooLargeError", "EmptyFileError", "hash_file", "normalize", "RunningCentroid", "ArtifactCache", "SingleFlight", "RateLimiter", "open_public_url", "check_public_url", "UnsafeURLError", "make_etag", "is_not_modified", "not_modified_response", "CachePolicy", "HTTPCacheMiddleware"]
@@ -0,0 +1,112 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+from utils.s3_client import S3Client
+from config import get_settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactCache:
+    """Two-level cache for generated paper artifacts: an in-process LRU in front of S3
+    
+    Artifacts are stored as JSON under
+    ``{s3_analysis_prefix}/{paper_id}/{artifact}/{digest}.json`` where the digest
+    covers every parameter that changes the output (e.g. num_questions, prompt
+    version, model id).
+    """
+    
+    def __init__(self, s3_client: Optional[S3Client] = None):
+        settings = get_settings()
+        self.s3_client = s3_client or S3Client()
+        self.prefix = settings.s3_analysis_prefix
+        self.max_entries = settings.artifact_cache_max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "local_hits": 0,
+            "s3_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "refreshes": 0
+        }
+    
+    def build_key(self, paper_id: str, artifact: str, params: dict) -> str:
+        """Build the S3 key for an artifact from its identifying parameters"""
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        return f"{self.prefix}/{paper_id}/{artifact}/{digest}.json"
+    
+    def get(self, key: str, record: bool = True) -> Optional[dict]:
+        """
+        Return a cached artifact, checking the local LRU before S3
+        
+        Args:
+            key: Artifact key from build_key
+            record: Count the lookup in the hit/miss metrics (off for validator lookups)
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                if record:
+                    self._metrics["local_hits"] += 1
+                return self._entries[key]
+        
+        payload = None
+        try:
+            if self.s3_client.file_exists(key):
+                payload = json.loads(self.s3_client.download_file(key).decode('utf-8'))
+        except Exception as e:
+            logger.warning(f"Artifact cache read failed for {key}: {e}")
+        
+        if payload is None:
+            if record:
+                with self._lock:
+                    self._metrics["misses"] += 1
+            return None
+        
+        self._remember(key, payload)
+        if record:
+            with self._lock:
+                self._metrics["s3_hits"] += 1
+        logger.info(f"Artifact cache S3 hit: {key}")
+        return payload
+    
+    def put(self, key: str, payload: dict):
+        """Store an artifact in S3 and the local LRU"""
+        self._remember(key, payload)
+        try:
+            self.s3_client.upload_file(
+                file_content=json.dumps(payload).encode('utf-8'),
+                s3_key=key,
+                content_type="application/json"
+            )
+        except Exception as e:
+            logger.warning(f"Artifact cache write failed for {key}: {e}")
+            return
+        with self._lock:
+            self._metrics["writes"] += 1
+    
+    def record_refresh(self):
+        """Count a lookup that was skipped because the caller asked for regeneration"""
+        with self._lock:
+            self._metrics["refreshes"] += 1
+    
+    def get_metrics(self) -> dict:
+        """Return hit/miss counters and the current LRU size"""
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics["local_entries"] = len(self._entries)
+        
+        lookups = metrics["local_hits"] + metrics["s3_hits"] + metrics["misses"]
+        metrics["hit_rate"] = round((metrics["local_hits"] + metrics["s3_hits"]) / lookups, 4) if lookups else 0.0
+        return metrics
+    
+    def _remember(self, key: str, payload: dict):
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,14 +1,41 @@
+import re
 from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List
+from typing import Iterable, Iterator, List, NamedTuple, Optional
 from config import get_settings
 from schemas import TextChunk, ChunkMetadata
+from utils.page_index import PageIndex
+
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+SECTION_PATH_SEPARATOR = " > "
+
+
+class Block(NamedTuple):
+    """A structural unit of the markdown: heading, paragraph, table, equation or code"""
+    kind: str
+    text: str
+    start: int
+    end: int
+    level: int = 0
 
 
 class MarkdownChunker:
     
     def __init__(self):
         settings = get_settings()
+        # Paragraph windows advance by chunk_size - chunk_overlap, which must be positive
+        if not 0 <= settings.chunk_overlap < settings.chunk_size:
+            raise ValueError(
+                f"chunk_overlap must be at least 0 and smaller than chunk_size, "
+                f"got chunk_overlap={settings.chunk_overlap}, chunk_size={settings.chunk_size}"
+            )
+        self.strategy = settings.chunking_strategy
+        self.chunk_size = settings.chunk_size
+        self.chunk_overlap = settings.chunk_overlap
+        self.min_chunk_size = settings.chunk_min_size
         self.splitter = RecursiveCharacterTextSplitter(
             chunk_size=settings.chunk_size,
             chunk_overlap=settings.chunk_overlap,
@@ -31,10 +58,82 @@ class MarkdownChunker:
             ],
             length_function=len,
             is_separator_regex=False,
+            add_start_index=True,
         )
     
-    def chunk_markdown(self, markdown_content: str, paper_id: str, source: str = "research_paper") -> List[TextChunk]:
-       
+    def chunk_markdown(
+        self,
+        markdown_content: str,
+        paper_id: str,
+        source: str = "research_paper",
+        page_index: Optional[PageIndex] = None
+    ) -> List[TextChunk]:
+        """
+        Split OCR markdown into chunks using the configured strategy.
+        
+        Args:
+            markdown_content: Paper markdown
+            paper_id: Paper identifier
+            source: Source recorded in chunk metadata
+            page_index: Page offset table; when given, chunks get page_start/page_end
+        
+        Returns:
+            List of TextChunk
+        """
+        if self.strategy == "recursive":
+            return self._chunk_recursive(markdown_content, paper_id, source, page_index)
+        
+        return list(self.iter_chunks(markdown_content.splitlines(keepends=True), paper_id, source, page_index))
+    
+    def iter_chunks(
+        self,
+        lines: Iterable[str],
+        paper_id: str,
+        source: str = "research_paper",
+        page_index: Optional[PageIndex] = None
+    ) -> Iterator[TextChunk]:
+        """
+        Lazily chunk markdown supplied as an iterable of lines (with line endings).
+        
+        Lines are consumed one at a time, so memory is bounded by the size of the
+        pending chunk rather than the document. The recursive strategy needs the
+        whole text and is materialised first.
+        
+        Args:
+            lines: Markdown lines, e.g. from S3Client.iter_lines
+            paper_id: Paper identifier
+            source: Source recorded in chunk metadata
+            page_index: Page offset table; when given, chunks get page_start/page_end
+            
+        Yields:
+            TextChunk in document order
+        """
+        if self.strategy == "recursive":
+            yield from self._chunk_recursive("".join(lines), paper_id, source, page_index)
+            return
+        
+        for idx, (content, section_path, start, end) in enumerate(self._chunk_structural(lines)):
+            page_start, page_end = page_index.page_range(start, end) if page_index else (None, None)
+            yield TextChunk(
+                content=content,
+                metadata=ChunkMetadata(
+                    paper_id=paper_id,
+                    chunk_index=idx,
+                    source=source,
+                    section_path=section_path,
+                    page_start=page_start,
+                    page_end=page_end
+                )
+            )
+    
+    def _chunk_recursive(
+        self,
+        markdown_content: str,
+        paper_id: str,
+        source: str,
+        page_index: Optional[PageIndex] = None
+    ) -> List[TextChunk]:
+        
         doc = Document(
             page_content=markdown_content,
             metadata={"source": source, "paper_id": paper_id}
@@ -44,14 +143,213 @@ class MarkdownChunker:
         
         chunks = []
         for idx, split_doc in enumerate(split_docs):
+            page_start, page_end = None, None
+            if page_index:
+                start = split_doc.metadata["start_index"]
+                page_start, page_end = page_index.page_range(start, start + len(split_doc.page_content))
+            
             chunk = TextChunk(
                 content=split_doc.page_content,
                 metadata=ChunkMetadata(
                     paper_id=paper_id,
                     chunk_index=idx,
-                    source=source
+                    source=source,
+                    page_start=page_start,
+                    page_end=page_end
                 )
             )
             chunks.append(chunk)
         
         return chunks
+    
+    def _chunk_structural(self, lines: Iterable[str]) -> Iterator[tuple]:
+        """
+        Pack structural blocks into chunks in a single pass.
+        
+        Chunks never cross a heading unless the pending chunk is still shorter
+        than `chunk_min_size`. Tables, equations and code blocks are only split
+        when they are longer than `chunk_size`.
+        
+        Yields:
+            (content, section_path, start, end) tuples, where [start, end) is the
+            span of the markdown the chunk was built from
+        """
+        headings: List[tuple] = []
+        # (text, start, end) of the blocks or paragraph pieces in the pending chunk
+        parts: List[tuple] = []
+        size = 0
+        chunk_path: Optional[str] = None
+        
+        def emit():
+            return "\n\n".join(text for text, _, _ in parts), chunk_path, parts[0][1], parts[-1][2]
+        
+        for block in self._iter_blocks(lines, max_chars=self.chunk_size):
+            if block.kind == "heading":
+                if size >= self.min_chunk_size:
+                    yield emit()
+                    parts, size, chunk_path = [], 0, None
+                
+                while headings and headings[-1][0] >= block.level:
+                    headings.pop()
+                headings.append((block.level, HEADING_PATTERN.match(block.text).group(2)))
+            
+            section_path = SECTION_PATH_SEPARATOR.join(title for _, title in headings) or None
+            
+            # Paragraphs split at sentences; an atomic block only gets here when one of its lines is too long
+            if block.kind != "heading" and len(block.text) > self.chunk_size:
+                pieces = [
+                    (piece, block.start + start, block.start + end)
+                    for piece, start, end in self._split_paragraph(block.text)
+                ]
+            else:
+                pieces = [(block.text, block.start, block.end)]
+            
+            for piece, piece_start, piece_end in pieces:
+                if parts and size + len(piece) + 2 > self.chunk_size:
+                    # Headings at the end of a full chunk move on with their content
+                    carried = []
+                    while parts and HEADING_PATTERN.match(parts[-1][0]):
+                        carried.insert(0, parts.pop())
+                    if parts:
+                        yield emit()
+                    parts = carried
+                    size = sum(len(text) + 2 for text, _, _ in carried)
+                    chunk_path = section_path if carried else None
+                
+                if chunk_path is None:
+                    chunk_path = section_path
+                parts.append((piece, piece_start, piece_end))
+                size += len(piece) + 2
+        
+        if parts:
+            yield emit()
+    
+    def _split_paragraph(self, text: str) -> List[tuple]:
+        """
+        Split an oversized paragraph at sentence boundaries, with overlap.
+        
+        Returns:
+            (piece, start, end) tuples with spans relative to the paragraph
+        """
+        bounds = [0] + [match.end() for match in SENTENCE_BOUNDARY.finditer(text)] + [len(text)]
+        spans = []
+        piece_start = piece_end = 0
+        for sentence_start, sentence_end in zip(bounds, bounds[1:]):
+            if piece_end > piece_start and sentence_end - piece_start > self.chunk_size:
+                spans.append((piece_start, piece_end))
+                # Start the next piece up to chunk_overlap earlier, on a word boundary
+                space = text.find(" ", max(piece_end - self.chunk_overlap, piece_start), piece_end)
+                piece_start = space + 1 if self.chunk_overlap and space != -1 else sentence_start
+            piece_end = sentence_end
+            
+            # A single sentence longer than a chunk is hard-split
+            while piece_end - piece_start > self.chunk_size:
+                spans.append((piece_start, piece_start + self.chunk_size))
+                piece_start += self.chunk_size - self.chunk_overlap
+        
+        if piece_end > piece_start:
+            spans.append((piece_start, piece_end))
+        return [(text[start:end].strip(), start, end) for start, end in spans]
+    
+    @staticmethod
+    def _iter_blocks(lines: Iterable[str], max_chars: Optional[int] = None) -> Iterator[Block]:
+        """
+        Parse markdown lines (with line endings) into structural blocks in one linear pass.
+        
+        Code fences and display equations (opened by a line that is just `$$`)
+        are collected up to their closing delimiter, a line that starts and
+        ends with `$$` is a single-line equation, and consecutive `|` lines form
+        one table block. Each block carries its [start, end) character span in
+        the markdown.
+        
+        Args:
+            lines: Markdown lines with line endings
+            max_chars: Tables, equations and code blocks growing past this size
+                are cut at a line boundary, so a missing closing delimiter cannot
+                swallow the rest of the document
+        """
+        buffer: List[str] = []
+        kind = None
+        buffer_start = 0
+        buffer_end = 0
+        buffer_size = 0
+        
+        def flush():
+            nonlocal buffer, kind, buffer_size
+            block = Block(kind, "\n".join(buffer).strip("\n"), buffer_start, buffer_end)
+            buffer, kind, buffer_size = [], None, 0
+            return block
+        
+        def start_part(line_start: int, line_kind: str):
+            nonlocal buffer_start, kind
+            buffer_start = line_start
+            kind = line_kind
+        
+        offset = 0
+        for raw_line in lines:
+            line_start = offset
+            offset += len(raw_line)
+            line = raw_line.rstrip("\r\n")
+            stripped = line.strip()
+            
+            if kind in ("code", "equation"):
+                if kind == "equation" and HEADING_PATTERN.match(stripped):
+                    # An unclosed equation never runs into the next section
+                    yield flush()
+                else:
+                    if max_chars and buffer and buffer_size + len(line) + 1 > max_chars:
+                        open_kind = kind
+                        yield flush()
+                        start_part(line_start, open_kind)
+                    buffer.append(line)
+                    buffer_size += len(line) + 1
+                    buffer_end = offset
+                    closed = FENCE_PATTERN.match(line) if kind == "code" else stripped.endswith("$$")
+                    if closed:
+                        yield flush()
+                    continue
+            
+            if kind == "table" and not stripped.startswith("|"):
+                yield flush()
+            
+            heading = HEADING_PATTERN.match(stripped)
+            if heading:
+                if buffer:
+                    yield flush()
+                yield Block("heading", stripped, line_start, offset, len(heading.group(1)))
+                continue
+            
+            if not stripped:
+                if buffer:
+                    yield flush()
+                continue
+            
+            if FENCE_PATTERN.match(line):
+                line_kind = "code"
+            elif stripped == "$$" or (len(stripped) > 4 and stripped.startswith("$$") and stripped.endswith("$$")):
+                line_kind = "equation"
+            elif stripped.startswith("|"):
+                line_kind = "table"
+            else:
+                line_kind = "paragraph"
+            
+            # Fences, equations and tables start a new block
+            if buffer and line_kind != kind and line_kind != "paragraph":
+                yield flush()
+            
+            if kind == "table" and max_chars and buffer and buffer_size + len(line) + 1 > max_chars:
+                yield flush()
+            
+            if not buffer:
+                start_part(line_start, line_kind)
+            buffer.append(line)
+            buffer_size += len(line) + 1
+            buffer_end = offset
+            
+            # Single-line equation: $$ ... $$
+            if line_kind == "equation" and kind == "equation" and stripped != "$$":
+                yield flush()
+        
+        # Unterminated fences and equations are emitted as they are
+        if buffer:
+            yield flush()
@@ -0,0 +1,59 @@
+import hashlib
+from typing import BinaryIO, Tuple
+
+
+class FileTooLargeError(ValueError):
+    """Raised when a streamed file exceeds the configured size limit"""
+    
+    def __init__(self, max_bytes: int):
+        super().__init__(f"File size exceeds maximum allowed size of {max_bytes // (1024 * 1024)}MB")
+        self.max_bytes = max_bytes
+
+
+class EmptyFileError(ValueError):
+    """Raised when a streamed file turns out to be empty"""
+    
+    def __init__(self):
+        super().__init__("Empty file uploaded")
+
+
+class HashingReader:
+    """
+    Read-only file wrapper that computes a SHA256 digest and enforces a size limit
+    while the file is being consumed, e.g. by a streaming S3 upload.
+    
+    Deliberately not seekable, so consumers read it exactly once, in order.
+    """
+    
+    def __init__(self, fileobj: BinaryIO, max_bytes: int):
+        self.fileobj = fileobj
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+        self._digest = hashlib.sha256()
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.fileobj.read(size)
+        self.bytes_read += len(data)
+        if self.bytes_read > self.max_bytes:
+            raise FileTooLargeError(self.max_bytes)
+        self._digest.update(data)
+        return data
+    
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+
+def hash_file(fileobj: BinaryIO, max_bytes: int, chunk_size: int = 1024 * 1024) -> Tuple[str, int]:
+    """
+    SHA256 digest and size of a seekable file, read in chunks up to the size limit.
+    
+    The file is rewound afterwards, so it can be uploaded once the hash is known.
+    
+    Raises:
+        FileTooLargeError: The file is larger than `max_bytes`
+    """
+    reader = HashingReader(fileobj, max_bytes)
+    while reader.read(chunk_size):
+        pass
+    fileobj.seek(0)
+    return reader.hexdigest(), reader.bytes_read
@@ -0,0 +1,96 @@
+import re
+import hashlib
+from dataclasses import dataclass
+from typing import List, Optional, Union
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+
+def make_etag(*parts: Union[str, bytes]) -> str:
+    """Strong ETag (quoted) derived from the given content parts"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else part.encode('utf-8'))
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match header matches the given ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as required for If-None-Match
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates)
+
+
+def not_modified_response(etag: str, cache_control: Optional[str] = None) -> Response:
+    """304 response carrying the validators a cache needs to refresh its entry"""
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    return Response(status_code=304, headers=headers)
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """Caching policy for the GET endpoints whose path matches `path_pattern`"""
+    path_pattern: str
+    cache_control: str
+    # Hash the response body when the endpoint sets no ETag itself
+    etag_from_body: bool = False
+
+
+class HTTPCacheMiddleware(BaseHTTPMiddleware):
+    """
+    Applies per-endpoint Cache-Control policies and answers conditional GETs.
+    
+    Successful GET responses on a matching path get the policy's Cache-Control
+    (unless the endpoint set one) and, when the request's If-None-Match matches
+    the response ETag, are replaced by an empty 304.
+    """
+    
+    def __init__(self, app, policies: List[CachePolicy]):
+        super().__init__(app)
+        self.policies = [(re.compile(policy.path_pattern), policy) for policy in policies]
+    
+    def _match(self, path: str) -> Optional[CachePolicy]:
+        for pattern, policy in self.policies:
+            if pattern.fullmatch(path):
+                return policy
+        return None
+    
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        
+        if request.method != "GET" or response.status_code != 200:
+            return response
+        
+        policy = self._match(request.url.path)
+        if policy is None:
+            return response
+        
+        if "cache-control" not in response.headers:
+            response.headers["Cache-Control"] = policy.cache_control
+        
+        etag = response.headers.get("etag")
+        if etag is None and policy.etag_from_body:
+            body = b"".join([chunk async for chunk in response.body_iterator])
+            etag = make_etag(body)
+            headers = dict(response.headers)
+            headers["ETag"] = etag
+            response = Response(
+                content=body,
+                status_code=response.status_code,
+                headers=headers,
+                media_type=response.media_type
+            )
+        
+        if etag and is_not_modified(request, etag):
+            return not_modified_response(etag, response.headers["cache-control"])
+        
+        return response
@@ -0,0 +1,45 @@
+import json
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+
+class PageIndex:
+    """
+    Maps character offsets in a paper's combined markdown to PDF page numbers.
+    
+    Stored as two parallel lists: the offset where each page's markdown starts
+    and its 1-based page number (pages without markdown are skipped in the
+    combined text, so numbers are not always contiguous).
+    """
+    
+    def __init__(self, page_starts: List[int], page_numbers: List[int]):
+        if len(page_starts) != len(page_numbers):
+            raise ValueError("page_starts and page_numbers must have the same length")
+        self.page_starts = page_starts
+        self.page_numbers = page_numbers
+    
+    @property
+    def page_count(self) -> int:
+        return len(self.page_numbers)
+    
+    def page_at(self, offset: int) -> Optional[int]:
+        """Page containing the character at `offset` (O(log n))"""
+        if not self.page_starts:
+            return None
+        position = bisect_right(self.page_starts, offset) - 1
+        return self.page_numbers[max(position, 0)]
+    
+    def page_range(self, start: int, end: int) -> Tuple[Optional[int], Optional[int]]:
+        """First and last page covered by the half-open character span [start, end)"""
+        return self.page_at(start), self.page_at(max(start, end - 1))
+    
+    def to_json(self) -> bytes:
+        return json.dumps({
+            "page_starts": self.page_starts,
+            "page_numbers": self.page_numbers
+        }, separators=(",", ":")).encode('utf-8')
+    
+    @classmethod
+    def from_json(cls, data: bytes) -> "PageIndex":
+        payload = json.loads(data)
+        return cls(payload["page_starts"], payload["page_numbers"])
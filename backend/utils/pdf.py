@@ -0,0 +1,20 @@
+from typing import BinaryIO, Optional
+from pypdf import PdfReader
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def count_pdf_pages(fileobj: BinaryIO) -> Optional[int]:
+    """
+    Count the pages of a seekable PDF file object without loading it into memory.
+    
+    Returns:
+        Page count, or None when the file cannot be parsed
+    """
+    try:
+        fileobj.seek(0)
+        return len(PdfReader(fileobj).pages)
+    except Exception as e:
+        logger.warning(f"Could not count PDF pages: {e}")
+        return None
@@ -0,0 +1,57 @@
+import socket
+import ipaddress
+import urllib.request
+from urllib.parse import urlsplit
+
+
+class UnsafeURLError(ValueError):
+    """Raised for a URL that is not http(s) or points at a non-public address"""
+
+
+def check_public_url(url: str):
+    """
+    Reject URLs that are not http(s) or whose host resolves to a private,
+    loopback, link-local (e.g. instance metadata) or otherwise non-global address
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise UnsafeURLError(f"Only http(s) URLs can be fetched: {url}")
+    
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, parts.port or None)}
+    except socket.gaierror as e:
+        raise UnsafeURLError(f"Cannot resolve {parts.hostname}: {e}")
+    
+    for address in addresses:
+        # Drop the IPv6 zone id, e.g. fe80::1%eth0
+        if not ipaddress.ip_address(address.split("%")[0]).is_global:
+            raise UnsafeURLError(f"{parts.hostname} resolves to non-public address {address}")
+
+
+class _PublicRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Checks every redirect target, so a public URL cannot bounce to an internal host"""
+    
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        check_public_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_opener = urllib.request.build_opener(_PublicRedirectHandler)
+
+
+def open_public_url(url: str, timeout: float):
+    """
+    Open an http(s) URL on a public host, following only redirects to public hosts
+    
+    Args:
+        url: URL to download
+        timeout: Socket timeout in seconds
+    
+    Returns:
+        Response stream
+    
+    Raises:
+        UnsafeURLError: The URL or a redirect target is not a public http(s) URL
+    """
+    check_public_url(url)
+    return _opener.open(url, timeout=timeout)
@@ -0,0 +1,34 @@
+import time
+import threading
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by concurrent workers.
+    
+    `acquire` blocks until a token is available, so at most `rate_per_minute`
+    operations start per minute, with bursts of up to `burst`.
+    """
+    
+    def __init__(self, rate_per_minute: float, burst: int = 1):
+        if rate_per_minute <= 0:
+            raise ValueError(f"rate_per_minute must be positive, got {rate_per_minute}")
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = max(burst, 1)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+                self.updated_at = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate_per_second
+            
+            time.sleep(wait_seconds)
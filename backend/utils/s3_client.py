@@ -1,6 +1,7 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
-from typing import Optional
+from typing import BinaryIO, Iterator, Optional
 from config import get_settings
 import logging
 
@@ -18,6 +19,11 @@ class S3Client:
             region_name=settings.aws_default_region
         )
         self.bucket_name = settings.s3_bucket_name
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.s3_multipart_threshold_mb * 1024 * 1024,
+            multipart_chunksize=settings.s3_multipart_chunk_size_mb * 1024 * 1024,
+            max_concurrency=settings.s3_multipart_concurrency
+        )
         self._ensure_bucket_exists()
     
     def _ensure_bucket_exists(self):
@@ -45,6 +51,25 @@ class S3Client:
             logger.error(f"Failed to upload to S3: {e}")
             raise
     
+    def upload_stream(self, fileobj: BinaryIO, s3_key: str, content_type: str = "application/pdf") -> bool:
+        """
+        Stream a file-like object to S3, as a concurrent multipart upload above
+        the multipart threshold. Only one part per worker is held in memory.
+        """
+        try:
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={"ContentType": content_type},
+                Config=self.transfer_config
+            )
+            logger.info(f"Streamed file to S3: {s3_key}")
+            return True
+        except ClientError as e:
+            logger.error(f"Failed to upload to S3: {e}")
+            raise
+    
     def download_file(self, s3_key: str) -> bytes:
         try:
             response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
@@ -53,6 +78,38 @@ class S3Client:
             logger.error(f"Failed to download from S3: {e}")
             raise
     
+    def open_stream(self, s3_key: str):
+        """Streaming body of an object; the caller reads and closes it"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+            return response['Body']
+        except ClientError as e:
+            logger.error(f"Failed to download from S3: {e}")
+            raise
+    
+    def list_keys(self, prefix: str) -> Iterator[str]:
+        """All object keys under a prefix, paginated"""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            for obj in page.get('Contents', []):
+                yield obj['Key']
+    
+    def iter_lines(self, s3_key: str, encoding: str = "utf-8") -> Iterator[str]:
+        """Stream a text object line by line (line endings kept) without loading it whole"""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
+        except ClientError as e:
+            logger.error(f"Failed to download from S3: {e}")
+            raise
+        
+        body = response['Body']
+        try:
+            # Splitting on b"\n" never cuts a multi-byte UTF-8 character
+            for line in body.iter_lines(keepends=True):
+                yield line.decode(encoding)
+        finally:
+            body.close()
+    
     def get_presigned_url(self, s3_key: str, expiration: int = 3600) -> Optional[str]:
         try:
             url = self.s3_client.generate_presigned_url(
@@ -109,3 +109,15 @@ Evaluate:
 
 Respond with your THOUGHT and final decision.
 """
+
+REASONING_DECISION_PROMPT = """
+Decide the next step of the research and return it as a structured decision:
+- action: "search" to fill specific gaps, "analyze" to extract evidence from results not analyzed yet, or "generate" to write the report
+- queries: up to {max_queries} new, specific search queries when the action is "search" (do not repeat earlier queries)
+- confidence: 0.0 to 1.0, how well the collected evidence already answers the research query
+- done: true when the evidence is sufficient for a comprehensive report
+- rationale: one or two sentences explaining the decision
+
+Current state: {num_results} sources, {num_evidence} evidence items, {unanalyzed} results not analyzed yet, {remaining_iterations} reasoning iterations left.
+Prefer "generate" as soon as the evidence is sufficient; every extra iteration adds cost and latency.
+"""
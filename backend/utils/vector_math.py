@@ -0,0 +1,31 @@
+import math
+from typing import List
+
+
+def normalize(vector: List[float]) -> List[float]:
+    """Scale a vector to unit length (zero vectors are returned unchanged)"""
+    norm = math.sqrt(sum(value * value for value in vector))
+    if norm == 0:
+        return list(vector)
+    return [value / norm for value in vector]
+
+
+class RunningCentroid:
+    """Centroid accumulated one vector at a time, so the vectors need not be kept"""
+    
+    def __init__(self):
+        self.totals: List[float] = []
+        self.count = 0
+    
+    def add(self, vector: List[float]):
+        if not self.totals:
+            self.totals = [0.0] * len(vector)
+        for i, value in enumerate(vector):
+            self.totals[i] += value
+        self.count += 1
+    
+    def value(self) -> List[float]:
+        """Unit-length mean of the vectors added so far"""
+        if not self.count:
+            raise ValueError("Cannot compute centroid of an empty vector list")
+        return normalize([total / self.count for total in self.totals])
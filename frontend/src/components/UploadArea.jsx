@@ -41,8 +41,8 @@ export default function UploadArea({ onUploadSuccess }) {
       return
     }
 
-    if (file.size > 5 * 1024 * 1024) {
-      setError('File size must be less than 5MB')
+    if (file.size > 200 * 1024 * 1024) {
+      setError('File size must be less than 200MB')
       return
     }
 
@@ -196,7 +196,7 @@ export default function UploadArea({ onUploadSuccess }) {
                 </button>
               </div>
               <p className="text-sm text-neutral-500 dark:text-neutral-400 mt-6">
-                Maximum file size: 5MB • Supported format: PDF
+                Maximum file size: 200MB • Supported format: PDF
               </p>
             </>
           )}